@@ -1,13 +1,30 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import snowflake.connector
 from snowflake.connector import DictCursor
+import functools
 import os
+import time
+import uuid
 from dotenv import load_dotenv
 
+from stockpulse import alert_rules, analytics, charts, history
+from stockpulse.batches import batch_progress, fetch_frame
+from stockpulse.cache import call_key, fetch_cache, swr_cache
+from stockpulse.charts import FigureCache
+from stockpulse.cube import StockCube
+from stockpulse.exports import EXPORT_FORMATS, ExportCache, build_export
+from stockpulse.local_backend import LocalWarehouse
+from stockpulse.metrics import current_section, payload_size, registry as metrics
+from stockpulse.profiling import PROFILE_MODES, ProfileCapture
+from stockpulse.query_profile import FileProfileSink, ProfiledCursor, QueryProfiler, SnowflakeProfileSink
+from stockpulse.ranking import RankingIndex
+from stockpulse.refresher import Refresher
+from stockpulse.reports import REPORT_FORMATS, REPORTS, ReportManager
+from stockpulse.resilience import CircuitBreaker, CircuitOpenError, SnapshotStore, WarehouseUnavailableError
+from stockpulse.schema import SCHEMAS
+
 # Load environment variables
 load_dotenv()
 
@@ -197,8 +214,6 @@ if 'dark_mode' not in st.session_state:
     st.session_state.dark_mode = False
 if 'compare_locations' not in st.session_state:
     st.session_state.compare_locations = []
-if 'custom_alert_items' not in st.session_state:
-    st.session_state.custom_alert_items = {}
 if 'favorite_items' not in st.session_state:
     st.session_state.favorite_items = set()
 if 'dashboard_layout' not in st.session_state:
@@ -210,6 +225,9 @@ if 'simulation_params' not in st.session_state:
 def get_snowflake_connection():
     """Create Snowflake connection - supports both local .env and Streamlit Secrets"""
     try:
+        # Offline stand-in (development and load tests)
+        if os.getenv('STOCKPULSE_BACKEND') == 'local':
+            return LocalWarehouse(os.getenv('STOCKPULSE_LOCAL_DIR', '.stockpulse/local')).dashboard_connection()
         # Try Streamlit secrets first (for cloud deployment)
         if hasattr(st, 'secrets') and 'SNOWFLAKE_ACCOUNT' in st.secrets:
             conn = snowflake.connector.connect(
@@ -237,12 +255,151 @@ def get_snowflake_connection():
         st.error(f"❌ Failed to connect to Snowflake: {str(e)}")
         return None
 
-@st.cache_data(ttl=300)
-def get_executive_summary():
-    """Fetch executive summary data"""
+def stamp_data_version(df):
+    """Tag a fetched frame with the time it was read from Snowflake"""
+    df.attrs['data_version'] = datetime.now().isoformat()
+    return df
+
+def require_connection():
+    """Snowflake connection for a cached fetch (raises instead of returning None)"""
     conn = get_snowflake_connection()
     if not conn:
+        # Don't keep the failed attempt cached; the next call reconnects
+        get_snowflake_connection.clear()
+        raise WarehouseUnavailableError("No Snowflake connection")
+    return conn
+
+@st.cache_resource
+def get_query_profiler():
+    """
+    Process-wide query profile writer
+    
+    STOCKPULSE_QUERY_PROFILE selects the sink: 'snowflake' (default,
+    MONITORING.DASHBOARD_QUERY_PROFILE), 'file' (JSON lines at
+    STOCKPULSE_QUERY_PROFILE_FILE; the default on the local backend) or 'off'.
+    """
+    
+    local = os.getenv('STOCKPULSE_BACKEND') == 'local'
+    mode = os.getenv('STOCKPULSE_QUERY_PROFILE', 'file' if local else 'snowflake')
+    if mode == 'off':
         return None
+    if mode == 'file':
+        sink = FileProfileSink(os.getenv('STOCKPULSE_QUERY_PROFILE_FILE', '.stockpulse/query_profile.jsonl'))
+    else:
+        sink = SnowflakeProfileSink(require_connection)
+    return QueryProfiler(sink)
+
+def tagged_cursor(conn, function, cursor_class=None):
+    """Cursor whose queries carry a QUERY_TAG (function + dashboard section) and are profiled"""
+    cursor = conn.cursor(cursor_class) if cursor_class else conn.cursor()
+    return ProfiledCursor(cursor, function, current_section, get_query_profiler())
+
+def probe_warehouse():
+    """Reconnect and run a trivial query (raises while Snowflake is down)"""
+    get_snowflake_connection.clear()
+    cursor = tagged_cursor(require_connection(), 'probe_warehouse')
+    cursor.execute("SELECT 1")
+    cursor.close()
+
+# Failures that mean the warehouse is unreachable; query errors don't count
+OUTAGE_ERRORS = (
+    snowflake.connector.errors.OperationalError,
+    snowflake.connector.errors.InterfaceError,
+    WarehouseUnavailableError,
+)
+
+@st.cache_resource
+def get_circuit_breaker():
+    """Process-wide breaker in front of every warehouse fetch"""
+    return CircuitBreaker(probe_warehouse, failure_threshold=3, probe_interval=15, outage_errors=OUTAGE_ERRORS)
+
+@st.cache_resource
+def get_snapshot_store():
+    """Last good result of every fetch, kept on disk across restarts"""
+    return SnapshotStore(os.getenv('STOCKPULSE_SNAPSHOT_DIR', '.stockpulse/snapshots'))
+
+@st.cache_resource
+def get_alert_rule_store():
+    """Custom alert rules shared by all sessions, kept on disk across restarts"""
+    return alert_rules.AlertRuleStore(os.getenv('STOCKPULSE_ALERT_RULES', '.stockpulse/alert_rules.json'))
+
+def warehouse_fetch(ttl, error_message, empty=pd.DataFrame):
+    """
+    Cache a Snowflake fetch with stale-while-revalidate and single-flight
+    
+    Concurrent identical calls share one query; once ttl passes the old
+    result keeps being served while a single background query replaces it.
+    Queries go through the circuit breaker and every success is persisted,
+    so during an outage calls fail fast and the last snapshot is served.
+    The fetch raises on failure so an error never overwrites cached data;
+    without a snapshot the caller gets st.error plus empty() instead.
+    """
+    
+    def decorate(fetch):
+        name = fetch.__name__
+        
+        def guarded(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = get_circuit_breaker().call(fetch, *args, **kwargs)
+            except CircuitOpenError:
+                # Nothing was sent to the warehouse
+                raise
+            except Exception:
+                metrics.record_query(name, time.perf_counter() - started, error=True)
+                raise
+            metrics.record_query(name, time.perf_counter() - started, result)
+            try:
+                get_snapshot_store().save(name, call_key(fetch, args, kwargs), result)
+            except OSError:
+                pass
+            return result
+        
+        cached = swr_cache(ttl)(functools.wraps(fetch)(guarded))
+        
+        @functools.wraps(fetch)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                value, status = cached.lookup(*args, **kwargs)
+            except Exception as e:
+                snapshot = get_snapshot_store().load(name, call_key(fetch, args, kwargs))
+                if snapshot is not None:
+                    value, saved_at = snapshot
+                    as_of = st.session_state.get('snapshot_as_of')
+                    st.session_state.snapshot_as_of = min(as_of, saved_at) if as_of else saved_at
+                    metrics.record_fetch(name, time.perf_counter() - started, 'snapshot')
+                    return value
+                metrics.record_fetch(name, time.perf_counter() - started, 'error')
+                st.error(f"{error_message}: {str(e)}")
+                return empty()
+            metrics.record_fetch(name, time.perf_counter() - started, status)
+            return value
+        
+        wrapper.clear = cached.clear
+        wrapper.refresh = cached.refresh
+        return wrapper
+    
+    return decorate
+
+def render_outage_banner():
+    """'Data as of' warning while the warehouse breaker is open"""
+    breaker = get_circuit_breaker()
+    if not breaker.is_open:
+        st.session_state.pop('snapshot_as_of', None)
+        return
+    
+    as_of = st.session_state.get('snapshot_as_of') or breaker.last_success
+    as_of_text = datetime.fromtimestamp(as_of).strftime('%Y-%m-%d %H:%M:%S') if as_of else 'unknown'
+    st.warning(
+        f"⚠️ Snowflake is unavailable ({breaker.last_error}). Showing saved data as of "
+        f"**{as_of_text}**; live data resumes automatically once the connection recovers."
+    )
+
+@warehouse_fetch(300, "Error fetching summary", empty=lambda: None)
+def get_executive_summary():
+    """Fetch executive summary data"""
+    conn = require_connection()
     
     query = """
         SELECT 
@@ -264,22 +421,16 @@ def get_executive_summary():
         LIMIT 1
     """
     
-    try:
-        cursor = conn.cursor(DictCursor)
-        cursor.execute(query)
-        result = cursor.fetchone()
-        cursor.close()
-        return result
-    except Exception as e:
-        st.error(f"Error fetching summary: {str(e)}")
-        return None
+    cursor = tagged_cursor(conn, 'get_executive_summary', DictCursor)
+    cursor.execute(query)
+    result = cursor.fetchone()
+    cursor.close()
+    return result
 
-@st.cache_data(ttl=300)
+@warehouse_fetch(300, "Error fetching heatmap")
 def get_stock_heatmap(location=None, category=None, risk=None):
     """Fetch stock health heatmap data"""
-    conn = get_snowflake_connection()
-    if not conn:
-        return pd.DataFrame()
+    conn = require_connection()
     
     query = """
         SELECT 
@@ -311,23 +462,16 @@ def get_stock_heatmap(location=None, category=None, risk=None):
     
     query += " ORDER BY STOCK_HEALTH_SCORE ASC, LOCATION_NAME, ITEM_NAME"
     
-    try:
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        columns = [desc[0] for desc in cursor.description]
-        data = cursor.fetchall()
-        cursor.close()
-        return pd.DataFrame(data, columns=columns)
-    except Exception as e:
-        st.error(f"Error fetching heatmap: {str(e)}")
-        return pd.DataFrame()
+    cursor = tagged_cursor(conn, 'get_stock_heatmap')
+    cursor.execute(query, params)
+    frame = fetch_frame(cursor, SCHEMAS['heatmap'])
+    cursor.close()
+    return stamp_data_version(frame)
 
-@st.cache_data(ttl=60)
+@warehouse_fetch(60, "Error fetching alerts")
 def get_alerts():
     """Fetch active alerts"""
-    conn = get_snowflake_connection()
-    if not conn:
-        return pd.DataFrame()
+    conn = require_connection()
     
     query = """
         SELECT 
@@ -354,26 +498,16 @@ def get_alerts():
         LIMIT 100
     """
     
-    try:
-        cursor = conn.cursor()
-        cursor.execute(query)
-        columns = [desc[0] for desc in cursor.description]
-        data = cursor.fetchall()
-        cursor.close()
-        df = pd.DataFrame(data, columns=columns)
-        # Filter out acknowledged alerts
-        df = df[~df['ALERT_ID'].isin(st.session_state.acknowledged_alerts)]
-        return df
-    except Exception as e:
-        st.error(f"Error fetching alerts: {str(e)}")
-        return pd.DataFrame()
+    cursor = tagged_cursor(conn, 'get_alerts')
+    cursor.execute(query)
+    frame = fetch_frame(cursor, SCHEMAS['alerts'])
+    cursor.close()
+    return stamp_data_version(frame)
 
-@st.cache_data(ttl=300)
+@warehouse_fetch(300, "Error fetching reorders")
 def get_reorder_recommendations():
     """Fetch reorder recommendations"""
-    conn = get_snowflake_connection()
-    if not conn:
-        return pd.DataFrame()
+    conn = require_connection()
     
     query = """
         SELECT 
@@ -395,41 +529,30 @@ def get_reorder_recommendations():
         LIMIT 50
     """
     
-    try:
-        cursor = conn.cursor()
-        cursor.execute(query)
-        columns = [desc[0] for desc in cursor.description]
-        data = cursor.fetchall()
-        cursor.close()
-        return pd.DataFrame(data, columns=columns)
-    except Exception as e:
-        st.error(f"Error fetching reorders: {str(e)}")
-        return pd.DataFrame()
+    cursor = tagged_cursor(conn, 'get_reorder_recommendations')
+    cursor.execute(query)
+    frame = fetch_frame(cursor, SCHEMAS['reorders'])
+    cursor.close()
+    return stamp_data_version(frame)
 
-@st.cache_data(ttl=600)
+@warehouse_fetch(600, "Error fetching filters", empty=lambda: ([], [], []))
 def get_filter_options():
     """Get filter options"""
-    conn = get_snowflake_connection()
-    if not conn:
-        return [], [], []
+    conn = require_connection()
     
-    try:
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT DISTINCT LOCATION_NAME FROM DT_STOCK_HEALTH_CLASSIFICATION ORDER BY LOCATION_NAME")
-        locations = [row[0] for row in cursor.fetchall()]
-        
-        cursor.execute("SELECT DISTINCT ITEM_CATEGORY FROM DT_STOCK_HEALTH_CLASSIFICATION ORDER BY ITEM_CATEGORY")
-        categories = [row[0] for row in cursor.fetchall()]
-        
-        cursor.execute("SELECT DISTINCT RISK_CLASSIFICATION FROM DT_STOCK_HEALTH_CLASSIFICATION ORDER BY RISK_CLASSIFICATION")
-        risks = [row[0] for row in cursor.fetchall()]
-        
-        cursor.close()
-        return locations, categories, risks
-    except Exception as e:
-        st.error(f"Error fetching filters: {str(e)}")
-        return [], [], []
+    cursor = tagged_cursor(conn, 'get_filter_options')
+    
+    cursor.execute("SELECT DISTINCT LOCATION_NAME FROM DT_STOCK_HEALTH_CLASSIFICATION ORDER BY LOCATION_NAME")
+    locations = [row[0] for row in cursor.fetchall()]
+    
+    cursor.execute("SELECT DISTINCT ITEM_CATEGORY FROM DT_STOCK_HEALTH_CLASSIFICATION ORDER BY ITEM_CATEGORY")
+    categories = [row[0] for row in cursor.fetchall()]
+    
+    cursor.execute("SELECT DISTINCT RISK_CLASSIFICATION FROM DT_STOCK_HEALTH_CLASSIFICATION ORDER BY RISK_CLASSIFICATION")
+    risks = [row[0] for row in cursor.fetchall()]
+    
+    cursor.close()
+    return locations, categories, risks
 
 def get_risk_color(risk):
     """Get color for risk classification"""
@@ -455,49 +578,1404 @@ def get_risk_icon(risk):
     }
     return icons.get(risk, '⚪')
 
-def calculate_cost_savings(reorders_df):
-    """Calculate potential cost savings from optimized reordering"""
-    if reorders_df.empty:
-        return 0, 0, 0
+@st.cache_resource
+def get_figure_cache():
+    """Figure specs shared by all sessions"""
+    return FigureCache()
+
+def cached_figure(chart_id, builder, source, filters=()):
+    """Figure rebuilt only when chart, filters, data version or theme change"""
+    dark = st.session_state.dark_mode
+    version = source.attrs.get('data_version')
+    if version is None:
+        return builder(dark)
+    key = (chart_id, tuple(filters), version, dark)
+    return get_figure_cache().figure(key, lambda: builder(dark))
+
+ANALYSES = {
+    'velocity': analytics.velocity_analysis,
+    'costs': analytics.cost_analysis,
+    'transfers': analytics.transfer_plan,
+}
+
+@st.cache_data(ttl=600, show_spinner=False, max_entries=256)
+def cached_analysis(name, version, filters, args, _source):
+    """Analytics result, computed once per data version and filters"""
+    return ANALYSES[name](_source, *args)
+
+def run_analysis(name, source, filters, *args):
+    """Run a tab's analytics through the cache, keyed by the source frame's data version"""
+    version = source.attrs.get('data_version')
+    if version is None:
+        return ANALYSES[name](source, *args)
+    return cached_analysis(name, version, tuple(filters), args, source)
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def cached_cube(version, _heatmap):
+    """Stock cube shared by all sessions, built once per data version"""
+    return StockCube.from_heatmap(_heatmap)
+
+def get_stock_cube():
+    """Location x category x risk x critical cube of the unfiltered health rows"""
+    heatmap = get_stock_heatmap()
+    version = heatmap.attrs.get('data_version')
+    if version is None:
+        return StockCube.from_heatmap(heatmap)
+    return cached_cube(version, heatmap)
+
+# Health-row measures the Top Performers lists rank by
+RANKED_MEASURES = ['STOCK_HEALTH_SCORE', 'DAYS_OF_COVER', 'CURRENT_STOCK', 'AVG_DAILY_ISSUE']
+
+def build_rankings(heatmap, cube):
+    """Item ranking grouped by risk classification and location ranking by health"""
+    return (
+        RankingIndex(heatmap, RANKED_MEASURES, group='RISK_CLASSIFICATION'),
+        RankingIndex(analytics.location_rollup(cube).reset_index(), ['AVG_HEALTH']),
+    )
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def cached_rankings(version, _heatmap, _cube):
+    """Ranking indexes shared by all sessions, built once per data version"""
+    return build_rankings(_heatmap, _cube)
+
+def get_rankings():
+    """(items, locations) ranking indexes of the unfiltered health rows"""
+    heatmap = get_stock_heatmap()
+    version = heatmap.attrs.get('data_version')
+    if version is None:
+        return build_rankings(heatmap, get_stock_cube())
+    return cached_rankings(version, heatmap, get_stock_cube())
+
+# Numeric columns rounded to 2 decimals in exports (avoids ### in Excel)
+HEATMAP_ROUND_COLUMNS = ['CURRENT_STOCK', 'STOCK_HEALTH_SCORE', 'DAYS_OF_COVER', 'DAYS_UNTIL_STOCKOUT', 'AVG_DAILY_ISSUE']
+REORDER_ROUND_COLUMNS = [
+    'CURRENT_STOCK', 'AVG_DAILY_ISSUE', 'SUGGESTED_REORDER_QUANTITY', 'ESTIMATED_ORDER_VALUE',
+    'PROCUREMENT_PRIORITY_SCORE', 'URGENCY_SCORE', 'DAYS_UNTIL_STOCKOUT',
+]
+
+@st.cache_resource
+def get_export_cache():
+    """Process-wide cache of built export files"""
+    return ExportCache()
+
+def export_button(label, df, dataset, file_stem, filters=(), round_columns=None, version=None, key=None, **kwargs):
+    """Download button that serializes df only when it is clicked"""
+    fmt = st.session_state.get('export_format', 'csv.gz')
+    _, extension, mime = EXPORT_FORMATS[fmt]
+    version = version or df.attrs.get('data_version')
+    
+    def build():
+        if version is None:
+            return build_export(df, fmt, round_columns)
+        cache_key = (dataset, tuple(filters), version, fmt, tuple(round_columns or ()))
+        return get_export_cache().get_or_build(
+            cache_key, lambda: build_export(df, fmt, round_columns)
+        )
+    
+    st.download_button(
+        label=label,
+        data=build,
+        file_name=f"{file_stem}.{extension}",
+        mime=mime,
+        on_click="ignore",
+        key=key,
+        **kwargs
+    )
+
+@st.cache_resource
+def get_report_manager():
+    """Report worker pool shared by all sessions"""
+    return ReportManager()
+
+def report_panel(manager, summary, heatmap, version, polling):
+    """Report buttons, build progress and finished downloads"""
+    fmt = st.radio(
+        "Report format",
+        list(REPORT_FORMATS),
+        format_func=lambda fmt: REPORT_FORMATS[fmt][0],
+        horizontal=True,
+        key='report_format'
+    )
+    
+    buttons = [
+        ('executive_summary', "📋 Executive Summary Report"),
+        ('critical_items', "🚨 Critical Items Report"),
+        ('performance', "🎯 Performance Metrics"),
+    ]
+    active = False
+    for column, (report, label) in zip(st.columns(3), buttons):
+        with column:
+            job = manager.get(report, fmt, version)
+            if job is None or job.status == 'failed':
+                if job is not None:
+                    st.error(job.message)
+                st.button(
+                    label,
+                    use_container_width=True,
+                    key=f"report_{report}",
+                    on_click=manager.submit,
+                    args=(report, fmt, version, summary, heatmap)
+                )
+            elif job.active:
+                active = True
+                st.progress(job.progress, text=f"{job.title}: {job.message}")
+            else:
+                st.download_button(
+                    f"📥 Download {job.title}",
+                    data=job.result,
+                    file_name=job.file_name,
+                    mime=job.mime,
+                    on_click="ignore",
+                    use_container_width=True,
+                    key=f"download_{report}"
+                )
+    
+    # Switch polling on or off with a full rerun when a build starts or ends
+    if active != polling:
+        st.rerun()
+
+def render_report_exports(summary, heatmap):
+    """Advanced Export Options, built in the background and polled while running"""
+    manager = get_report_manager()
+    version = (
+        str(summary.get('DATA_AS_OF_DATE')) if summary else None,
+        heatmap.attrs.get('data_version')
+    )
+    fmt = st.session_state.get('report_format', next(iter(REPORT_FORMATS)))
+    polling = any(
+        job is not None and job.active
+        for job in (manager.get(report, fmt, version) for report in REPORTS)
+    )
+    panel = st.fragment(report_panel, run_every=2 if polling else None)
+    panel(manager, summary, heatmap, version, polling)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def analytics_table_exists(table):
+    """Whether an ANALYTICS table is deployed (checked once an hour)"""
+    conn = require_connection()
+    cursor = tagged_cursor(conn, 'analytics_table_exists')
+    cursor.execute("""
+        SELECT COUNT(*)
+        FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = 'ANALYTICS' AND TABLE_NAME = %s
+    """, [table])
+    count = cursor.fetchone()[0]
+    cursor.close()
+    return count > 0
+
+@warehouse_fetch(300, "Error fetching location rollup")
+def get_location_rollup():
+    """
+    Per-location aggregates from DT_LOCATION_RISK_SUMMARY, indexed by location name
+    
+    Empty, without querying it, where the table isn't deployed; the
+    comparison then derives the rollup from the health rows.
+    """
+    conn = require_connection()
+    if not analytics_table_exists('DT_LOCATION_RISK_SUMMARY'):
+        return stamp_data_version(pd.DataFrame(columns=list(SCHEMAS['locations'])).set_index('LOCATION_NAME'))
+    
+    query = """
+        SELECT 
+            LOCATION_NAME,
+            TOTAL_ITEMS,
+            AVG_STOCK_HEALTH_SCORE AS AVG_HEALTH,
+            REQUIRES_ATTENTION_COUNT AS AT_RISK,
+            CRITICAL_ITEM_COUNT AS CRITICAL_ITEMS,
+            AVG_DAYS_OF_COVER AS AVG_DAYS_COVER
+        FROM DT_LOCATION_RISK_SUMMARY
+    """
+    
+    cursor = tagged_cursor(conn, 'get_location_rollup')
+    cursor.execute(query)
+    frame = fetch_frame(cursor, SCHEMAS['locations'])
+    cursor.close()
+    return stamp_data_version(frame.set_index('LOCATION_NAME'))
+
+def get_location_comparison(locations_list):
+    """Compare metrics across selected locations (row lookups in the location rollup)"""
+    if not locations_list:
+        return pd.DataFrame()
+    
+    rollup = get_location_rollup()
+    version = rollup.attrs.get('data_version')
+    if rollup.empty:
+        # Rollup table not deployed: derive it once per data version from the health rows
+        heatmap = get_stock_heatmap()
+        if heatmap.empty:
+            return pd.DataFrame()
+        rollup = analytics.location_rollup(get_stock_cube())
+        version = heatmap.attrs.get('data_version')
+    
+    comparison = analytics.compare_locations(rollup, locations_list)
+    comparison.attrs['data_version'] = version
+    return comparison
+
+@warehouse_fetch(3600, "Error fetching stock history")
+def get_stock_history(grain, location=None, category=None, item=None):
+    """
+    Whole stock history of a selection from DAILY_STOCK_RAW, one row per period
+    
+    Rows are summed per day, then the days are bucketed by grain in the
+    warehouse: average, lowest and highest closing stock plus total
+    issues and receipts per period.
+    """
+    
+    if grain not in history.GRAINS:
+        raise ValueError(f"Unknown grain: {grain}")
+    conn = require_connection()
+    
+    query = """
+        WITH DAILY AS (
+            SELECT 
+                RECORD_DATE,
+                SUM(CLOSING_STOCK) AS CLOSING_STOCK,
+                SUM(ISSUES) AS ISSUES,
+                SUM(RECEIPTS) AS RECEIPTS
+            FROM DATA.DAILY_STOCK_RAW
+            WHERE 1=1
+    """
+    
+    params = []
+    if location:
+        query += " AND LOCATION_NAME = %s"
+        params.append(location)
+    if category:
+        query += " AND ITEM_CATEGORY = %s"
+        params.append(category)
+    if item:
+        query += " AND ITEM_NAME = %s"
+        params.append(item)
+    
+    query += f"""
+            GROUP BY RECORD_DATE
+        )
+        SELECT 
+            DATE_TRUNC('{grain}', RECORD_DATE) AS PERIOD,
+            AVG(CLOSING_STOCK) AS CLOSING_STOCK,
+            MIN(CLOSING_STOCK) AS MIN_CLOSING_STOCK,
+            MAX(CLOSING_STOCK) AS MAX_CLOSING_STOCK,
+            SUM(ISSUES) AS ISSUES,
+            SUM(RECEIPTS) AS RECEIPTS,
+            COUNT(*) AS DAYS
+        FROM DAILY
+        GROUP BY 1
+        ORDER BY 1
+    """
+    
+    cursor = tagged_cursor(conn, 'get_stock_history')
+    cursor.execute(query, params)
+    frame = fetch_frame(cursor, SCHEMAS['history'])
+    cursor.close()
+    return stamp_data_version(frame)
+
+# Dynamic table behind each dataset the dashboard reads
+DATASET_TABLES = {
+    'summary': 'DT_EXECUTIVE_SUMMARY',
+    'health': 'DT_STOCK_HEALTH_CLASSIFICATION',
+    'reorders': 'DT_REORDER_RECOMMENDATIONS',
+    'locations': 'DT_LOCATION_RISK_SUMMARY',
+}
+
+DATASET_FETCHERS = {
+    'summary': [get_executive_summary],
+    'health': [get_stock_heatmap, get_alerts, get_filter_options],
+    'reorders': [get_reorder_recommendations],
+    'locations': [get_location_rollup],
+}
+
+# Datasets drawn outside the fragments (executive summary, location comparison);
+# the tabs and quick exports redraw themselves on their run_every tick
+PAGE_DATASETS = {'summary', 'locations'}
+
+def refresh_every():
+    """run_every of the fragments that redraw themselves from the refreshed cache"""
+    return st.session_state.refresh_interval if st.session_state.auto_refresh else None
+
+def probe_data_versions():
+    """LAST_ALTERED of each dataset's dynamic table (one metadata query)"""
+    conn = get_snowflake_connection()
+    if not conn:
+        raise WarehouseUnavailableError("No Snowflake connection")
+    
+    tables = list(DATASET_TABLES.values())
+    placeholders = ','.join(['%s'] * len(tables))
+    cursor = tagged_cursor(conn, 'probe_data_versions')
+    cursor.execute(f"""
+        SELECT TABLE_NAME, LAST_ALTERED
+        FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = 'ANALYTICS'
+          AND TABLE_NAME IN ({placeholders})
+    """, tables)
+    altered = {row[0]: str(row[1]) for row in cursor.fetchall()}
+    cursor.close()
+    return {name: altered.get(table) for name, table in DATASET_TABLES.items()}
+
+def refresh_datasets(changed):
+    """Re-run every cached fetch of the changed datasets once, in place"""
+    # Sessions keep reading the old results until each replacement lands,
+    # so nobody waits on (or duplicates) the refresh queries
+    for dataset in changed:
+        for fetcher in DATASET_FETCHERS[dataset]:
+            fetcher.refresh()
+
+@st.cache_resource
+def get_refresher():
+    """The process-wide refresher thread, shared by all sessions"""
+    return Refresher(probe_data_versions, on_change=refresh_datasets).start()
+
+def render_refresh_watcher():
+    """Heartbeat to the shared refresher; reruns the page when data outside the fragments changed"""
+    refresher = get_refresher()
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    if 'seen_generation' not in st.session_state:
+        st.session_state.seen_generation = refresher.generation
+    
+    refresher.subscribe(st.session_state.session_id, st.session_state.refresh_interval)
+    generation = refresher.generation
+    changed = refresher.changed_since(st.session_state.seen_generation)
+    st.session_state.seen_generation = generation
+    
+    if refresher.last_error:
+        st.caption(f"🟠 Auto-refresh check failed: {refresher.last_error}")
+    elif refresher.last_poll:
+        st.caption(f"🟢 Data checked at {datetime.fromtimestamp(refresher.last_poll).strftime('%H:%M:%S')}")
+    
+    if changed:
+        # Only the changed datasets were re-fetched. Tab and export fragments
+        # pick them up on their own tick; the page reruns only for the summary,
+        # the location comparison and new filter options
+        st.session_state.last_refresh = datetime.now()
+        page_datasets = st.session_state.get('page_datasets', PAGE_DATASETS)
+        if changed & page_datasets:
+            st.rerun()
+        if 'health' in changed and get_filter_options() != st.session_state.get('filter_options'):
+            st.rerun()
+
+def is_admin():
+    """Admin tools are shown only when the server runs with STOCKPULSE_ADMIN=1"""
+    # Not a URL parameter: visitors could set it, and the profiler writes files
+    return os.getenv('STOCKPULSE_ADMIN') == '1'
+
+@st.cache_resource
+def start_metrics_export():
+    """Serve /metrics on STOCKPULSE_METRICS_PORT and/or rewrite STOCKPULSE_METRICS_FILE (once per process)"""
+    port = os.getenv('STOCKPULSE_METRICS_PORT')
+    if port:
+        metrics.serve(int(port))
+    path = os.getenv('STOCKPULSE_METRICS_FILE')
+    if path:
+        metrics.export_textfile(path)
+    return True
+
+def dataset_footprints():
+    """Rows and bytes of each dataset's cached unfiltered result and of its snapshots"""
+    snapshots = get_snapshot_store().sizes()
+    rows = []
+    for dataset, fetchers in DATASET_FETCHERS.items():
+        for fetch in fetchers:
+            count, nbytes = payload_size(fetch())
+            rows.append({
+                'DATASET': dataset,
+                'FUNCTION': fetch.__name__,
+                'ROWS': count,
+                'MEMORY_BYTES': nbytes,
+                'BYTES_PER_ROW': round(nbytes / count) if count else 0,
+                'SNAPSHOT_BYTES': snapshots.get(fetch.__name__, 0),
+            })
+    return pd.DataFrame(rows)
+
+def render_metrics_panel():
+    """Admin view of render, fetch and query latency percentiles for this process"""
+    with st.expander("🛠️ Performance Metrics", expanded=False):
+        st.caption("p50/p95/p99 over the last 2048 samples; counts since the server started")
+        
+        st.markdown("**Sections**")
+        st.dataframe(metrics.summary('section'), hide_index=True, use_container_width=True)
+        
+        st.markdown("**get_* calls**")
+        fetches = metrics.summary('fetch')
+        cache_results = pd.Series({
+            (dict(labels)['function'], dict(labels)['result']): value
+            for labels, value in metrics.counters('stockpulse_fetch_cache_total').items()
+        }, dtype=float)
+        if not fetches.empty and not cache_results.empty:
+            by_result = cache_results.unstack(fill_value=0)
+            served = by_result.reindex(columns=['hit', 'stale', 'coalesced'], fill_value=0).sum(axis=1)
+            hit_pct = (served / by_result.sum(axis=1) * 100).rename('HIT_PCT')
+            fetches = fetches.merge(hit_pct, left_on='NAME', right_index=True, how='left')
+        st.dataframe(fetches, hide_index=True, use_container_width=True)
+        
+        st.markdown("**Warehouse queries**")
+        queries = metrics.summary('query')
+        for metric, column in [('stockpulse_query_rows_total', 'ROWS'), ('stockpulse_query_bytes_total', 'BYTES')]:
+            totals = {dict(labels)['function']: value for labels, value in metrics.counters(metric).items()}
+            queries[column] = queries['NAME'].map(totals).fillna(0)
+        st.dataframe(queries, hide_index=True, use_container_width=True)
+        
+        st.markdown("**Datasets**")
+        st.caption("Unfiltered results as cached in memory (typed columns) and as pickled snapshots")
+        st.dataframe(dataset_footprints(), hide_index=True, use_container_width=True)
+        
+        st.download_button(
+            "📥 Prometheus metrics",
+            data=metrics.to_prometheus,
+            file_name="stockpulse_metrics.prom",
+            mime="text/plain",
+            on_click="ignore",
+            use_container_width=True
+        )
+
+# Sections an on-demand profile can wrap: one main() rerun or one tab
+PROFILE_TARGETS = ['main', 'tab.heatmap', 'tab.alerts', 'tab.reorders', 'tab.analytics', 'tab.costs', 'tab.performers', 'tab.history']
+
+@st.cache_resource
+def get_env_profile_request():
+    """One capture armed for the whole process by STOCKPULSE_PROFILE=<section>[:deterministic]"""
+    target = os.getenv('STOCKPULSE_PROFILE')
+    if not target:
+        return {}
+    section, _, mode = target.partition(':')
+    return {'section': section, 'mode': mode or 'sampling'}
+
+def take_profile_request(section):
+    """ProfileCapture when this session (admin toggle) or the process (env) armed one for section"""
+    request = st.session_state.get('profile_request')
+    if request and request['section'] == section:
+        del st.session_state['profile_request']
+    else:
+        env_request = get_env_profile_request()
+        # pop() so exactly one session takes the process-wide capture
+        if env_request.get('section') != section or env_request.pop('section', None) is None:
+            return None
+        request = {'section': section, 'mode': env_request['mode']}
+    return ProfileCapture(section, os.getenv('STOCKPULSE_PROFILE_DIR', '.stockpulse/profiles'), request['mode'])
+
+def instrumented(section):
+    """Time a dashboard section, and profile it when a capture is armed for it"""
+    def decorate(render):
+        timed = metrics.timed(section)(render)
+        
+        @functools.wraps(render)
+        def wrapper(*args, **kwargs):
+            capture = take_profile_request(section)
+            if capture is None:
+                return timed(*args, **kwargs)
+            try:
+                with capture:
+                    return timed(*args, **kwargs)
+            finally:
+                # Also reached when the section ends in st.rerun()
+                if capture.result is not None:
+                    results = st.session_state.setdefault('profile_results', [])
+                    results.insert(0, capture.result)
+                    del results[5:]
+        
+        return wrapper
+    
+    return decorate
+
+def render_profiler_panel():
+    """Admin controls to profile one rerun or tab of this session, plus the latest captures"""
+    with st.expander("🔬 Profiler", expanded=False):
+        section = st.selectbox("Profile", PROFILE_TARGETS, key='profile_section')
+        mode = st.radio("Profiler", PROFILE_MODES, horizontal=True, key='profile_mode')
+        st.caption("Only this session's thread is profiled. A tab is captured the next time it renders.")
+        if st.button("⏺️ Profile next run", use_container_width=True):
+            st.session_state.profile_request = {'section': section, 'mode': mode}
+            st.rerun()
+        
+        for idx, result in enumerate(st.session_state.get('profile_results', [])):
+            st.markdown(
+                f"**{result['section']}** · {result['mode']} · {result['duration_ms']:.0f} ms · "
+                f"{result['captured_at'].strftime('%H:%M:%S')}"
+            )
+            st.dataframe(result['top'].round(1), hide_index=True, use_container_width=True)
+            for path in result['files']:
+                st.download_button(
+                    f"📥 {os.path.basename(path)}",
+                    data=lambda path=path: open(path, 'rb').read(),
+                    file_name=os.path.basename(path),
+                    on_click="ignore",
+                    key=f"profile_file_{idx}_{path}",
+                    use_container_width=True
+                )
+
+def first_rows_preview(placeholder, rows=100):
+    """batch_progress() callback showing a fetch's first rows in placeholder until it completes"""
+    def show(first_batch, fetched):
+        with placeholder.container():
+            st.caption(f"⏳ Loading stock levels… {fetched:,} rows so far")
+            st.dataframe(first_batch.head(rows), hide_index=True, use_container_width=True)
+    
+    return show
+
+@instrumented('tab.heatmap')
+def render_heatmap_tab(location_filter, category_filter, risk_filter):
+    """Stock Heatmap tab, rerun on its own when its widgets change"""
+    st.subheader("🔥 Stock Health Matrix")
+    
+    # Filters and search
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        search = st.text_input("🔍 Search items or locations...", "", key="heatmap_search")
+    with col2:
+        sort_by = st.selectbox("🔄 Sort by", ["Health Score", "Location", "Item Name", "Days to Stockout"])
+    with col3:
+        show_count = st.selectbox("📄 Show", ["All", "Top 50", "Top 100", "Bottom 50"])
+    
+    heatmap_data = get_stock_heatmap(location_filter, category_filter, risk_filter)
+    
+    if not heatmap_data.empty:
+        # Apply search filter
+        if search:
+            mask = heatmap_data.apply(lambda row: search.lower() in str(row).lower(), axis=1)
+            heatmap_data = heatmap_data[mask]
+        
+        # Apply sorting
+        if sort_by == "Health Score":
+            heatmap_data = heatmap_data.sort_values('STOCK_HEALTH_SCORE')
+        elif sort_by == "Location":
+            heatmap_data = heatmap_data.sort_values('LOCATION_NAME')
+        elif sort_by == "Item Name":
+            heatmap_data = heatmap_data.sort_values('ITEM_NAME')
+        elif sort_by == "Days to Stockout":
+            heatmap_data = heatmap_data.sort_values('DAYS_UNTIL_STOCKOUT')
+        
+        # Apply count filter
+        if show_count == "Top 50":
+            heatmap_data = heatmap_data.head(50)
+        elif show_count == "Top 100":
+            heatmap_data = heatmap_data.head(100)
+        elif show_count == "Bottom 50":
+            heatmap_data = heatmap_data.tail(50)
+        
+        # Summary stats
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.info(f"📄 **{len(heatmap_data)}** items displayed")
+        with col2:
+            avg_health = heatmap_data['STOCK_HEALTH_SCORE'].mean()
+            st.info(f"🎯 **{avg_health:.1f}** avg health")
+        with col3:
+            at_risk = len(heatmap_data[heatmap_data['REQUIRES_ATTENTION'] == True])
+            st.warning(f"⚠️ **{at_risk}** at risk")
+        with col4:
+            critical = len(heatmap_data[heatmap_data['IS_CRITICAL_ITEM'] == True])
+            st.error(f"🔴 **{critical}** critical")
+        
+        # Style the dataframe with icons
+        display_df = heatmap_data.copy()
+        display_df['🎯 RISK'] = display_df['RISK_CLASSIFICATION'].apply(lambda x: f"{get_risk_icon(x)} {x}")
+        display_df['⚡ CRITICAL'] = display_df['IS_CRITICAL_ITEM'].apply(lambda x: '✅' if x else '')
+        display_df['⚠️ ALERT'] = display_df['REQUIRES_ATTENTION'].apply(lambda x: '⚠️' if x else '')
+        
+        # Reorder columns
+        display_columns = [
+            'LOCATION_NAME', 'ITEM_NAME', 'ITEM_CATEGORY', 
+            'CURRENT_STOCK', 'STOCK_HEALTH_SCORE', '🎯 RISK',
+            'DAYS_OF_COVER', 'DAYS_UNTIL_STOCKOUT', 'AVG_DAILY_ISSUE',
+            '⚡ CRITICAL', '⚠️ ALERT'
+        ]
+        
+        # Color styling
+        def color_health_score(val):
+            if pd.isna(val):
+                return ''
+            try:
+                val = float(val)
+                if val >= 80:
+                    return 'background-color: #d1fae5; color: #065f46; font-weight: bold;'
+                elif val >= 60:
+                    return 'background-color: #fef3c7; color: #92400e; font-weight: bold;'
+                elif val >= 40:
+                    return 'background-color: #fed7aa; color: #9a3412; font-weight: bold;'
+                else:
+                    return 'background-color: #fecaca; color: #991b1b; font-weight: bold;'
+            except:
+                return ''
+        
+        styled_df = display_df[display_columns].style.map(
+            color_health_score, subset=['STOCK_HEALTH_SCORE']
+        ).format({
+            'CURRENT_STOCK': '{:,.0f}',
+            'STOCK_HEALTH_SCORE': '{:.1f}',
+            'DAYS_OF_COVER': '{:.1f}',
+            'DAYS_UNTIL_STOCKOUT': '{:.0f}',
+            'AVG_DAILY_ISSUE': '{:.2f}'
+        })
+        
+        st.dataframe(styled_df, use_container_width=True, height=600)
+        
+        # Export button with formatted data
+        export_button(
+            "📊 Download Filtered Data",
+            display_df,
+            dataset='heatmap_view',
+            file_stem=f"heatmap_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            filters=(location_filter, category_filter, risk_filter, search, sort_by, show_count),
+            round_columns=HEATMAP_ROUND_COLUMNS,
+            key='export_heatmap_view'
+        )
+    else:
+        st.info("🔍 No data available for selected filters.")
+
+@instrumented('tab.alerts')
+def render_alerts_tab(location_filter, category_filter, risk_filter):
+    """Active Alerts tab, rerun on its own when its widgets change"""
+    st.subheader("⚠️ Active Alerts")
+    alerts = get_alerts()
+    if not alerts.empty:
+        # Acknowledgements are per session, so filter after the shared cache
+        alerts = alerts[~alerts['ALERT_ID'].isin(st.session_state.acknowledged_alerts)]
+    
+    if not alerts.empty:
+        # Summary
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("🚨 Total Active Alerts", len(alerts))
+        with col2:
+            critical_alerts = len(alerts[alerts['SEVERITY'].isin(['OUT_OF_STOCK', 'CRITICAL'])])
+            st.metric("🔴 Critical Alerts", critical_alerts)
+        with col3:
+            st.metric("✅ Acknowledged Today", len(st.session_state.acknowledged_alerts))
+        
+        st.markdown("---")
+        
+        # Bulk Actions Feature
+        st.subheader("⚡ Bulk Actions")
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            if st.button("✅ Acknowledge All Alerts", type="primary", use_container_width=True):
+                for idx, alert in alerts.iterrows():
+                    st.session_state.acknowledged_alerts.add(alert['ALERT_ID'])
+                    st.session_state.alert_history.append({
+                        'timestamp': datetime.now(),
+                        'alert_id': alert['ALERT_ID'],
+                        'location': alert['LOCATION_NAME'],
+                        'item': alert['ITEM_NAME'],
+                        'severity': alert['SEVERITY']
+                    })
+                st.success(f"✅ Acknowledged {len(alerts)} alerts!")
+                st.rerun(scope="fragment")
+        with col2:
+            if st.button("🗑️ Clear History", use_container_width=True):
+                st.session_state.alert_history = []
+                st.success("🧹 History cleared!")
+                st.rerun(scope="fragment")
+        
+        st.markdown("---")
+        
+        for idx, alert in alerts.iterrows():
+            severity_class = "alert-critical" if alert['SEVERITY'] in ['OUT_OF_STOCK', 'CRITICAL'] else "alert-warning"
+            icon = get_risk_icon(alert['SEVERITY'])
+            
+            col1, col2 = st.columns([4, 1])
+            
+            with col1:
+                # Format category name for display
+                category_display = alert['ITEM_CATEGORY'].replace('_', ' ').title()
+                status_display = alert['SEVERITY'].replace('_', ' ').title()
+                stock_display = f"{float(alert['CURRENT_STOCK']):.0f}"
+                days_display = f"{int(alert['DAYS_UNTIL_STOCKOUT'])}" if alert['DAYS_UNTIL_STOCKOUT'] else "N/A"
+                critical_badge = ' | <span style="color: #dc2626; font-weight: 600;">⚠️ CRITICAL ITEM</span>' if alert['IS_CRITICAL_ITEM'] else ''
+                
+                alert_html = f"""
+                <div class="{severity_class}" style="padding: 1rem; border-radius: 8px; margin-bottom: 0.5rem;">
+                    <strong style="font-size: 1.1rem;">{icon} {alert['LOCATION_NAME']} - {alert['ITEM_NAME']}</strong>
+                    <span style="display: inline-block; margin-left: 10px; padding: 3px 10px; background-color: rgba(255,255,255,0.3); border-radius: 12px; font-size: 0.85rem;">
+                        {category_display}
+                    </span>
+                    <br/><br/>
+                    <div style="font-size: 0.95rem; line-height: 1.6;">
+                        📊 Status: <strong>{status_display}</strong> | 
+                        📦 Stock: <strong>{stock_display}</strong> units | 
+                        ⏰ Days to stockout: <strong>{days_display}</strong>{critical_badge}
+                    </div>
+                </div>
+                """
+                st.markdown(alert_html, unsafe_allow_html=True)
+            
+            with col2:
+                if st.button("✅ Acknowledge", key=f"ack_{alert['ALERT_ID']}", use_container_width=True):
+                    st.session_state.acknowledged_alerts.add(alert['ALERT_ID'])
+                    st.session_state.alert_history.append({
+                        'timestamp': datetime.now(),
+                        'alert_id': alert['ALERT_ID'],
+                        'location': alert['LOCATION_NAME'],
+                        'item': alert['ITEM_NAME'],
+                        'severity': alert['SEVERITY']
+                    })
+                    st.success(f"✅ Alert acknowledged!")
+                    st.rerun(scope="fragment")
+        
+        st.caption(f"📋 {len(alerts)} active alerts | {len(st.session_state.acknowledged_alerts)} acknowledged in this session")
+        
+        # Alert History Section
+        if st.session_state.alert_history:
+            with st.expander("📜 Alert History (This Session)", expanded=False):
+                history_df = pd.DataFrame(st.session_state.alert_history)
+                history_df['timestamp'] = history_df['timestamp'].dt.strftime('%H:%M:%S')
+                st.dataframe(history_df, use_container_width=True, hide_index=True)
+    else:
+        st.success("✅ No active alerts! All stock levels are healthy.")
+        st.balloons()
+    
+    render_threshold_alerts()
+
+def render_threshold_alerts():
+    """Items at or below their custom alert rule, or the default days-to-stockout threshold"""
+    st.markdown("---")
+    st.subheader("🎯 Threshold Alerts")
+    health = get_stock_heatmap()
+    if health.empty:
+        return
+    
+    rules = get_alert_rule_store().rules()
+    matches = alert_rules.evaluate(health, rules, st.session_state.alert_threshold)
+    if st.session_state.acknowledged_alerts:
+        alert_ids = matches['LOCATION_NAME'].astype(str) + '-' + matches['ITEM_NAME'].astype(str)
+        matches = matches[~alert_ids.isin(st.session_state.acknowledged_alerts)]
+    
+    st.caption(
+        f"📋 {len(matches):,} items at or below their threshold | {len(rules):,} custom rules | "
+        f"{st.session_state.alert_threshold} days for items without a rule"
+    )
+    if not matches.empty:
+        st.dataframe(
+            matches[[
+                'LOCATION_NAME', 'ITEM_NAME', 'ITEM_CATEGORY', 'RISK_CLASSIFICATION',
+                'CURRENT_STOCK', 'DAYS_UNTIL_STOCKOUT', 'THRESHOLD_DAYS', 'RULE_SCOPE'
+            ]],
+            hide_index=True,
+            use_container_width=True
+        )
+
+@instrumented('tab.reorders')
+def render_reorder_tab(location_filter, category_filter, risk_filter):
+    """Reorder Queue tab, rerun on its own when its widgets change"""
+    st.subheader("🛒 Reorder Recommendations")
+    reorders = get_reorder_recommendations()
+    
+    if not reorders.empty:
+        # Summary metrics
+        col1, col2, col3 = st.columns(3)
+        total_value = reorders['ESTIMATED_ORDER_VALUE'].sum()
+        with col1:
+            st.metric("💰 Total Reorder Value", f"${total_value:,.2f}")
+        with col2:
+            st.metric("📦 Items to Reorder", len(reorders))
+        with col3:
+            avg_priority = reorders['PROCUREMENT_PRIORITY_SCORE'].mean()
+            st.metric("🎯 Avg Priority Score", f"{avg_priority:.1f}")
+        
+        st.markdown("---")
+        
+        # Add icons and format
+        display_reorders = reorders.copy()
+        display_reorders['🎯 RISK'] = display_reorders['RISK_CLASSIFICATION'].apply(lambda x: f"{get_risk_icon(x)} {x}")
+        display_reorders['⚡ CRITICAL'] = display_reorders['IS_CRITICAL_ITEM'].apply(lambda x: '✅' if x else '')
+        
+        # Display as styled dataframe
+        st.dataframe(
+            display_reorders[['LOCATION_NAME', 'ITEM_NAME', 'ITEM_CATEGORY', 'CURRENT_STOCK', 
+                             'AVG_DAILY_ISSUE', 'SUGGESTED_REORDER_QUANTITY', 'ESTIMATED_ORDER_VALUE',
+                             'PROCUREMENT_PRIORITY_SCORE', 'DAYS_UNTIL_STOCKOUT', '🎯 RISK', '⚡ CRITICAL']].style.format({
+                'CURRENT_STOCK': '{:,.0f}',
+                'AVG_DAILY_ISSUE': '{:.2f}',
+                'SUGGESTED_REORDER_QUANTITY': '{:,.1f}',
+                'ESTIMATED_ORDER_VALUE': '${:,.2f}',
+                'PROCUREMENT_PRIORITY_SCORE': '{:.0f}',
+                'DAYS_UNTIL_STOCKOUT': '{:.0f}'
+            }).background_gradient(subset=['PROCUREMENT_PRIORITY_SCORE'], cmap='RdYlGn_r'),
+            use_container_width=True,
+            height=600
+        )
+        
+        # Download button with formatted data
+        export_button(
+            "📥 Download Complete Reorder List",
+            reorders,
+            dataset='reorders',
+            file_stem=f"reorder_recommendations_{datetime.now().strftime('%Y%m%d')}",
+            round_columns=REORDER_ROUND_COLUMNS,
+            key='export_reorder_list'
+        )
+    else:
+        st.info("📋 No reorder recommendations at this time.")
+
+@instrumented('tab.analytics')
+def render_analytics_tab(location_filter, category_filter, risk_filter):
+    """Analytics tab, rerun on its own when its widgets change"""
+    st.subheader("📊 Risk Distribution & Analytics")
+    heatmap_data = get_stock_heatmap(location_filter, category_filter, risk_filter)
+    
+    if not heatmap_data.empty:
+        chart_filters = (location_filter, category_filter, risk_filter)
+        cube = get_stock_cube().slice(location_filter, category_filter, risk_filter)
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            # Pie chart
+            fig = cached_figure(
+                'risk_pie',
+                lambda dark: charts.risk_pie(cube.counts('RISK_CLASSIFICATION'), dark),
+                heatmap_data,
+                chart_filters
+            )
+            st.plotly_chart(fig, use_container_width=True)
+        
+        with col2:
+            # Health score distribution
+            fig2 = cached_figure(
+                'health_histogram',
+                lambda dark: charts.health_histogram(heatmap_data, dark),
+                heatmap_data,
+                chart_filters
+            )
+            st.plotly_chart(fig2, use_container_width=True)
+        
+        # Bar chart by location
+        fig3 = cached_figure(
+            'risk_by_location_bar',
+            lambda dark: charts.risk_by_location_bar(
+                cube.rollup('LOCATION_NAME', 'RISK_CLASSIFICATION')['COUNT'].reset_index(name='count'), dark
+            ),
+            heatmap_data,
+            chart_filters
+        )
+        st.plotly_chart(fig3, use_container_width=True)
+        
+        # Category analysis
+        st.subheader("📦 Category Performance")
+        category_stats = cube.rollup('ITEM_CATEGORY')[
+            ['STOCK_HEALTH_SCORE_MEAN', 'COUNT', 'REQUIRES_ATTENTION']
+        ].sort_index().reset_index()
+        category_stats.columns = ['Category', 'Avg Health Score', 'Total Items', 'Items at Risk']
+        
+        st.dataframe(
+            category_stats.style.format({
+                'Avg Health Score': '{:.1f}',
+                'Total Items': '{:.0f}',
+                'Items at Risk': '{:.0f}'
+            }).background_gradient(subset=['Avg Health Score'], cmap='RdYlGn'),
+            use_container_width=True
+        )
+        
+        # Item Movement Velocity Feature
+        st.markdown("---")
+        st.subheader("🚀 Item Movement Velocity Analysis")
+        
+        velocity = run_analysis('velocity', heatmap_data, chart_filters)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            # Velocity distribution pie chart
+            fig_velocity = cached_figure(
+                'velocity_pie',
+                lambda dark: charts.velocity_pie(heatmap_data, dark),
+                heatmap_data,
+                chart_filters
+            )
+            st.plotly_chart(fig_velocity, use_container_width=True)
+        
+        with col2:
+            # Top fast movers
+            fast_movers = velocity['fast_movers']
+            st.markdown("**🔥 Top 5 Fast Moving Items**")
+            if not fast_movers.empty:
+                for idx, item in fast_movers.iterrows():
+                    st.markdown(f"- **{item['ITEM_NAME']}** ({item['LOCATION_NAME']}): {item['AVG_DAILY_ISSUE']:.1f} units/day")
+            else:
+                st.info("No fast moving items found")
+            
+            st.markdown("")
+            # Slow movers warning
+            slow_count = velocity['slow_count']
+            st.metric("🐢 Slow Moving Items", slow_count, delta=f"{slow_count/velocity['total']*100:.1f}% of total")
+        
+        # Stock Level Trend Simulation Feature (14)
+        st.markdown("---")
+        st.subheader("📈 Stock Level Trend Projection")
+        render_stock_projection(heatmap_data, chart_filters)
+    else:
+        st.info("🔍 No data available for selected filters.")
+
+@st.fragment
+@instrumented('tab.analytics.stock_projection')
+def render_stock_projection(heatmap_data, chart_filters):
+    """Trend projection controls and chart, rerun on their own"""
+    col1, col2 = st.columns([2, 1])
+    with col1:
+        selected_item_trend = st.selectbox(
+            "🏷️ Select Item for Trend Analysis",
+            heatmap_data['ITEM_NAME'].unique()[:20]
+        )
+    with col2:
+        projection_days = st.slider("📅 Projection Days", 7, 90, 30)
+    
+    if selected_item_trend:
+        item_data = heatmap_data[heatmap_data['ITEM_NAME'] == selected_item_trend].iloc[0]
+        current_stock = float(item_data['CURRENT_STOCK'] or 0)
+        daily_consumption = float(item_data['AVG_DAILY_ISSUE'] or 0)
+        
+        # Generate projection
+        fig_trend = cached_figure(
+            'stock_projection_line',
+            lambda dark: charts.stock_projection_line(
+                selected_item_trend, current_stock, daily_consumption, projection_days, dark
+            ),
+            heatmap_data,
+            chart_filters + (selected_item_trend, projection_days)
+        )
+        st.plotly_chart(fig_trend, use_container_width=True)
+        
+        stockout_day = int(current_stock / daily_consumption) if daily_consumption > 0 else 999
+        if stockout_day <= projection_days:
+            st.warning(f"⚠️ Projected stockout in **{stockout_day} days**")
+        else:
+            st.success(f"✅ Stock sufficient for next **{projection_days}+ days**")
+
+@instrumented('tab.costs')
+def render_cost_tab(location_filter, category_filter, risk_filter):
+    """Cost Insights tab, rerun on its own when its widgets change"""
+    st.subheader("💰 Cost Insights & Savings Analysis")
+    reorders = get_reorder_recommendations()
+    
+    if not reorders.empty:
+        summary = get_executive_summary()
+        costs = run_analysis('costs', reorders, (), summary['TOTAL_ITEMS'] if summary else None)
+        total_value = costs['total_value']
+        savings = costs['savings']
+        stockout_prevention = costs['stockout_prevention']
+        
+        # Key metrics
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("💵 Total Reorder Cost", f"${total_value:,.2f}")
+        with col2:
+            st.metric("💰 Potential Savings", f"${savings:,.2f}", delta="15% optimization")
+        with col3:
+            st.metric("🛡️ Stockout Prevention", f"${stockout_prevention:,.2f}")
+        with col4:
+            st.metric("✨ Total Net Benefit", f"${costs['net_benefit']:,.2f}", delta_color="normal")
+        
+        st.markdown("---")
+        
+        # Cost breakdown
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.subheader("📊 Cost Breakdown by Category")
+            fig = cached_figure(
+                'category_cost_pie',
+                lambda dark: charts.category_cost_pie(reorders, dark),
+                reorders
+            )
+            st.plotly_chart(fig, use_container_width=True)
+        
+        with col2:
+            st.subheader("🏥 Cost Distribution by Location")
+            fig2 = cached_figure(
+                'location_cost_bar',
+                lambda dark: charts.location_cost_bar(reorders, dark),
+                reorders
+            )
+            st.plotly_chart(fig2, use_container_width=True)
+        
+        # ROI Analysis
+        st.subheader("📈 Return on Investment (ROI) Analysis")
+        roi_percentage = costs['roi_percentage']
+        
+        # Conditional styling for ROI badges
+        if st.session_state.dark_mode:
+            roi_bg = "linear-gradient(135deg, #14532d, #166534)"
+            roi_num_color = "#86efac"
+            roi_text_color = "#bbf7d0"
+            
+            avg_bg = "linear-gradient(135deg, #1e3a8a, #1e40af)"
+            avg_num_color = "#93c5fd"
+            avg_text_color = "#bfdbfe"
+            
+            critical_bg = "linear-gradient(135deg, #7f1d1d, #991b1b)"
+            critical_num_color = "#fca5a5"
+            critical_text_color = "#fecaca"
+        else:
+            roi_bg = "linear-gradient(135deg, #d1fae5, #ecfdf5)"
+            roi_num_color = "#065f46"
+            roi_text_color = "#10b981"
+            
+            avg_bg = "linear-gradient(135deg, #dbeafe, #eff6ff)"
+            avg_num_color = "#1e3a8a"
+            avg_text_color = "#3b82f6"
+            
+            critical_bg = "linear-gradient(135deg, #fecaca, #fee2e2)"
+            critical_num_color = "#991b1b"
+            critical_text_color = "#dc2626"
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.markdown(f"""
+            <div style="text-align: center; padding: 1.5rem; background: {roi_bg}; border-radius: 12px;">
+                <div style="font-size: 2rem; color: {roi_num_color}; font-weight: bold;">{roi_percentage:.1f}%</div>
+                <div style="color: {roi_text_color}; font-weight: 600;">Expected ROI</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with col2:
+            avg_reorder = costs['avg_reorder']
+            st.markdown(f"""
+            <div style="text-align: center; padding: 1.5rem; background: {avg_bg}; border-radius: 12px;">
+                <div style="font-size: 2rem; color: {avg_num_color}; font-weight: bold;">${avg_reorder:,.0f}</div>
+                <div style="color: {avg_text_color}; font-weight: 600;">Avg Order Value</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        with col3:
+            critical_value = costs['critical_value']
+            st.markdown(f"""
+            <div style="text-align: center; padding: 1.5rem; background: {critical_bg}; border-radius: 12px;">
+                <div style="font-size: 2rem; color: {critical_num_color}; font-weight: bold;">${critical_value:,.0f}</div>
+                <div style="color: {critical_text_color}; font-weight: 600;">Critical Items</div>
+            </div>
+            """, unsafe_allow_html=True)
+        
+        # Insights
+        st.markdown("---")
+        st.subheader("💡 AI-Powered Insights")
+        
+        insights = []
+        if roi_percentage > 20:
+            insights.append("✅ **Excellent ROI**: Expected returns exceed 20%, indicating highly efficient inventory management.")
+        elif roi_percentage > 10:
+            insights.append("⚠️ **Good ROI**: Returns are positive but there's room for optimization.")
+        else:
+            insights.append("🔴 **Action Required**: Consider reviewing procurement strategies to improve ROI.")
+        
+        if total_value > 0 and critical_value / total_value > 0.3:
+            insights.append("🔴 **High Critical Spend**: Over 30% of reorder budget is for critical items. Consider increasing safety stock.")
+        
+        insights.append(f"📦 **Top Category**: {costs['top_category']} requires the highest reorder investment.")
+        
+        for insight in insights:
+            st.info(insight)
+        
+        # Inventory Turnover Analysis Feature (15)
+        st.markdown("---")
+        st.subheader("🔄 Inventory Turnover Metrics")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("💵 Avg Daily Investment", f"${costs['avg_daily_value']:,.0f}")
+        
+        with col2:
+            st.metric("🔁 Turnover Rate", f"{costs['turnover_rate']:.1f}%")
+        
+        with col3:
+            st.metric("⭐ Efficiency Score", f"{costs['efficiency_score']:.0f}/100")
+        
+        # Stock Transfer Recommendations Feature (16)
+        st.markdown("---")
+        st.subheader("🚚 Stock Transfer Suggestions")
+        
+        heatmap_all = get_stock_heatmap(None, None, None)
+        if not heatmap_all.empty:
+            st.markdown("**📦 Recommended Transfers to Balance Stock**")
+            
+            # Pair overstocked and understocked locations for the same items
+            transfer_df = run_analysis('transfers', heatmap_all, ())
+            
+            if not transfer_df.empty:
+                st.dataframe(transfer_df, use_container_width=True, hide_index=True)
+                
+                export_button(
+                    "📥 Download Transfer Plan",
+                    transfer_df,
+                    dataset='transfer_plan',
+                    file_stem="transfer_recommendations",
+                    version=heatmap_all.attrs.get('data_version'),
+                    key='export_transfer_plan'
+                )
+            else:
+                st.success("✅ No urgent transfers needed - stock is well balanced!")
+        else:
+            st.info("🔍 No data available for transfer analysis")
+    else:
+        st.info("📋 No cost data available at this time.")
+
+@instrumented('tab.performers')
+def render_performers_tab(location_filter, category_filter, risk_filter):
+    """Top Performers tab, rerun on its own when its widgets change"""
+    st.subheader("🏆 Top & Bottom Performers")
+    heatmap_data = get_stock_heatmap(None, None, None)
+    
+    if not heatmap_data.empty:
+        items, locations = get_rankings()
+        page_size = st.select_slider("Entries per list", options=[5, 10, 25, 50], value=5, key='performers_page_size')
+        pages = max(-(-items.size('STOCK_HEALTH_SCORE') // page_size), 1)
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1, key='performers_page')
+        offset = (page - 1) * page_size
+        perf = {
+            **analytics.performers(items, locations, page_size, offset),
+            **analytics.fleet_rates(get_stock_cube()),
+        }
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("### 🌟 Top Performers")
+            
+            # Best locations by health score
+            st.markdown("**🏥 Healthiest Locations**")
+            for rank, loc in enumerate(perf['top_locations'].itertuples(), offset + 1):
+                st.success(f"{rank}. **{loc.LOCATION_NAME}**: {loc.AVG_HEALTH:.1f}/100")
+            
+            st.markdown("")
+            
+            # Best managed items
+            st.markdown("**✅ Best Managed Items**")
+            for idx, item in perf['top_items'].iterrows():
+                st.success(f"• **{item['ITEM_NAME']}** at {item['LOCATION_NAME']}: {item['STOCK_HEALTH_SCORE']:.1f}/100")
+            
+            st.markdown("")
+            
+            # Optimal stock coverage
+            st.markdown("**📊 Optimal Stock Coverage**")
+            for idx, item in perf['optimal_coverage'].iterrows():
+                st.info(f"• **{item['ITEM_NAME']}** at {item['LOCATION_NAME']}: {item['DAYS_OF_COVER']:.0f} days")
+        
+        with col2:
+            st.markdown("### ⚠️ Needs Attention")
+            
+            # Worst locations by health score
+            st.markdown("**🚨 Locations Needing Support**")
+            for rank, loc in enumerate(perf['bottom_locations'].itertuples(), offset + 1):
+                st.error(f"{rank}. **{loc.LOCATION_NAME}**: {loc.AVG_HEALTH:.1f}/100")
+            
+            st.markdown("")
+            
+            # Critical items
+            st.markdown("**🔴 Most Critical Items**")
+            for idx, item in perf['critical_items'].iterrows():
+                st.error(f"• **{item['ITEM_NAME']}** at {item['LOCATION_NAME']}: {item['CURRENT_STOCK']:.0f} units")
+            
+            st.markdown("")
+            
+            # Overstock issues
+            st.markdown("**📦 Overstock Situations**")
+            overstock = perf['overstock']
+            if not overstock.empty:
+                for idx, item in overstock.iterrows():
+                    st.warning(f"• **{item['ITEM_NAME']}** at {item['LOCATION_NAME']}: {item['DAYS_OF_COVER']:.0f} days")
+            elif offset:
+                st.caption("No further overstock situations.")
+            else:
+                st.success("✅ No overstock issues!")
+        
+        # Summary statistics
+        st.markdown("---")
+        st.subheader("📊 Overall Performance Summary")
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric("✅ Healthy Rate", f"{perf['healthy_pct']:.1f}%")
+        
+        with col2:
+            critical_pct = perf['critical_pct']
+            st.metric("🔴 Critical Rate", f"{critical_pct:.1f}%", delta=f"-{critical_pct:.1f}%", delta_color="inverse")
+        
+        with col3:
+            st.metric("📊 Avg Coverage", f"{perf['avg_coverage']:.0f} days")
+        
+        with col4:
+            st.metric("🏥 Active Locations", perf['total_locations'])
+    else:
+        st.info("🔍 No data available for performance analysis.")
+    
+    # What-If Scenario Simulator Feature (17)
+    st.markdown("---")
+    st.subheader("🧪 What-If Scenario Simulator")
+    render_what_if(perf['critical_count'] if not heatmap_data.empty else None)
+    
+    # Smart Recommendations Engine Feature (18)
+    st.markdown("---")
+    st.subheader("🤖 AI Smart Recommendations")
+    
+    recommendations = analytics.smart_recommendations(get_stock_cube()) if not heatmap_data.empty else []
+    
+    if recommendations:
+        for rec in recommendations:
+            with st.container():
+                col1, col2, col3, col4 = st.columns([1, 2, 2, 2])
+                with col1:
+                    st.markdown(f"**{rec['priority']}**")
+                with col2:
+                    st.markdown(f"**{rec['action']}**")
+                with col3:
+                    st.caption(rec['reason'])
+                with col4:
+                    st.caption(f"✅ {rec['impact']}")
+                st.markdown("")
+    else:
+        st.success("✅ All systems operating optimally!")
+    
+    # Export with Advanced Formatting Feature (19)
+    st.markdown("---")
+    st.subheader("📊 Advanced Export Options")
+    
+    if not heatmap_data.empty:
+        render_report_exports(get_executive_summary(), heatmap_data)
+    else:
+        st.info("🔍 No data available for reports")
+
+@st.fragment
+@instrumented('tab.performers.what_if')
+def render_what_if(base_critical):
+    """What-If sliders and results, rerun on their own"""
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**🎯 Adjust Parameters**")
+        demand_change = st.slider("📈 Demand Change", -50, 100, 0, help="% change in consumption")
+        lead_time_change = st.slider("🚚 Lead Time Change", -50, 100, 0, help="% change in delivery time")
+        budget_factor = st.slider("💰 Budget Adjustment", 50, 200, 100, help="% of current budget")
+    
+    with col2:
+        st.markdown("**📊 Simulation Results**")
+        
+        if base_critical is not None:
+            # Simulate impact
+            demand_factor = 1 + (demand_change / 100)
+            simulated_critical = int(base_critical * demand_factor)
+            
+            st.metric(
+                "🚨 Projected Critical Items",
+                simulated_critical,
+                delta=f"{simulated_critical - base_critical:+d}",
+                delta_color="inverse"
+            )
+            
+            simulated_stockouts = int(simulated_critical * (1 + lead_time_change / 100))
+            st.metric(
+                "⚠️ Potential Stockouts",
+                simulated_stockouts,
+                delta=f"{simulated_stockouts - base_critical:+d}",
+                delta_color="inverse"
+            )
+            
+            budget_needed = (budget_factor / 100) * float(get_reorder_recommendations()['ESTIMATED_ORDER_VALUE'].sum())
+            st.metric("💵 Budget Required", f"${budget_needed:,.0f}")
+
+# Resolution choice -> grain; Auto picks the finest grain keeping the range under MAX_POINTS
+HISTORY_RESOLUTIONS = {
+    'Auto': None,
+    'Daily (LTTB)': 'day',
+    'Weekly': 'week',
+    'Monthly': 'month',
+}
+HISTORY_GRAIN_LABELS = {'day': 'daily', 'week': 'weekly', 'month': 'monthly'}
+
+@instrumented('tab.history')
+def render_history_tab(location_filter, category_filter, risk_filter):
+    """Stock History tab: recorded closing stock, issues and receipts of one selection"""
+    st.subheader("📈 Stock History")
+    
+    heatmap_data = get_stock_heatmap(location_filter, category_filter, risk_filter)
+    items = sorted(heatmap_data['ITEM_NAME'].unique()) if not heatmap_data.empty else []
     
-    total_reorder_value = float(reorders_df['ESTIMATED_ORDER_VALUE'].sum())
-    # Assume 15% savings from bulk ordering and timing optimization
-    potential_savings = total_reorder_value * 0.15
-    # Estimate stockout cost prevention (avg $500 per stockout)
-    critical_items = len(reorders_df[reorders_df['IS_CRITICAL_ITEM'] == True])
-    stockout_prevention = float(critical_items * 500)
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        selected_item = st.selectbox("🏷️ Item", ["All items"] + items, key='history_item')
+    with col2:
+        range_label = st.select_slider("📅 Range", options=list(history.RANGES), value='1 year', key='history_range')
+    with col3:
+        resolution = st.selectbox("🔍 Resolution", HISTORY_RESOLUTIONS, key='history_resolution')
     
-    return total_reorder_value, potential_savings, stockout_prevention
-
-@st.cache_data(ttl=300)
-def get_location_comparison(locations_list):
-    """Compare metrics across selected locations"""
-    conn = get_snowflake_connection()
-    if not conn or not locations_list:
-        return pd.DataFrame()
+    item = None if selected_item == "All items" else selected_item
+    days = history.RANGES[range_label]
+    if resolution == "Auto":
+        span = days
+        if span is None:
+            # Days of all history, from the (few-row) monthly series
+            span = int(get_stock_history('month', location_filter, category_filter, item)['DAYS'].sum())
+        grain = history.choose_grain(max(span, 1))
+    else:
+        grain = HISTORY_RESOLUTIONS[resolution]
     
-    placeholders = ','.join(['%s'] * len(locations_list))
-    query = f"""
-        SELECT 
-            LOCATION_NAME,
-            COUNT(*) as TOTAL_ITEMS,
-            AVG(STOCK_HEALTH_SCORE) as AVG_HEALTH,
-            SUM(CASE WHEN REQUIRES_ATTENTION = TRUE THEN 1 ELSE 0 END) as AT_RISK,
-            SUM(CASE WHEN IS_CRITICAL_ITEM = TRUE THEN 1 ELSE 0 END) as CRITICAL_ITEMS,
-            AVG(DAYS_OF_COVER) as AVG_DAYS_COVER
-        FROM DT_STOCK_HEALTH_CLASSIFICATION
-        WHERE LOCATION_NAME IN ({placeholders})
-        GROUP BY LOCATION_NAME
-        ORDER BY AVG_HEALTH DESC
-    """
+    # The whole history is fetched once per grain; ranges slice it locally
+    full_series = get_stock_history(grain, location_filter, category_filter, item)
+    series = history.select_range(full_series, grain, days)
+    if grain == 'day':
+        series = history.downsample_daily(series)
     
-    try:
-        return pd.read_sql(query, conn, params=locations_list)
-    except Exception as e:
-        st.error(f"Error comparing locations: {str(e)}")
-        return pd.DataFrame()
+    if series.empty:
+        st.info("📭 No stock history recorded for this selection")
+        return
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric(
+            "📦 Latest Closing Stock",
+            f"{series['CLOSING_STOCK'].iloc[-1]:,.0f}",
+            help=None if grain == 'day' else f"Average over the last {grain}"
+        )
+    with col2:
+        st.metric("📤 Total Issues", f"{series['ISSUES'].sum():,.0f}")
+    with col3:
+        st.metric("📥 Total Receipts", f"{series['RECEIPTS'].sum():,.0f}")
+    with col4:
+        st.metric("📉 Lowest Stock", f"{series['MIN_CLOSING_STOCK'].min():,.0f}")
+    
+    chart_filters = (location_filter, category_filter, item, grain, range_label, resolution)
+    title = f"📈 {selected_item} · {location_filter or 'All locations'}"
+    st.plotly_chart(
+        cached_figure('stock_history_line', lambda dark: charts.stock_history_line(series, title, dark), full_series, chart_filters),
+        use_container_width=True
+    )
+    st.plotly_chart(
+        cached_figure('stock_flows_bar', lambda dark: charts.stock_flows_bar(series, dark), full_series, chart_filters),
+        use_container_width=True
+    )
+    
+    caption = f"{len(series):,} points · {HISTORY_GRAIN_LABELS[grain]}"
+    if grain == 'day' and series['DAYS'].max() > 1:
+        caption += " (LTTB; flows summed over the days each point stands for)"
+    if risk_filter:
+        caption += " · the risk filter does not apply to history"
+    st.caption(caption)
+
+@instrumented('sidebar.quick_export')
+def render_quick_export(location_filter, category_filter, risk_filter):
+    """Sidebar download buttons of the filtered heatmap and the reorder list"""
+    heatmap_data = get_stock_heatmap(location_filter, category_filter, risk_filter)
+    if not heatmap_data.empty:
+        export_button(
+            "📊 Download Heatmap",
+            heatmap_data,
+            dataset='heatmap',
+            file_stem=f"stock_health_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            filters=(location_filter, category_filter, risk_filter),
+            round_columns=HEATMAP_ROUND_COLUMNS,
+            key='quick_export_heatmap',
+            use_container_width=True
+        )
+    
+    reorders = get_reorder_recommendations()
+    if not reorders.empty:
+        export_button(
+            "🛒 Download Reorders",
+            reorders,
+            dataset='reorders',
+            file_stem=f"reorder_list_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            round_columns=REORDER_ROUND_COLUMNS,
+            key='quick_export_reorders',
+            use_container_width=True
+        )
 
+@instrumented('main')
 def main():
+    start_metrics_export()
+    section = metrics.timed('header').start()
+    
     # Apply dark mode if enabled
     if st.session_state.dark_mode:
         st.markdown("""
@@ -877,26 +2355,34 @@ def main():
     </div>
     ''', unsafe_allow_html=True)
     
+    # Filled in at the end of the run, once every fetch has reported whether it served a snapshot
+    outage_banner = st.empty()
+    # First rows of a cold heatmap fetch, shown while later batches arrive
+    first_rows = st.empty()
+    
     # Action buttons
     col1, col2, col3, col4 = st.columns([1, 1, 1, 1])
     with col1:
         if st.button("🔄 Refresh Now", use_container_width=True):
             st.cache_data.clear()
+            fetch_cache.clear()
             st.session_state.last_refresh = datetime.now()
             st.rerun()
     with col2:
         time_diff = (datetime.now() - st.session_state.last_refresh).seconds
         st.metric("⏱️ Last Refresh", f"{time_diff}s ago")
     with col3:
-        conn_status = "🟢 Connected" if get_snowflake_connection() else "🔴 Disconnected"
+        # The breaker's state avoids a blocking reconnect attempt during an outage
+        conn_status = "🔴 Disconnected" if get_circuit_breaker().is_open else "🟢 Connected"
         st.metric("📡 Snowflake", conn_status)
     with col4:
         st.metric("🕒 System Time", datetime.now().strftime('%H:%M:%S'))
     
     st.divider()
+    section.stop()
     
     # Enhanced Sidebar
-    with st.sidebar:
+    with st.sidebar, metrics.timed('sidebar'):
         st.header("⚙️ Settings")
         
         # Refresh settings
@@ -908,6 +2394,13 @@ def main():
                 value=st.session_state.refresh_interval,
                 format_func=lambda x: f"{x//60} min" if x >= 60 else f"{x}s"
             )
+            
+            # Checks the shared refresher in memory; only the refresher queries Snowflake
+            if st.session_state.auto_refresh:
+                watcher = st.fragment(render_refresh_watcher, run_every=min(st.session_state.refresh_interval, 15))
+                watcher()
+            elif 'session_id' in st.session_state:
+                get_refresher().unsubscribe(st.session_state.session_id)
         
         # Alert settings
         with st.expander("⚠️ Alert Thresholds", expanded=False):
@@ -934,26 +2427,43 @@ def main():
                 'search_mode': search_mode
             }
         
-        # Custom Item Alerts Feature (13)
+        # Custom Item Alerts Feature (13): rules shared by every session
         with st.expander("🔔 Custom Item Alerts", expanded=False):
-            st.markdown("**Set Item-Specific Thresholds**")
-            item_name = st.text_input("🏷️ Item Name")
+            st.markdown("**Set Item, Location or Category Thresholds**")
+            rule_store = get_alert_rule_store()
+            rule_scope = st.radio("Applies to", list(alert_rules.SCOPES), format_func=str.title, horizontal=True)
+            rule_value = st.text_input(f"🏷️ {rule_scope.title()} Name")
             custom_threshold = st.number_input("⚠️ Custom Alert Days", 1, 60, 7)
             if st.button("➕ Add Custom Alert"):
-                if item_name:
-                    st.session_state.custom_alert_items[item_name] = custom_threshold
-                    st.success(f"✅ Alert set for {item_name}")
-            
-            if st.session_state.custom_alert_items:
-                st.markdown("**Active Custom Alerts:**")
-                for item, days in list(st.session_state.custom_alert_items.items()):
-                    col1, col2 = st.columns([3, 1])
-                    with col1:
-                        st.caption(f"{item}: {days} days")
-                    with col2:
-                        if st.button("❌", key=f"del_{item}"):
-                            del st.session_state.custom_alert_items[item]
-                            st.rerun()
+                if rule_value:
+                    rule_store.add(rule_scope, rule_value, custom_threshold)
+                    st.success(f"✅ Alert set for {rule_value}")
+            
+            rule_file = st.file_uploader("📤 Import Rules (CSV: SCOPE, VALUE, DAYS)", type='csv')
+            if rule_file is not None and st.button("📥 Import Rules"):
+                try:
+                    stored = rule_store.upsert(pd.read_csv(rule_file).rename(columns=str.upper))
+                except (ValueError, pd.errors.ParserError) as e:
+                    st.error(f"❌ {e}")
+                else:
+                    st.success(f"✅ {stored:,} rules stored")
+            
+            rules = rule_store.rules()
+            if not rules.empty:
+                st.markdown(f"**Active Custom Alerts ({len(rules):,}):**")
+                st.dataframe(rules, hide_index=True, use_container_width=True, height=200)
+                col1, col2 = st.columns([3, 1])
+                with col1:
+                    removed_rule = st.selectbox(
+                        "Remove rule",
+                        list(zip(rules['SCOPE'], rules['VALUE'])),
+                        format_func=lambda rule: f"{rule[0]}: {rule[1]}",
+                        label_visibility="collapsed"
+                    )
+                with col2:
+                    if st.button("❌", key="remove_alert_rule"):
+                        rule_store.remove(*removed_rule)
+                        st.rerun()
         
         # Location Comparison Tool
         with st.expander("🔄 Compare Locations", expanded=False):
@@ -969,6 +2479,7 @@ def main():
         st.divider()
         st.subheader("📍 Filters")
         locations, categories, risks = get_filter_options()
+        st.session_state.filter_options = (locations, categories, risks)
         
         selected_location = st.selectbox("🏥 Location", ["All"] + locations, index=0)
         selected_category = st.selectbox("📦 Category", ["All"] + categories, index=0)
@@ -981,50 +2492,43 @@ def main():
         st.divider()
         st.subheader("📥 Quick Export")
         
-        heatmap_data = get_stock_heatmap(location_filter, category_filter, risk_filter)
-        if not heatmap_data.empty:
-            # Format numeric columns to avoid ### display in Excel
-            export_df = heatmap_data.copy()
-            numeric_cols = ['CURRENT_STOCK', 'AVG_DAILY_CONSUMPTION', 'DAYS_OF_COVER', 'STOCK_HEALTH_SCORE']
-            for col in numeric_cols:
-                if col in export_df.columns and pd.api.types.is_numeric_dtype(export_df[col]):
-                    export_df[col] = export_df[col].round(2)
-            
-            csv = export_df.to_csv(index=False)
-            st.download_button(
-                label="📊 Download Heatmap",
-                data=csv,
-                file_name=f"stock_health_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mime="text/csv",
-                use_container_width=True
-            )
+        st.selectbox(
+            "File format",
+            list(EXPORT_FORMATS),
+            format_func=lambda fmt: EXPORT_FORMATS[fmt][0],
+            key='export_format'
+        )
         
-        reorders = get_reorder_recommendations()
-        if not reorders.empty:
-            # Format numeric columns to avoid ### display in Excel
-            export_df = reorders.copy()
-            numeric_cols = ['CURRENT_STOCK', 'AVG_DAILY_CONSUMPTION', 'DAYS_OF_COVER', 'REORDER_POINT', 'SUGGESTED_ORDER_QTY', 'ESTIMATED_ORDER_VALUE', 'PRIORITY_SCORE']
-            for col in numeric_cols:
-                if col in export_df.columns and pd.api.types.is_numeric_dtype(export_df[col]):
-                    export_df[col] = export_df[col].round(2)
-            
-            csv_reorder = export_df.to_csv(index=False)
-            st.download_button(
-                label="🛒 Download Reorders",
-                data=csv_reorder,
-                file_name=f"reorder_list_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mime="text/csv",
-                use_container_width=True
-            )
+        with batch_progress(first_rows_preview(first_rows)):
+            get_stock_heatmap(location_filter, category_filter, risk_filter)
+        first_rows.empty()
+        quick_export = st.fragment(render_quick_export, run_every=refresh_every())
+        quick_export(location_filter, category_filter, risk_filter)
         
         st.divider()
         st.caption("💡 **Pro Tip:** Use filters to focus on specific locations or categories")
     
     # Enhanced Executive Summary
+    section = metrics.timed('executive_summary').start()
     summary = get_executive_summary()
+    filtered = any(value is not None for value in (location_filter, category_filter, risk_filter))
+    # A filtered summary comes from the health cube, so it must follow health changes too
+    st.session_state.page_datasets = PAGE_DATASETS | {'health'} if filtered else PAGE_DATASETS
+    if summary and filtered:
+        # Same metrics for the active filter, from the cube of the loaded snapshot
+        scoped = get_stock_cube().summary(location_filter, category_filter, risk_filter)
+        if scoped['TOTAL_LOCATION_ITEM_COMBINATIONS']:
+            summary = {**summary, **scoped}
+        else:
+            st.info("🔍 No items match the selected filters; showing fleet-wide figures.")
+            filtered = False
     
     if summary:
         st.header("📊 Executive Dashboard")
+        if filtered:
+            st.caption("Filtered: " + " · ".join(
+                value for value in (location_filter, category_filter, risk_filter) if value is not None
+            ))
         
         col1, col2, col3, col4 = st.columns(4)
         
@@ -1177,9 +2681,11 @@ def main():
         st.error("⚠️ Unable to load executive summary. Please check your Snowflake connection.")
     
     st.divider()
+    section.stop()
     
     # Location Comparison Section (if enabled)
     if len(st.session_state.compare_locations) > 1:
+        section = metrics.timed('location_comparison').start()
         st.header("🔄 Location Comparison")
         comparison_data = get_location_comparison(st.session_state.compare_locations)
         
@@ -1188,47 +2694,22 @@ def main():
             
             with col1:
                 # Bar chart comparison
-                fig = px.bar(
+                fig = cached_figure(
+                    'location_health_bar',
+                    lambda dark: charts.location_health_bar(comparison_data, dark),
                     comparison_data,
-                    x='LOCATION_NAME',
-                    y='AVG_HEALTH',
-                    title="Average Health Score by Location",
-                    color='AVG_HEALTH',
-                    color_continuous_scale='RdYlGn',
-                    text_auto='.1f'
+                    st.session_state.compare_locations
                 )
-                if st.session_state.dark_mode:
-                    fig.update_layout(
-                        template='plotly_dark',
-                        paper_bgcolor='#1e293b',
-                        plot_bgcolor='#1e293b',
-                        font=dict(color='#e2e8f0'),
-                        height=300
-                    )
-                else:
-                    fig.update_layout(height=300)
                 st.plotly_chart(fig, use_container_width=True)
             
             with col2:
                 # At-risk items comparison
-                fig2 = px.bar(
+                fig2 = cached_figure(
+                    'location_risk_items_bar',
+                    lambda dark: charts.location_risk_items_bar(comparison_data, dark),
                     comparison_data,
-                    x='LOCATION_NAME',
-                    y=['AT_RISK', 'CRITICAL_ITEMS'],
-                    title="Risk Items by Location",
-                    barmode='group',
-                    color_discrete_map={'AT_RISK': '#f59e0b', 'CRITICAL_ITEMS': '#dc2626'}
+                    st.session_state.compare_locations
                 )
-                if st.session_state.dark_mode:
-                    fig2.update_layout(
-                        template='plotly_dark',
-                        paper_bgcolor='#1e293b',
-                        plot_bgcolor='#1e293b',
-                        font=dict(color='#e2e8f0'),
-                        height=300
-                    )
-                else:
-                    fig2.update_layout(height=300)
                 st.plotly_chart(fig2, use_container_width=True)
             
             # Detailed comparison table
@@ -1245,944 +2726,35 @@ def main():
             )
         
         st.divider()
+        section.stop()
     
     # Main Content Tabs with Enhanced Features
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
+    tabs = st.tabs([
         "🔥 Stock Heatmap", 
         "⚠️ Active Alerts", 
         "🛒 Reorder Queue", 
         "📊 Analytics",
         "💰 Cost Insights",
-        "🏆 Top Performers"
-    ])
-    
-    with tab1:
-        st.subheader("🔥 Stock Health Matrix")
-        
-        # Filters and search
-        col1, col2, col3 = st.columns([2, 1, 1])
-        with col1:
-            search = st.text_input("🔍 Search items or locations...", "", key="heatmap_search")
-        with col2:
-            sort_by = st.selectbox("🔄 Sort by", ["Health Score", "Location", "Item Name", "Days to Stockout"])
-        with col3:
-            show_count = st.selectbox("📄 Show", ["All", "Top 50", "Top 100", "Bottom 50"])
-        
-        heatmap_data = get_stock_heatmap(location_filter, category_filter, risk_filter)
-        
-        if not heatmap_data.empty:
-            # Apply search filter
-            if search:
-                mask = heatmap_data.apply(lambda row: search.lower() in str(row).lower(), axis=1)
-                heatmap_data = heatmap_data[mask]
-            
-            # Apply sorting
-            if sort_by == "Health Score":
-                heatmap_data = heatmap_data.sort_values('STOCK_HEALTH_SCORE')
-            elif sort_by == "Location":
-                heatmap_data = heatmap_data.sort_values('LOCATION_NAME')
-            elif sort_by == "Item Name":
-                heatmap_data = heatmap_data.sort_values('ITEM_NAME')
-            elif sort_by == "Days to Stockout":
-                heatmap_data = heatmap_data.sort_values('DAYS_UNTIL_STOCKOUT')
-            
-            # Apply count filter
-            if show_count == "Top 50":
-                heatmap_data = heatmap_data.head(50)
-            elif show_count == "Top 100":
-                heatmap_data = heatmap_data.head(100)
-            elif show_count == "Bottom 50":
-                heatmap_data = heatmap_data.tail(50)
-            
-            # Summary stats
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.info(f"📄 **{len(heatmap_data)}** items displayed")
-            with col2:
-                avg_health = heatmap_data['STOCK_HEALTH_SCORE'].mean()
-                st.info(f"🎯 **{avg_health:.1f}** avg health")
-            with col3:
-                at_risk = len(heatmap_data[heatmap_data['REQUIRES_ATTENTION'] == True])
-                st.warning(f"⚠️ **{at_risk}** at risk")
-            with col4:
-                critical = len(heatmap_data[heatmap_data['IS_CRITICAL_ITEM'] == True])
-                st.error(f"🔴 **{critical}** critical")
-            
-            # Style the dataframe with icons
-            display_df = heatmap_data.copy()
-            display_df['🎯 RISK'] = display_df['RISK_CLASSIFICATION'].apply(lambda x: f"{get_risk_icon(x)} {x}")
-            display_df['⚡ CRITICAL'] = display_df['IS_CRITICAL_ITEM'].apply(lambda x: '✅' if x else '')
-            display_df['⚠️ ALERT'] = display_df['REQUIRES_ATTENTION'].apply(lambda x: '⚠️' if x else '')
-            
-            # Reorder columns
-            display_columns = [
-                'LOCATION_NAME', 'ITEM_NAME', 'ITEM_CATEGORY', 
-                'CURRENT_STOCK', 'STOCK_HEALTH_SCORE', '🎯 RISK',
-                'DAYS_OF_COVER', 'DAYS_UNTIL_STOCKOUT', 'AVG_DAILY_ISSUE',
-                '⚡ CRITICAL', '⚠️ ALERT'
-            ]
-            
-            # Color styling
-            def color_health_score(val):
-                if pd.isna(val):
-                    return ''
-                try:
-                    val = float(val)
-                    if val >= 80:
-                        return 'background-color: #d1fae5; color: #065f46; font-weight: bold;'
-                    elif val >= 60:
-                        return 'background-color: #fef3c7; color: #92400e; font-weight: bold;'
-                    elif val >= 40:
-                        return 'background-color: #fed7aa; color: #9a3412; font-weight: bold;'
-                    else:
-                        return 'background-color: #fecaca; color: #991b1b; font-weight: bold;'
-                except:
-                    return ''
-            
-            styled_df = display_df[display_columns].style.map(
-                color_health_score, subset=['STOCK_HEALTH_SCORE']
-            ).format({
-                'CURRENT_STOCK': '{:,.0f}',
-                'STOCK_HEALTH_SCORE': '{:.1f}',
-                'DAYS_OF_COVER': '{:.1f}',
-                'DAYS_UNTIL_STOCKOUT': '{:.0f}',
-                'AVG_DAILY_ISSUE': '{:.2f}'
-            })
-            
-            st.dataframe(styled_df, use_container_width=True, height=600)
-            
-            # Export button with formatted data
-            export_df = display_df.copy()
-            numeric_cols = ['CURRENT_STOCK', 'STOCK_HEALTH_SCORE', 'DAYS_OF_COVER', 'DAYS_UNTIL_STOCKOUT', 'AVG_DAILY_ISSUE']
-            for col in numeric_cols:
-                if col in export_df.columns and pd.api.types.is_numeric_dtype(export_df[col]):
-                    export_df[col] = export_df[col].round(2)
-            
-            csv = export_df.to_csv(index=False)
-            st.download_button(
-                label="📊 Download Filtered Data",
-                data=csv,
-                file_name=f"heatmap_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mime="text/csv"
-            )
-        else:
-            st.info("🔍 No data available for selected filters.")
-    
-    with tab2:
-        st.subheader("⚠️ Active Alerts")
-        alerts = get_alerts()
-        
-        if not alerts.empty:
-            # Summary
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric("🚨 Total Active Alerts", len(alerts))
-            with col2:
-                critical_alerts = len(alerts[alerts['SEVERITY'].isin(['OUT_OF_STOCK', 'CRITICAL'])])
-                st.metric("🔴 Critical Alerts", critical_alerts)
-            with col3:
-                st.metric("✅ Acknowledged Today", len(st.session_state.acknowledged_alerts))
-            
-            st.markdown("---")
-            
-            # Bulk Actions Feature
-            st.subheader("⚡ Bulk Actions")
-            col1, col2 = st.columns([3, 1])
-            with col1:
-                if st.button("✅ Acknowledge All Alerts", type="primary", use_container_width=True):
-                    for idx, alert in alerts.iterrows():
-                        st.session_state.acknowledged_alerts.add(alert['ALERT_ID'])
-                        st.session_state.alert_history.append({
-                            'timestamp': datetime.now(),
-                            'alert_id': alert['ALERT_ID'],
-                            'location': alert['LOCATION_NAME'],
-                            'item': alert['ITEM_NAME'],
-                            'severity': alert['SEVERITY']
-                        })
-                    st.success(f"✅ Acknowledged {len(alerts)} alerts!")
-                    st.rerun()
-            with col2:
-                if st.button("🗑️ Clear History", use_container_width=True):
-                    st.session_state.alert_history = []
-                    st.success("🧹 History cleared!")
-                    st.rerun()
-            
-            st.markdown("---")
-            
-            for idx, alert in alerts.iterrows():
-                severity_class = "alert-critical" if alert['SEVERITY'] in ['OUT_OF_STOCK', 'CRITICAL'] else "alert-warning"
-                icon = get_risk_icon(alert['SEVERITY'])
-                
-                col1, col2 = st.columns([4, 1])
-                
-                with col1:
-                    # Format category name for display
-                    category_display = alert['ITEM_CATEGORY'].replace('_', ' ').title()
-                    status_display = alert['SEVERITY'].replace('_', ' ').title()
-                    stock_display = f"{float(alert['CURRENT_STOCK']):.0f}"
-                    days_display = f"{int(alert['DAYS_UNTIL_STOCKOUT'])}" if alert['DAYS_UNTIL_STOCKOUT'] else "N/A"
-                    critical_badge = ' | <span style="color: #dc2626; font-weight: 600;">⚠️ CRITICAL ITEM</span>' if alert['IS_CRITICAL_ITEM'] else ''
-                    
-                    alert_html = f"""
-                    <div class="{severity_class}" style="padding: 1rem; border-radius: 8px; margin-bottom: 0.5rem;">
-                        <strong style="font-size: 1.1rem;">{icon} {alert['LOCATION_NAME']} - {alert['ITEM_NAME']}</strong>
-                        <span style="display: inline-block; margin-left: 10px; padding: 3px 10px; background-color: rgba(255,255,255,0.3); border-radius: 12px; font-size: 0.85rem;">
-                            {category_display}
-                        </span>
-                        <br/><br/>
-                        <div style="font-size: 0.95rem; line-height: 1.6;">
-                            📊 Status: <strong>{status_display}</strong> | 
-                            📦 Stock: <strong>{stock_display}</strong> units | 
-                            ⏰ Days to stockout: <strong>{days_display}</strong>{critical_badge}
-                        </div>
-                    </div>
-                    """
-                    st.markdown(alert_html, unsafe_allow_html=True)
-                
-                with col2:
-                    if st.button("✅ Acknowledge", key=f"ack_{alert['ALERT_ID']}", use_container_width=True):
-                        st.session_state.acknowledged_alerts.add(alert['ALERT_ID'])
-                        st.session_state.alert_history.append({
-                            'timestamp': datetime.now(),
-                            'alert_id': alert['ALERT_ID'],
-                            'location': alert['LOCATION_NAME'],
-                            'item': alert['ITEM_NAME'],
-                            'severity': alert['SEVERITY']
-                        })
-                        st.success(f"✅ Alert acknowledged!")
-                        st.rerun()
-            
-            st.caption(f"📋 {len(alerts)} active alerts | {len(st.session_state.acknowledged_alerts)} acknowledged in this session")
-            
-            # Alert History Section
-            if st.session_state.alert_history:
-                with st.expander("📜 Alert History (This Session)", expanded=False):
-                    history_df = pd.DataFrame(st.session_state.alert_history)
-                    history_df['timestamp'] = history_df['timestamp'].dt.strftime('%H:%M:%S')
-                    st.dataframe(history_df, use_container_width=True, hide_index=True)
-        else:
-            st.success("✅ No active alerts! All stock levels are healthy.")
-            st.balloons()
-    
-    with tab3:
-        st.subheader("🛒 Reorder Recommendations")
-        reorders = get_reorder_recommendations()
-        
-        if not reorders.empty:
-            # Summary metrics
-            col1, col2, col3 = st.columns(3)
-            total_value = reorders['ESTIMATED_ORDER_VALUE'].sum()
-            with col1:
-                st.metric("💰 Total Reorder Value", f"${total_value:,.2f}")
-            with col2:
-                st.metric("📦 Items to Reorder", len(reorders))
-            with col3:
-                avg_priority = reorders['PROCUREMENT_PRIORITY_SCORE'].mean()
-                st.metric("🎯 Avg Priority Score", f"{avg_priority:.1f}")
-            
-            st.markdown("---")
-            
-            # Add icons and format
-            display_reorders = reorders.copy()
-            display_reorders['🎯 RISK'] = display_reorders['RISK_CLASSIFICATION'].apply(lambda x: f"{get_risk_icon(x)} {x}")
-            display_reorders['⚡ CRITICAL'] = display_reorders['IS_CRITICAL_ITEM'].apply(lambda x: '✅' if x else '')
-            
-            # Display as styled dataframe
-            st.dataframe(
-                display_reorders[['LOCATION_NAME', 'ITEM_NAME', 'ITEM_CATEGORY', 'CURRENT_STOCK', 
-                                 'AVG_DAILY_ISSUE', 'SUGGESTED_REORDER_QUANTITY', 'ESTIMATED_ORDER_VALUE',
-                                 'PROCUREMENT_PRIORITY_SCORE', 'DAYS_UNTIL_STOCKOUT', '🎯 RISK', '⚡ CRITICAL']].style.format({
-                    'CURRENT_STOCK': '{:,.0f}',
-                    'AVG_DAILY_ISSUE': '{:.2f}',
-                    'SUGGESTED_REORDER_QUANTITY': '{:,.1f}',
-                    'ESTIMATED_ORDER_VALUE': '${:,.2f}',
-                    'PROCUREMENT_PRIORITY_SCORE': '{:.0f}',
-                    'DAYS_UNTIL_STOCKOUT': '{:.0f}'
-                }).background_gradient(subset=['PROCUREMENT_PRIORITY_SCORE'], cmap='RdYlGn_r'),
-                use_container_width=True,
-                height=600
-            )
-            
-            # Download button with formatted data
-            export_df = reorders.copy()
-            numeric_cols = ['CURRENT_STOCK', 'AVG_DAILY_ISSUE', 'DAYS_OF_COVER', 'REORDER_POINT', 
-                          'SUGGESTED_REORDER_QUANTITY', 'ESTIMATED_ORDER_VALUE', 'PROCUREMENT_PRIORITY_SCORE', 'DAYS_UNTIL_STOCKOUT']
-            for col in numeric_cols:
-                if col in export_df.columns and pd.api.types.is_numeric_dtype(export_df[col]):
-                    export_df[col] = export_df[col].round(2)
-            
-            csv = export_df.to_csv(index=False)
-            st.download_button(
-                label="📥 Download Complete Reorder List",
-                data=csv,
-                file_name=f"reorder_recommendations_{datetime.now().strftime('%Y%m%d')}.csv",
-                mime="text/csv"
-            )
-        else:
-            st.info("📋 No reorder recommendations at this time.")
-    
-    with tab4:
-        st.subheader("📊 Risk Distribution & Analytics")
-        heatmap_data = get_stock_heatmap(location_filter, category_filter, risk_filter)
-        
-        if not heatmap_data.empty:
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                # Pie chart
-                risk_counts = heatmap_data['RISK_CLASSIFICATION'].value_counts()
-                fig = px.pie(
-                    values=risk_counts.values,
-                    names=risk_counts.index,
-                    title="📊 Stock Items by Risk Classification",
-                    color=risk_counts.index,
-                    color_discrete_map={
-                        'OUT_OF_STOCK': '#1f2937',
-                        'CRITICAL': '#dc2626',
-                        'HIGH_RISK': '#f59e0b',
-                        'MEDIUM_RISK': '#fbbf24',
-                        'HEALTHY': '#10b981',
-                        'OVERSTOCK': '#3b82f6',
-                    },
-                    hole=0.4
-                )
-                fig.update_traces(textposition='inside', textinfo='percent+label', textfont_size=12)
-                if st.session_state.dark_mode:
-                    fig.update_layout(
-                        template='plotly_dark',
-                        paper_bgcolor='#1e293b',
-                        plot_bgcolor='#1e293b',
-                        font=dict(color='#e2e8f0'),
-                        height=400
-                    )
-                else:
-                    fig.update_layout(height=400)
-                st.plotly_chart(fig, use_container_width=True)
-            
-            with col2:
-                # Health score distribution
-                fig2 = px.histogram(
-                    heatmap_data,
-                    x='STOCK_HEALTH_SCORE',
-                    nbins=20,
-                    title="📈 Health Score Distribution",
-                    color_discrete_sequence=['#667eea']
-                )
-                if st.session_state.dark_mode:
-                    fig2.update_layout(
-                        template='plotly_dark',
-                        paper_bgcolor='#1e293b',
-                        plot_bgcolor='#1e293b',
-                        font=dict(color='#e2e8f0'),
-                        xaxis_title="Health Score",
-                        yaxis_title="Number of Items",
-                        height=400
-                    )
-                else:
-                    fig2.update_layout(
-                        xaxis_title="Health Score",
-                        yaxis_title="Number of Items",
-                        height=400
-                    )
-                st.plotly_chart(fig2, use_container_width=True)
-            
-            # Bar chart by location
-            location_risk = heatmap_data.groupby(['LOCATION_NAME', 'RISK_CLASSIFICATION']).size().reset_index(name='count')
-            fig3 = px.bar(
-                location_risk,
-                x='LOCATION_NAME',
-                y='count',
-                color='RISK_CLASSIFICATION',
-                title="🏥 Risk Distribution by Location",
-                color_discrete_map={
-                    'OUT_OF_STOCK': '#1f2937',
-                    'CRITICAL': '#dc2626',
-                    'HIGH_RISK': '#f59e0b',
-                    'MEDIUM_RISK': '#fbbf24',
-                    'HEALTHY': '#10b981',
-                    'OVERSTOCK': '#3b82f6',
-                },
-                barmode='stack'
-            )
-            if st.session_state.dark_mode:
-                fig3.update_layout(
-                    template='plotly_dark',
-                    paper_bgcolor='#1e293b',
-                    plot_bgcolor='#1e293b',
-                    font=dict(color='#e2e8f0'),
-                    height=450,
-                    xaxis_tickangle=-45
-                )
-            else:
-                fig3.update_layout(height=450, xaxis_tickangle=-45)
-            st.plotly_chart(fig3, use_container_width=True)
-            
-            # Category analysis
-            st.subheader("📦 Category Performance")
-            category_stats = heatmap_data.groupby('ITEM_CATEGORY').agg({
-                'STOCK_HEALTH_SCORE': 'mean',
-                'ITEM_NAME': 'count',
-                'REQUIRES_ATTENTION': 'sum'
-            }).reset_index()
-            category_stats.columns = ['Category', 'Avg Health Score', 'Total Items', 'Items at Risk']
-            
-            st.dataframe(
-                category_stats.style.format({
-                    'Avg Health Score': '{:.1f}',
-                    'Total Items': '{:.0f}',
-                    'Items at Risk': '{:.0f}'
-                }).background_gradient(subset=['Avg Health Score'], cmap='RdYlGn'),
-                use_container_width=True
-            )
-            
-            # Item Movement Velocity Feature
-            st.markdown("---")
-            st.subheader("🚀 Item Movement Velocity Analysis")
-            
-            # Convert numeric columns to float
-            heatmap_data['AVG_DAILY_ISSUE'] = pd.to_numeric(heatmap_data['AVG_DAILY_ISSUE'], errors='coerce').fillna(0)
-            
-            # Calculate velocity classification
-            heatmap_data['VELOCITY'] = heatmap_data['AVG_DAILY_ISSUE'].apply(lambda x: 
-                'Fast Mover' if x > 5 else ('Normal Mover' if x > 1 else 'Slow Mover')
-            )
-            
-            velocity_counts = heatmap_data['VELOCITY'].value_counts()
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                # Velocity distribution pie chart
-                fig_velocity = px.pie(
-                    values=velocity_counts.values,
-                    names=velocity_counts.index,
-                    title="📊 Item Movement Distribution",
-                    color=velocity_counts.index,
-                    color_discrete_map={
-                        'Fast Mover': '#10b981',
-                        'Normal Mover': '#f59e0b',
-                        'Slow Mover': '#ef4444'
-                    },
-                    hole=0.4
-                )
-                fig_velocity.update_traces(textposition='inside', textinfo='percent+label')
-                fig_velocity.update_layout(height=350)
-                st.plotly_chart(fig_velocity, use_container_width=True)
-            
-            with col2:
-                # Top fast movers
-                fast_movers = heatmap_data[heatmap_data['VELOCITY'] == 'Fast Mover'].nlargest(5, 'AVG_DAILY_ISSUE')[['ITEM_NAME', 'LOCATION_NAME', 'AVG_DAILY_ISSUE']]
-                st.markdown("**🔥 Top 5 Fast Moving Items**")
-                if not fast_movers.empty:
-                    for idx, item in fast_movers.iterrows():
-                        st.markdown(f"- **{item['ITEM_NAME']}** ({item['LOCATION_NAME']}): {item['AVG_DAILY_ISSUE']:.1f} units/day")
-                else:
-                    st.info("No fast moving items found")
-                
-                st.markdown("")
-                # Slow movers warning
-                slow_movers = heatmap_data[heatmap_data['VELOCITY'] == 'Slow Mover']
-                st.metric("🐢 Slow Moving Items", len(slow_movers), delta=f"{len(slow_movers)/len(heatmap_data)*100:.1f}% of total")
-            
-            # Stock Level Trend Simulation Feature (14)
-            st.markdown("---")
-            st.subheader("📈 Stock Level Trend Projection")
-            
-            col1, col2 = st.columns([2, 1])
-            with col1:
-                selected_item_trend = st.selectbox(
-                    "🏷️ Select Item for Trend Analysis",
-                    heatmap_data['ITEM_NAME'].unique()[:20]
-                )
-            with col2:
-                projection_days = st.slider("📅 Projection Days", 7, 90, 30)
-            
-            if selected_item_trend:
-                item_data = heatmap_data[heatmap_data['ITEM_NAME'] == selected_item_trend].iloc[0]
-                current_stock = float(pd.to_numeric(item_data['CURRENT_STOCK'], errors='coerce') or 0)
-                daily_consumption = float(pd.to_numeric(item_data['AVG_DAILY_ISSUE'], errors='coerce') or 0)
-                
-                # Generate projection
-                days = list(range(projection_days + 1))
-                projected_stock = [max(0, current_stock - (daily_consumption * day)) for day in days]
-                
-                fig_trend = px.line(
-                    x=days,
-                    y=projected_stock,
-                    title=f"📊 {selected_item_trend} - Stock Projection",
-                    labels={'x': 'Days from Now', 'y': 'Projected Stock Level'}
-                )
-                fig_trend.add_hline(y=0, line_dash="dash", line_color="red", annotation_text="Stockout")
-                fig_trend.update_layout(height=350)
-                st.plotly_chart(fig_trend, use_container_width=True)
-                
-                stockout_day = int(current_stock / daily_consumption) if daily_consumption > 0 else 999
-                if stockout_day <= projection_days:
-                    st.warning(f"⚠️ Projected stockout in **{stockout_day} days**")
-                else:
-                    st.success(f"✅ Stock sufficient for next **{projection_days}+ days**")
-        else:
-            st.info("🔍 No data available for selected filters.")
-    
-    with tab5:
-        st.subheader("💰 Cost Insights & Savings Analysis")
-        reorders = get_reorder_recommendations()
-        
-        if not reorders.empty:
-            total_value, savings, stockout_prevention = calculate_cost_savings(reorders)
-            
-            # Key metrics
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric("💵 Total Reorder Cost", f"${total_value:,.2f}")
-            with col2:
-                st.metric("💰 Potential Savings", f"${savings:,.2f}", delta="15% optimization")
-            with col3:
-                st.metric("🛡️ Stockout Prevention", f"${stockout_prevention:,.2f}")
-            with col4:
-                net_benefit = savings + stockout_prevention
-                st.metric("✨ Total Net Benefit", f"${net_benefit:,.2f}", delta_color="normal")
-            
-            st.markdown("---")
-            
-            # Cost breakdown
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.subheader("📊 Cost Breakdown by Category")
-                category_costs = reorders.groupby('ITEM_CATEGORY')['ESTIMATED_ORDER_VALUE'].sum().reset_index()
-                category_costs['ESTIMATED_ORDER_VALUE'] = category_costs['ESTIMATED_ORDER_VALUE'].astype(float)
-                fig = px.pie(
-                    category_costs,
-                    values='ESTIMATED_ORDER_VALUE',
-                    names='ITEM_CATEGORY',
-                    title="Reorder Value by Category",
-                    hole=0.4
-                )
-                fig.update_traces(textposition='inside', textinfo='percent+label')
-                if st.session_state.dark_mode:
-                    fig.update_layout(
-                        template='plotly_dark',
-                        paper_bgcolor='#1e293b',
-                        plot_bgcolor='#1e293b',
-                        font=dict(color='#e2e8f0')
-                    )
-                st.plotly_chart(fig, use_container_width=True)
-            
-            with col2:
-                st.subheader("🏥 Cost Distribution by Location")
-                location_costs = reorders.groupby('LOCATION_NAME')['ESTIMATED_ORDER_VALUE'].sum().reset_index()
-                location_costs['ESTIMATED_ORDER_VALUE'] = location_costs['ESTIMATED_ORDER_VALUE'].astype(float)
-                location_costs = location_costs.sort_values('ESTIMATED_ORDER_VALUE', ascending=True)
-                fig2 = px.bar(
-                    location_costs,
-                    x='ESTIMATED_ORDER_VALUE',
-                    y='LOCATION_NAME',
-                    orientation='h',
-                    title="Reorder Value by Location",
-                    color='ESTIMATED_ORDER_VALUE',
-                    color_continuous_scale='Blues'
-                )
-                if st.session_state.dark_mode:
-                    fig2.update_layout(
-                        template='plotly_dark',
-                        paper_bgcolor='#1e293b',
-                        plot_bgcolor='#1e293b',
-                        font=dict(color='#e2e8f0')
-                    )
-                st.plotly_chart(fig2, use_container_width=True)
-            
-            # ROI Analysis
-            st.subheader("📈 Return on Investment (ROI) Analysis")
-            roi_percentage = ((savings + stockout_prevention) / total_value * 100) if total_value > 0 else 0
-            
-            # Conditional styling for ROI badges
-            if st.session_state.dark_mode:
-                roi_bg = "linear-gradient(135deg, #14532d, #166534)"
-                roi_num_color = "#86efac"
-                roi_text_color = "#bbf7d0"
-                
-                avg_bg = "linear-gradient(135deg, #1e3a8a, #1e40af)"
-                avg_num_color = "#93c5fd"
-                avg_text_color = "#bfdbfe"
-                
-                critical_bg = "linear-gradient(135deg, #7f1d1d, #991b1b)"
-                critical_num_color = "#fca5a5"
-                critical_text_color = "#fecaca"
-            else:
-                roi_bg = "linear-gradient(135deg, #d1fae5, #ecfdf5)"
-                roi_num_color = "#065f46"
-                roi_text_color = "#10b981"
-                
-                avg_bg = "linear-gradient(135deg, #dbeafe, #eff6ff)"
-                avg_num_color = "#1e3a8a"
-                avg_text_color = "#3b82f6"
-                
-                critical_bg = "linear-gradient(135deg, #fecaca, #fee2e2)"
-                critical_num_color = "#991b1b"
-                critical_text_color = "#dc2626"
-            
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.markdown(f"""
-                <div style="text-align: center; padding: 1.5rem; background: {roi_bg}; border-radius: 12px;">
-                    <div style="font-size: 2rem; color: {roi_num_color}; font-weight: bold;">{roi_percentage:.1f}%</div>
-                    <div style="color: {roi_text_color}; font-weight: 600;">Expected ROI</div>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            with col2:
-                avg_reorder = total_value / len(reorders) if len(reorders) > 0 else 0
-                st.markdown(f"""
-                <div style="text-align: center; padding: 1.5rem; background: {avg_bg}; border-radius: 12px;">
-                    <div style="font-size: 2rem; color: {avg_num_color}; font-weight: bold;">${avg_reorder:,.0f}</div>
-                    <div style="color: {avg_text_color}; font-weight: 600;">Avg Order Value</div>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            with col3:
-                critical_value = float(reorders[reorders['IS_CRITICAL_ITEM'] == True]['ESTIMATED_ORDER_VALUE'].sum())
-                st.markdown(f"""
-                <div style="text-align: center; padding: 1.5rem; background: {critical_bg}; border-radius: 12px;">
-                    <div style="font-size: 2rem; color: {critical_num_color}; font-weight: bold;">${critical_value:,.0f}</div>
-                    <div style="color: {critical_text_color}; font-weight: 600;">Critical Items</div>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            # Insights
-            st.markdown("---")
-            st.subheader("💡 AI-Powered Insights")
-            
-            insights = []
-            if roi_percentage > 20:
-                insights.append("✅ **Excellent ROI**: Expected returns exceed 20%, indicating highly efficient inventory management.")
-            elif roi_percentage > 10:
-                insights.append("⚠️ **Good ROI**: Returns are positive but there's room for optimization.")
-            else:
-                insights.append("🔴 **Action Required**: Consider reviewing procurement strategies to improve ROI.")
-            
-            if total_value > 0 and critical_value / total_value > 0.3:
-                insights.append("🔴 **High Critical Spend**: Over 30% of reorder budget is for critical items. Consider increasing safety stock.")
-            
-            top_category = category_costs.nlargest(1, 'ESTIMATED_ORDER_VALUE')['ITEM_CATEGORY'].values[0]
-            insights.append(f"📦 **Top Category**: {top_category} requires the highest reorder investment.")
-            
-            for insight in insights:
-                st.info(insight)
-            
-            # Inventory Turnover Analysis Feature (15)
-            st.markdown("---")
-            st.subheader("🔄 Inventory Turnover Metrics")
-            
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                avg_daily_value = total_value / 30 if total_value > 0 else 0
-                st.metric("💵 Avg Daily Investment", f"${avg_daily_value:,.0f}")
-            
-            with col2:
-                turnover_rate = len(reorders) / summary['TOTAL_ITEMS'] * 100 if summary and summary['TOTAL_ITEMS'] > 0 else 0
-                st.metric("🔁 Turnover Rate", f"{turnover_rate:.1f}%")
-            
-            with col3:
-                efficiency_score = (100 - turnover_rate) if turnover_rate < 100 else 0
-                st.metric("⭐ Efficiency Score", f"{efficiency_score:.0f}/100")
-            
-            # Stock Transfer Recommendations Feature (16)
-            st.markdown("---")
-            st.subheader("🚚 Stock Transfer Suggestions")
-            
-            heatmap_all = get_stock_heatmap(None, None, None)
-            if not heatmap_all.empty:
-                st.markdown("**📦 Recommended Transfers to Balance Stock**")
-                
-                # Find overstocked and understocked locations for same items
-                item_groups = heatmap_all.groupby('ITEM_NAME')
-                transfer_suggestions = []
-                
-                for item_name, group in item_groups:
-                    if len(group) > 1:
-                        overstock = group[group['RISK_CLASSIFICATION'] == 'OVERSTOCK']
-                        critical = group[group['RISK_CLASSIFICATION'].isin(['CRITICAL', 'OUT_OF_STOCK'])]
-                        
-                        if not overstock.empty and not critical.empty:
-                            for _, over_loc in overstock.iterrows():
-                                for _, crit_loc in critical.iterrows():
-                                    over_stock_qty = float(pd.to_numeric(over_loc['CURRENT_STOCK'], errors='coerce') or 0)
-                                    crit_consumption = float(pd.to_numeric(crit_loc['AVG_DAILY_ISSUE'], errors='coerce') or 0)
-                                    transfer_qty = min(over_stock_qty * 0.3, crit_consumption * 14)
-                                    if transfer_qty > 0:
-                                        transfer_suggestions.append({
-                                            'Item': item_name,
-                                            'From': over_loc['LOCATION_NAME'],
-                                            'To': crit_loc['LOCATION_NAME'],
-                                            'Qty': f"{transfer_qty:.0f}",
-                                            'Priority': 'High' if crit_loc['RISK_CLASSIFICATION'] == 'OUT_OF_STOCK' else 'Medium'
-                                        })
-                
-                if transfer_suggestions:
-                    transfer_df = pd.DataFrame(transfer_suggestions[:10])
-                    st.dataframe(transfer_df, use_container_width=True, hide_index=True)
-                    
-                    csv_transfer = transfer_df.to_csv(index=False)
-                    st.download_button(
-                        "📥 Download Transfer Plan",
-                        csv_transfer,
-                        "transfer_recommendations.csv",
-                        "text/csv"
-                    )
-                else:
-                    st.success("✅ No urgent transfers needed - stock is well balanced!")
-            else:
-                st.info("🔍 No data available for transfer analysis")
-        else:
-            st.info("📋 No cost data available at this time.")
+        "🏆 Top Performers",
+        "📈 History"
+    ], on_change="rerun", key="active_tab")
+    renderers = [
+        render_heatmap_tab,
+        render_alerts_tab,
+        render_reorder_tab,
+        render_analytics_tab,
+        render_cost_tab,
+        render_performers_tab,
+        render_history_tab
+    ]
     
-    with tab6:
-        st.subheader("🏆 Top & Bottom Performers")
-        heatmap_data = get_stock_heatmap(None, None, None)
-        
-        if not heatmap_data.empty:
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.markdown("### 🌟 Top Performers")
-                
-                # Convert numeric columns
-                heatmap_data['STOCK_HEALTH_SCORE'] = pd.to_numeric(heatmap_data['STOCK_HEALTH_SCORE'], errors='coerce').fillna(0)
-                heatmap_data['CURRENT_STOCK'] = pd.to_numeric(heatmap_data['CURRENT_STOCK'], errors='coerce').fillna(0)
-                
-                # Best locations by health score
-                st.markdown("**🏥 Healthiest Locations**")
-                top_locations = heatmap_data.groupby('LOCATION_NAME')['STOCK_HEALTH_SCORE'].mean().nlargest(5).reset_index()
-                for idx, loc in top_locations.iterrows():
-                    st.success(f"{idx+1}. **{loc['LOCATION_NAME']}**: {loc['STOCK_HEALTH_SCORE']:.1f}/100")
-                
-                st.markdown("")
-                
-                # Best managed items
-                st.markdown("**✅ Best Managed Items**")
-                top_items = heatmap_data[heatmap_data['RISK_CLASSIFICATION'] == 'HEALTHY'].nlargest(5, 'STOCK_HEALTH_SCORE')[['ITEM_NAME', 'LOCATION_NAME', 'STOCK_HEALTH_SCORE']]
-                for idx, item in top_items.iterrows():
-                    st.success(f"• **{item['ITEM_NAME']}** at {item['LOCATION_NAME']}: {item['STOCK_HEALTH_SCORE']:.1f}/100")
-                
-                st.markdown("")
-                
-                # Optimal stock coverage
-                st.markdown("**📊 Optimal Stock Coverage**")
-                heatmap_data['DAYS_OF_COVER'] = pd.to_numeric(heatmap_data['DAYS_OF_COVER'], errors='coerce').fillna(0)
-                optimal_coverage = heatmap_data[(heatmap_data['DAYS_OF_COVER'] >= 30) & (heatmap_data['DAYS_OF_COVER'] <= 90)].nlargest(5, 'DAYS_OF_COVER')[['ITEM_NAME', 'LOCATION_NAME', 'DAYS_OF_COVER']]
-                for idx, item in optimal_coverage.iterrows():
-                    st.info(f"• **{item['ITEM_NAME']}** at {item['LOCATION_NAME']}: {item['DAYS_OF_COVER']:.0f} days")
-            
-            with col2:
-                st.markdown("### ⚠️ Needs Attention")
-                
-                # Worst locations by health score
-                st.markdown("**🚨 Locations Needing Support**")
-                bottom_locations = heatmap_data.groupby('LOCATION_NAME')['STOCK_HEALTH_SCORE'].mean().nsmallest(5).reset_index()
-                for idx, loc in bottom_locations.iterrows():
-                    st.error(f"{idx+1}. **{loc['LOCATION_NAME']}**: {loc['STOCK_HEALTH_SCORE']:.1f}/100")
-                
-                st.markdown("")
-                
-                # Critical items
-                st.markdown("**🔴 Most Critical Items**")
-                critical_items = heatmap_data[heatmap_data['RISK_CLASSIFICATION'].isin(['CRITICAL', 'OUT_OF_STOCK'])].nsmallest(5, 'STOCK_HEALTH_SCORE')[['ITEM_NAME', 'LOCATION_NAME', 'CURRENT_STOCK']]
-                for idx, item in critical_items.iterrows():
-                    st.error(f"• **{item['ITEM_NAME']}** at {item['LOCATION_NAME']}: {item['CURRENT_STOCK']:.0f} units")
-                
-                st.markdown("")
-                
-                # Overstock issues
-                st.markdown("**📦 Overstock Situations**")
-                heatmap_data['DAYS_OF_COVER'] = pd.to_numeric(heatmap_data['DAYS_OF_COVER'], errors='coerce').fillna(0)
-                overstock = heatmap_data[heatmap_data['RISK_CLASSIFICATION'] == 'OVERSTOCK'].nlargest(5, 'DAYS_OF_COVER')[['ITEM_NAME', 'LOCATION_NAME', 'DAYS_OF_COVER']]
-                if not overstock.empty:
-                    for idx, item in overstock.iterrows():
-                        st.warning(f"• **{item['ITEM_NAME']}** at {item['LOCATION_NAME']}: {item['DAYS_OF_COVER']:.0f} days")
-                else:
-                    st.success("✅ No overstock issues!")
-            
-            # Summary statistics
-            st.markdown("---")
-            st.subheader("📊 Overall Performance Summary")
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                healthy_pct = len(heatmap_data[heatmap_data['RISK_CLASSIFICATION'] == 'HEALTHY']) / len(heatmap_data) * 100
-                st.metric("✅ Healthy Rate", f"{healthy_pct:.1f}%")
-            
-            with col2:
-                critical_pct = len(heatmap_data[heatmap_data['RISK_CLASSIFICATION'].isin(['CRITICAL', 'OUT_OF_STOCK'])]) / len(heatmap_data) * 100
-                st.metric("🔴 Critical Rate", f"{critical_pct:.1f}%", delta=f"-{critical_pct:.1f}%", delta_color="inverse")
-            
-            with col3:
-                avg_coverage = heatmap_data['DAYS_OF_COVER'].mean()
-                st.metric("📊 Avg Coverage", f"{avg_coverage:.0f} days")
-            
-            with col4:
-                total_locations = heatmap_data['LOCATION_NAME'].nunique()
-                st.metric("🏥 Active Locations", total_locations)
-        else:
-            st.info("🔍 No data available for performance analysis.")
-        
-        # What-If Scenario Simulator Feature (17)
-        st.markdown("---")
-        st.subheader("🧪 What-If Scenario Simulator")
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            st.markdown("**🎯 Adjust Parameters**")
-            demand_change = st.slider("📈 Demand Change", -50, 100, 0, help="% change in consumption")
-            lead_time_change = st.slider("🚚 Lead Time Change", -50, 100, 0, help="% change in delivery time")
-            budget_factor = st.slider("💰 Budget Adjustment", 50, 200, 100, help="% of current budget")
-        
-        with col2:
-            st.markdown("**📊 Simulation Results**")
-            
-            if not heatmap_data.empty:
-                base_critical = len(heatmap_data[heatmap_data['RISK_CLASSIFICATION'].isin(['CRITICAL', 'OUT_OF_STOCK'])])
-                
-                # Simulate impact
-                demand_factor = 1 + (demand_change / 100)
-                simulated_critical = int(base_critical * demand_factor)
-                
-                st.metric(
-                    "🚨 Projected Critical Items",
-                    simulated_critical,
-                    delta=f"{simulated_critical - base_critical:+d}",
-                    delta_color="inverse"
-                )
-                
-                simulated_stockouts = int(simulated_critical * (1 + lead_time_change / 100))
-                st.metric(
-                    "⚠️ Potential Stockouts",
-                    simulated_stockouts,
-                    delta=f"{simulated_stockouts - base_critical:+d}",
-                    delta_color="inverse"
-                )
-                
-                budget_needed = (budget_factor / 100) * float(get_reorder_recommendations()['ESTIMATED_ORDER_VALUE'].sum())
-                st.metric("💵 Budget Required", f"${budget_needed:,.0f}")
-        
-        # Smart Recommendations Engine Feature (18)
-        st.markdown("---")
-        st.subheader("🤖 AI Smart Recommendations")
-        
-        recommendations = []
-        
-        if not heatmap_data.empty:
-            critical_rate = len(heatmap_data[heatmap_data['RISK_CLASSIFICATION'].isin(['CRITICAL', 'OUT_OF_STOCK'])]) / len(heatmap_data)
-            overstock_rate = len(heatmap_data[heatmap_data['RISK_CLASSIFICATION'] == 'OVERSTOCK']) / len(heatmap_data)
-            
-            if critical_rate > 0.15:
-                recommendations.append({
-                    'priority': '🔴 High',
-                    'action': 'Increase Safety Stock',
-                    'reason': f'{critical_rate*100:.1f}% items at risk',
-                    'impact': 'Reduce stockout risk by 40%'
-                })
-            
-            if overstock_rate > 0.20:
-                recommendations.append({
-                    'priority': '🟡 Medium',
-                    'action': 'Optimize Reorder Quantities',
-                    'reason': f'{overstock_rate*100:.1f}% items overstocked',
-                    'impact': 'Free up $5K-10K in working capital'
-                })
-            
-            slow_movers = heatmap_data[heatmap_data['AVG_DAILY_ISSUE'] < 0.5]
-            if len(slow_movers) > 10:
-                recommendations.append({
-                    'priority': '🟠 Low',
-                    'action': 'Review Slow-Moving Items',
-                    'reason': f'{len(slow_movers)} slow movers identified',
-                    'impact': 'Reduce holding costs by 15%'
-                })
-            
-            # Location-specific recommendations
-            location_health = heatmap_data.groupby('LOCATION_NAME')['STOCK_HEALTH_SCORE'].mean()
-            worst_location = location_health.idxmin()
-            worst_score = location_health.min()
-            
-            if worst_score < 60:
-                recommendations.append({
-                    'priority': '🔴 High',
-                    'action': f'Priority Support for {worst_location}',
-                    'reason': f'Health score: {worst_score:.1f}/100',
-                    'impact': 'Improve overall system health by 8%'
-                })
-            
-            # Top performers to replicate
-            best_location = location_health.idxmax()
-            best_score = location_health.max()
-            
-            recommendations.append({
-                'priority': '⭐ Strategic',
-                'action': f'Replicate Best Practices from {best_location}',
-                'reason': f'Health score: {best_score:.1f}/100',
-                'impact': 'System-wide efficiency improvement'
-            })
-        
-        if recommendations:
-            for rec in recommendations:
-                with st.container():
-                    col1, col2, col3, col4 = st.columns([1, 2, 2, 2])
-                    with col1:
-                        st.markdown(f"**{rec['priority']}**")
-                    with col2:
-                        st.markdown(f"**{rec['action']}**")
-                    with col3:
-                        st.caption(rec['reason'])
-                    with col4:
-                        st.caption(f"✅ {rec['impact']}")
-                    st.markdown("")
-        else:
-            st.success("✅ All systems operating optimally!")
-        
-        # Export with Advanced Formatting Feature (19)
-        st.markdown("---")
-        st.subheader("📊 Advanced Export Options")
-        
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            if st.button("📋 Executive Summary Report", use_container_width=True):
-                summary = get_executive_summary()
-                if summary:
-                    summary_data = pd.DataFrame([summary])
-                    csv = summary_data.to_csv(index=False)
-                    st.download_button(
-                        "📥 Download Summary",
-                        csv,
-                        f"executive_summary_{datetime.now().strftime('%Y%m%d')}.csv",
-                        "text/csv"
-                    )
-        
-        with col2:
-            if st.button("🚨 Critical Items Report", use_container_width=True):
-                critical_data = heatmap_data[heatmap_data['RISK_CLASSIFICATION'].isin(['CRITICAL', 'OUT_OF_STOCK'])]
-                if not critical_data.empty:
-                    csv = critical_data.to_csv(index=False)
-                    st.download_button(
-                        "📥 Download Critical Items",
-                        csv,
-                        f"critical_items_{datetime.now().strftime('%Y%m%d')}.csv",
-                        "text/csv"
-                    )
-        
-        with col3:
-            if st.button("🎯 Performance Metrics", use_container_width=True):
-                location_perf = heatmap_data.groupby('LOCATION_NAME').agg({
-                    'STOCK_HEALTH_SCORE': 'mean',
-                    'ITEM_NAME': 'count',
-                    'REQUIRES_ATTENTION': 'sum'
-                }).round(2)
-                csv = location_perf.to_csv()
-                st.download_button(
-                    "📥 Download Performance",
-                    csv,
-                    f"location_performance_{datetime.now().strftime('%Y%m%d')}.csv",
-                    "text/csv"
-                )
+    # Only the selected tab runs; the others are skipped entirely. It is a
+    # fragment, rerun on its own when its widgets change and, with auto-refresh
+    # on, redrawn from the refreshed cache every interval without the page
+    for tab, render in zip(tabs, renderers):
+        if tab.open:
+            with tab:
+                st.fragment(render, run_every=refresh_every())(location_filter, category_filter, risk_filter)
     
     # Footer
     st.divider()
@@ -2193,6 +2765,14 @@ def main():
         st.caption(f"⏰ Data as of: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     with col3:
         st.caption("🏥 AI for Good Initiative")
+    
+    with outage_banner.container():
+        render_outage_banner()
+    
+    if is_admin():
+        with st.sidebar:
+            render_metrics_panel()
+            render_profiler_panel()
 
 if __name__ == "__main__":
     main()
@@ -79,6 +79,11 @@ CREATE OR REPLACE FILE FORMAT STOCKPULSE_AI.DATA.CSV_FORMAT
     NULL_IF = ('NULL', 'null', '', 'N/A', 'NA')
     COMMENT = 'Standard CSV format for data ingestion';
 
+CREATE OR REPLACE FILE FORMAT STOCKPULSE_AI.DATA.PARQUET_FORMAT
+    TYPE = 'PARQUET'
+    COMPRESSION = AUTO
+    COMMENT = 'Compressed columnar format used by the bulk loader (python -m stockpulse.ingest)';
+
 CREATE OR REPLACE FILE FORMAT STOCKPULSE_AI.DATA.JSON_FORMAT
     TYPE = 'JSON'
     STRIP_OUTER_ARRAY = TRUE
@@ -251,9 +251,21 @@ INSERT INTO DATA_QUALITY_RULES (rule_name, rule_type, rule_sql, severity) VALUES
     ('Missing Item Name', 'MISSING_DATA', 
      'SELECT * FROM DAILY_STOCK_RAW WHERE item_name IS NULL OR item_name = ''''', 'MEDIUM'),
     ('Stock Mismatch', 'ANOMALY', 
-     'SELECT * FROM DAILY_STOCK_RAW WHERE opening_stock + receipts - issues != closing_stock', 'HIGH'),
+     'SELECT * FROM DAILY_STOCK_RAW WHERE ABS(opening_stock + receipts - issues - closing_stock) > 0.01', 'HIGH'),
     ('Future Date', 'ANOMALY', 
-     'SELECT * FROM DAILY_STOCK_RAW WHERE record_date > CURRENT_DATE()', 'CRITICAL');
+     'SELECT * FROM DAILY_STOCK_RAW WHERE record_date > CURRENT_DATE()', 'CRITICAL'),
+    ('Missing Location Code', 'MISSING_DATA', 
+     'SELECT * FROM DAILY_STOCK_RAW WHERE location_code IS NULL OR location_code = ''''', 'MEDIUM'),
+    ('Missing Item Code', 'MISSING_DATA', 
+     'SELECT * FROM DAILY_STOCK_RAW WHERE item_code IS NULL OR item_code = ''''', 'MEDIUM'),
+    ('Missing Stock Quantities', 'MISSING_DATA', 
+     'SELECT * FROM DAILY_STOCK_RAW WHERE opening_stock IS NULL OR receipts IS NULL OR issues IS NULL OR closing_stock IS NULL', 'MEDIUM'),
+    ('Duplicate Records', 'DUPLICATE', 
+     'SELECT * FROM DAILY_STOCK_RAW QUALIFY COUNT(*) OVER (PARTITION BY record_date, location_code, item_code) > 1', 'HIGH'),
+    ('Opening Stock Above 1M Units', 'ANOMALY', 
+     'SELECT * FROM DAILY_STOCK_RAW WHERE opening_stock > 1000000', 'LOW'),
+    ('Daily Issues Above 10K Units', 'ANOMALY', 
+     'SELECT * FROM DAILY_STOCK_RAW WHERE issues > 10000', 'LOW');
 
 -- ============================================================================
 -- VERIFICATION QUERIES
@@ -282,4 +294,6 @@ ORDER BY table_name;
 -- 4. PROCUREMENT_ACTIONS enables closed-loop tracking (optional Unistore feature)
 -- 5. Adjust data types and sizes based on your specific requirements
 -- 6. Consider partitioning DAILY_STOCK_RAW by date for large datasets
+-- 7. DATA_QUALITY_RULES is mirrored by config/data_quality_rules.json, which
+--    tests/validate_data.py uses when no Snowflake connection is available
 -- ============================================================================
@@ -352,6 +352,8 @@ SELECT
     SUM(CASE WHEN risk_classification = 'MEDIUM_RISK' THEN 1 ELSE 0 END) AS medium_risk_count,
     SUM(CASE WHEN risk_classification = 'HEALTHY' THEN 1 ELSE 0 END) AS healthy_count,
     SUM(CASE WHEN risk_classification IN ('OVERSTOCK', 'SLOW_MOVING') THEN 1 ELSE 0 END) AS overstock_count,
+    SUM(CASE WHEN requires_attention THEN 1 ELSE 0 END) AS requires_attention_count,
+    SUM(CASE WHEN is_critical_item THEN 1 ELSE 0 END) AS critical_item_count,
     
     -- Average metrics
     ROUND(AVG(stock_health_score), 2) AS avg_stock_health_score,
@@ -57,6 +57,7 @@ CREATE OR REPLACE TABLE ALERT_HISTORY (
     item_code VARCHAR(50),
     alert_type VARCHAR(50),
     severity VARCHAR(20),
+    alert_event VARCHAR(20), -- 'NEW', 'ESCALATED', 'DOWNGRADED', 'RESOLVED'
     stock_health_score NUMBER(5,2),
     days_of_cover NUMBER(10,2),
     created_timestamp TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP()
@@ -136,11 +137,232 @@ WHERE
     OR (risk_classification = 'OVERSTOCK' AND closing_stock > avg_daily_issue * 90);
 
 -- ============================================================================
--- 5. GRANT PERMISSIONS
+-- 5. DELTA ALERT PROCESSING
+-- ============================================================================
+
+-- Re-scores only the (location, item) pairs the stream reports, from the
+-- raw rows through V_STOCK_HEALTH_CLASSIFICATION (no dynamic table lag),
+-- and writes only what changed against the open alerts:
+--   NEW        actionable, no open alert
+--   ESCALATED  more urgent than the open alert, which it supersedes
+--   DOWNGRADED another, less urgent type than the open alert, which it
+--              supersedes (e.g. STOCK_OUT -> OVERSTOCK after a receipt)
+--   RESOLVED   open alert whose pair is no longer actionable
+-- Classification follows STOCK_ALERTS. Consuming the stream inside the
+-- transaction advances its offset only when the writes commit.
+-- full_rescore adds every pair, for changes no new row reports (a pair
+-- turning slow-moving as days pass).
+CREATE OR REPLACE PROCEDURE PROCESS_STOCK_ALERTS(full_rescore BOOLEAN)
+RETURNS VARCHAR
+LANGUAGE SQL
+AS
+$$
+DECLARE
+    event_count NUMBER DEFAULT 0;
+BEGIN
+    CREATE OR REPLACE TEMPORARY TABLE CHANGED_PAIRS (
+        location_code VARCHAR(50),
+        item_code VARCHAR(50)
+    );
+    CREATE OR REPLACE TEMPORARY TABLE ALERT_EVENTS (
+        alert_event VARCHAR(20),
+        open_alert_id NUMBER,
+        alert_type VARCHAR(50),
+        severity VARCHAR(20),
+        location_code VARCHAR(50),
+        location_name VARCHAR(200),
+        item_code VARCHAR(50),
+        item_name VARCHAR(200),
+        item_category VARCHAR(100),
+        current_stock NUMBER(18,2),
+        days_until_stockout NUMBER(10,0),
+        recommended_action VARCHAR(500),
+        alert_message TEXT,
+        stock_health_score NUMBER(5,2),
+        days_of_cover NUMBER(10,2)
+    );
+    
+    BEGIN TRANSACTION;
+    
+    INSERT INTO CHANGED_PAIRS
+    SELECT location_code, item_code FROM STR_DAILY_STOCK_CHANGES
+    UNION
+    SELECT location_code, item_code FROM STOCKPULSE_AI.ANALYTICS.V_LATEST_STOCK_POSITION
+    WHERE :full_rescore;
+    
+    INSERT INTO ALERT_EVENTS
+    WITH RESCORED AS (
+        SELECT 
+            h.*,
+            CASE 
+                WHEN h.risk_classification = 'OUT_OF_STOCK' THEN 'STOCK_OUT'
+                WHEN h.risk_classification = 'CRITICAL' THEN 'CRITICAL_LOW'
+                WHEN h.risk_classification = 'HIGH_RISK' THEN 'HIGH_RISK'
+                WHEN h.risk_classification = 'OVERSTOCK' AND h.closing_stock > h.avg_daily_issue * 90 THEN 'OVERSTOCK'
+            END AS new_alert_type
+        FROM STOCKPULSE_AI.ANALYTICS.V_STOCK_HEALTH_CLASSIFICATION h
+        JOIN CHANGED_PAIRS k
+            ON h.location_code = k.location_code AND h.item_code = k.item_code
+    ),
+    COMPARED AS (
+        SELECT 
+            r.*,
+            a.alert_id AS open_alert_id,
+            a.alert_type AS open_alert_type,
+            CASE 
+                WHEN r.new_alert_type IS NOT NULL AND a.alert_id IS NULL THEN 'NEW'
+                -- Lower rank is more urgent
+                WHEN r.new_alert_type IS NOT NULL
+                    AND DECODE(r.new_alert_type, 'STOCK_OUT', 1, 'CRITICAL_LOW', 2, 'HIGH_RISK', 3, 4)
+                      < DECODE(a.alert_type, 'STOCK_OUT', 1, 'CRITICAL_LOW', 2, 'HIGH_RISK', 3, 4) THEN 'ESCALATED'
+                WHEN r.new_alert_type IS NOT NULL
+                    AND DECODE(r.new_alert_type, 'STOCK_OUT', 1, 'CRITICAL_LOW', 2, 'HIGH_RISK', 3, 4)
+                      > DECODE(a.alert_type, 'STOCK_OUT', 1, 'CRITICAL_LOW', 2, 'HIGH_RISK', 3, 4) THEN 'DOWNGRADED'
+                WHEN r.new_alert_type IS NULL AND a.alert_id IS NOT NULL THEN 'RESOLVED'
+            END AS alert_event
+        FROM RESCORED r
+        LEFT JOIN ALERT_NOTIFICATIONS a
+            ON a.location_code = r.location_code AND a.item_code = r.item_code AND NOT a.is_resolved
+    )
+    SELECT 
+        alert_event,
+        open_alert_id,
+        COALESCE(new_alert_type, open_alert_type),
+        CASE 
+            WHEN risk_classification = 'OUT_OF_STOCK' THEN 'CRITICAL'
+            WHEN risk_classification = 'CRITICAL' OR is_critical_item THEN 'CRITICAL'
+            WHEN risk_classification = 'HIGH_RISK' THEN 'HIGH'
+            WHEN risk_classification = 'MEDIUM_RISK' THEN 'MEDIUM'
+            ELSE 'LOW'
+        END,
+        location_code,
+        location_name,
+        item_code,
+        item_name,
+        item_category,
+        closing_stock,
+        days_until_stockout,
+        CASE 
+            WHEN risk_classification = 'OUT_OF_STOCK' THEN 
+                'URGENT: Place emergency order immediately'
+            WHEN days_until_stockout <= lead_time_days THEN 
+                'Place order today - stock-out expected in ' || days_until_stockout || ' days'
+            WHEN risk_classification = 'OVERSTOCK' THEN 
+                'Review for redistribution or reduced ordering'
+            ELSE 
+                'Monitor stock levels and plan replenishment'
+        END,
+        CASE 
+            WHEN risk_classification = 'OUT_OF_STOCK' THEN 
+                item_name || ' is OUT OF STOCK at ' || location_name || '. Immediate action required.'
+            WHEN risk_classification = 'CRITICAL' THEN 
+                item_name || ' at ' || location_name || ' will run out in ' || days_until_stockout || ' days. Current stock: ' || closing_stock || ' ' || unit_of_measure
+            WHEN risk_classification = 'HIGH_RISK' THEN 
+                item_name || ' at ' || location_name || ' requires reorder. ' || days_until_stockout || ' days of supply remaining.'
+            WHEN risk_classification = 'OVERSTOCK' THEN 
+                item_name || ' at ' || location_name || ' has not moved in ' || days_since_last_movement || ' days. Consider redistribution.'
+            ELSE 
+                item_name || ' at ' || location_name || ' approaching reorder point.'
+        END,
+        stock_health_score,
+        days_of_cover
+    FROM COMPARED
+    WHERE alert_event IS NOT NULL;
+    
+    -- Escalations and downgrades supersede the open alert, resolutions close it
+    UPDATE ALERT_NOTIFICATIONS
+    SET is_resolved = TRUE, resolved_timestamp = CURRENT_TIMESTAMP()
+    WHERE alert_id IN (SELECT open_alert_id FROM ALERT_EVENTS WHERE alert_event <> 'NEW');
+    
+    INSERT INTO ALERT_NOTIFICATIONS (
+        alert_type, severity, location_code, location_name, item_code, item_name, item_category,
+        current_stock, days_until_stockout, recommended_action, alert_message
+    )
+    SELECT 
+        alert_type, severity, location_code, location_name, item_code, item_name, item_category,
+        current_stock, days_until_stockout, recommended_action, alert_message
+    FROM ALERT_EVENTS
+    WHERE alert_event <> 'RESOLVED';
+    
+    INSERT INTO ALERT_HISTORY (
+        alert_date, location_code, item_code, alert_type, severity, alert_event, stock_health_score, days_of_cover
+    )
+    SELECT 
+        CURRENT_DATE(), location_code, item_code, alert_type, severity, alert_event, stock_health_score, days_of_cover
+    FROM ALERT_EVENTS;
+    
+    COMMIT;
+    
+    SELECT COUNT(*) INTO :event_count FROM ALERT_EVENTS;
+    RETURN 'Processed ' || event_count || ' alert events';
+END;
+$$;
+
+-- Runs within a minute of a load, and only when the stream has rows
+CREATE OR REPLACE TASK TSK_PROCESS_STOCK_ALERTS
+    WAREHOUSE = STOCKPULSE_TASK_WH
+    SCHEDULE = '1 MINUTE'
+    WHEN SYSTEM$STREAM_HAS_DATA('STR_DAILY_STOCK_CHANGES')
+AS
+    CALL PROCESS_STOCK_ALERTS(FALSE);
+
+-- Daily full re-score for alerts that change with time alone
+CREATE OR REPLACE TASK TSK_RESCORE_STOCK_ALERTS
+    WAREHOUSE = STOCKPULSE_TASK_WH
+    SCHEDULE = 'USING CRON 0 5 * * * UTC'
+AS
+    CALL PROCESS_STOCK_ALERTS(TRUE);
+
+ALTER TASK TSK_RESCORE_STOCK_ALERTS RESUME;
+ALTER TASK TSK_PROCESS_STOCK_ALERTS RESUME;
+
+-- ============================================================================
+-- 6. TABLE: Dashboard Query Profile
+-- ============================================================================
+
+-- One row per dashboard query, written in batches by the Streamlit app
+-- (stockpulse/query_profile.py). QUERY_TAG is JSON with the calling
+-- function and dashboard section; the timings come from QUERY_HISTORY.
+-- Not replaced on re-run so the history survives redeployments.
+CREATE TABLE IF NOT EXISTS DASHBOARD_QUERY_PROFILE (
+    query_id VARCHAR(100),
+    query_tag VARCHAR(2000),
+    function_name VARCHAR(100),
+    dashboard_section VARCHAR(100),
+    started_at TIMESTAMP_NTZ, -- UTC
+    client_elapsed_ms NUMBER(18,3),
+    rows_returned NUMBER(18,0),
+    compilation_time_ms NUMBER(18,0),
+    execution_time_ms NUMBER(18,0),
+    queued_time_ms NUMBER(18,0), -- provisioning + repair + overload
+    bytes_scanned NUMBER(38,0),
+    warehouse_name VARCHAR(200),
+    recorded_timestamp TIMESTAMP_NTZ DEFAULT CURRENT_TIMESTAMP()
+)
+COMMENT = 'Per-query profile of the dashboard, for tying warehouse spend to features';
+
+-- Slowest and most expensive dashboard features
+CREATE OR REPLACE VIEW DASHBOARD_QUERY_COST AS
+SELECT 
+    function_name,
+    dashboard_section,
+    COUNT(*) AS query_count,
+    AVG(client_elapsed_ms) AS avg_client_elapsed_ms,
+    APPROX_PERCENTILE(execution_time_ms, 0.95) AS p95_execution_time_ms,
+    SUM(execution_time_ms) / 1000 AS total_execution_seconds,
+    SUM(queued_time_ms) / 1000 AS total_queued_seconds,
+    SUM(bytes_scanned) AS total_bytes_scanned
+FROM DASHBOARD_QUERY_PROFILE
+WHERE started_at >= DATEADD(day, -7, CURRENT_TIMESTAMP())
+GROUP BY function_name, dashboard_section;
+
+-- ============================================================================
+-- 7. GRANT PERMISSIONS
 -- ============================================================================
 
 GRANT SELECT ON VIEW STOCK_ALERTS TO ROLE STOCKPULSE_USER;
 GRANT SELECT ON VIEW STOCK_ALERTS TO ROLE STOCKPULSE_READONLY;
+GRANT INSERT ON TABLE DASHBOARD_QUERY_PROFILE TO ROLE STOCKPULSE_USER;
 GRANT SELECT ON ALL TABLES IN SCHEMA STOCKPULSE_AI.MONITORING TO ROLE STOCKPULSE_USER;
 GRANT SELECT ON ALL VIEWS IN SCHEMA STOCKPULSE_AI.MONITORING TO ROLE STOCKPULSE_USER;
 GRANT SELECT ON ALL TABLES IN SCHEMA STOCKPULSE_AI.MONITORING TO ROLE STOCKPULSE_READONLY;
@@ -152,5 +374,8 @@ GRANT SELECT ON ALL VIEWS IN SCHEMA STOCKPULSE_AI.MONITORING TO ROLE STOCKPULSE_
 -- 1. Streams track changes to source tables for incremental processing
 -- 2. STOCK_ALERTS view provides real-time alerts from Dynamic Tables
 -- 3. Alert history tables available for tracking and trending
--- 4. To add automated tasks, create them separately based on business needs
+-- 4. TSK_PROCESS_STOCK_ALERTS turns stream changes into NEW / ESCALATED /
+--    DOWNGRADED / RESOLVED rows in ALERT_NOTIFICATIONS and ALERT_HISTORY; the local
+--    stand-in runs the same diff (python -m stockpulse.local_backend DIR --keep --alerts all)
+-- 5. DASHBOARD_QUERY_PROFILE is filled by the app (STOCKPULSE_QUERY_PROFILE=snowflake)
 -- ============================================================================
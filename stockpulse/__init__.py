@@ -0,0 +1,6 @@
+"""
+StockPulse AI - Shared Python Modules
+=====================================
+Data access, ingestion and analytics helpers used by the Streamlit app
+and the command-line tools.
+"""
@@ -0,0 +1,182 @@
+"""
+StockPulse AI - Alert Rules
+===========================
+Days-to-stockout thresholds per item, location or category, persisted in
+one JSON file shared by every session, and evaluated against the health
+rows in a single vectorized pass:
+
+- each scope's rules are a lookup table joined on the row's item,
+  location or category (one take per categorical code, not one filter
+  per rule);
+- the most specific matching rule wins (item, then location, then
+  category), falling back to the default threshold;
+- a row alerts when its DAYS_UNTIL_STOCKOUT is at or below its threshold.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Scope -> health column, most specific first
+SCOPES = {
+    'item': 'ITEM_NAME',
+    'location': 'LOCATION_NAME',
+    'category': 'ITEM_CATEGORY',
+}
+
+DEFAULT_SCOPE = 'default'
+
+RULE_COLUMNS = ['SCOPE', 'VALUE', 'DAYS']
+
+
+def _empty_rules():
+    return pd.DataFrame({
+        'SCOPE': pd.Series(dtype=object),
+        'VALUE': pd.Series(dtype=object),
+        'DAYS': pd.Series(dtype=float),
+    })
+
+
+class AlertRuleStore:
+    """Alert rules kept in one JSON file, reloaded when another process changes it"""
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._rules = _empty_rules()
+        self._mtime = None
+    
+    def rules(self):
+        """Current rules as a SCOPE, VALUE, DAYS frame (one row per scope and value)"""
+        with self._lock:
+            self._reload()
+            return self._rules
+    
+    def upsert(self, rules):
+        """
+        Add or replace rules in one write
+        
+        Args:
+            rules: Frame (or records) with SCOPE, VALUE and DAYS; a rule
+                for an existing scope and value replaces it
+        
+        Returns:
+            Number of rules stored afterwards
+        """
+        
+        rules = pd.DataFrame(rules, columns=RULE_COLUMNS)
+        # Before the casts below, which would store a missing value as 'nan'
+        rules = rules[rules['VALUE'].notna()]
+        rules['SCOPE'] = rules['SCOPE'].astype(str).str.strip().str.lower()
+        rules['VALUE'] = rules['VALUE'].astype(str).str.strip()
+        rules['DAYS'] = pd.to_numeric(rules['DAYS'], errors='coerce')
+        unknown = sorted(set(rules['SCOPE']) - set(SCOPES))
+        if unknown:
+            raise ValueError(f"Unknown alert rule scope: {', '.join(unknown)}")
+        rules = rules[(rules['VALUE'] != '') & rules['DAYS'].notna()]
+        
+        with self._lock:
+            self._reload()
+            merged = pd.concat([self._rules, rules], ignore_index=True)
+            self._save(merged.drop_duplicates(['SCOPE', 'VALUE'], keep='last').reset_index(drop=True))
+            return len(self._rules)
+    
+    def add(self, scope, value, days):
+        """Add or replace one rule"""
+        return self.upsert([(scope, value, days)])
+    
+    def remove(self, scope, value):
+        """Delete one rule (no-op if absent); scope and value are normalized as upsert() does"""
+        scope = str(scope).strip().lower()
+        value = str(value).strip()
+        with self._lock:
+            self._reload()
+            keep = ~((self._rules['SCOPE'] == scope) & (self._rules['VALUE'] == value))
+            if not keep.all():
+                self._save(self._rules[keep].reset_index(drop=True))
+    
+    def clear(self):
+        """Delete every rule"""
+        with self._lock:
+            self._save(_empty_rules())
+    
+    def _reload(self):
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                records = json.load(f)
+        except (OSError, ValueError):
+            return
+        rules = pd.DataFrame(records, columns=['scope', 'value', 'days'])
+        rules.columns = RULE_COLUMNS
+        self._rules = rules.astype({'SCOPE': object, 'VALUE': object, 'DAYS': float}) if len(rules) else _empty_rules()
+        self._mtime = mtime
+    
+    def _save(self, rules):
+        """Write rules atomically (a reader never sees a partial file)"""
+        records = [
+            {'scope': scope, 'value': value, 'days': float(days)}
+            for scope, value, days in rules[RULE_COLUMNS].itertuples(index=False)
+        ]
+        tmp = self.path.with_name(f"{self.path.name}.{threading.get_ident()}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(records, f)
+        os.replace(tmp, self.path)
+        self._rules = rules
+        self._mtime = self.path.stat().st_mtime_ns
+
+
+def _lookup(column, table):
+    """Threshold of each row's value in table (NaN where no rule)"""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # Join the categories once, then take by code
+        per_category = np.append(table.reindex(column.cat.categories).to_numpy(dtype=float), np.nan)
+        return per_category[column.cat.codes.to_numpy()]
+    return column.map(table).to_numpy(dtype=float)
+
+
+def evaluate(health, rules, default_days=None):
+    """
+    Health rows at or below their alert threshold
+    
+    Args:
+        health: Rows with ITEM_NAME, LOCATION_NAME, ITEM_CATEGORY and
+            DAYS_UNTIL_STOCKOUT (get_stock_heatmap columns)
+        rules: SCOPE, VALUE, DAYS frame (AlertRuleStore.rules())
+        default_days: Threshold of rows no rule matches (None: no alert)
+    
+    Returns:
+        Matching rows plus THRESHOLD_DAYS and RULE_SCOPE, soonest
+        stockout first
+    """
+    
+    threshold = np.full(len(health), np.nan)
+    scope = np.full(len(health), DEFAULT_SCOPE, dtype=object)
+    for name, column in SCOPES.items():
+        table = rules.loc[rules['SCOPE'] == name].set_index('VALUE')['DAYS']
+        if table.empty:
+            continue
+        found = _lookup(health[column], table)
+        matched = np.isnan(threshold) & ~np.isnan(found)
+        threshold[matched] = found[matched]
+        scope[matched] = name
+    if default_days is not None:
+        threshold = np.where(np.isnan(threshold), default_days, threshold)
+    
+    days = health['DAYS_UNTIL_STOCKOUT'].to_numpy(dtype=float)
+    hit = days <= threshold
+    return (
+        health[hit]
+        .assign(THRESHOLD_DAYS=threshold[hit], RULE_SCOPE=scope[hit])
+        .sort_values('DAYS_UNTIL_STOCKOUT', kind='stable')
+    )
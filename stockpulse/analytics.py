@@ -0,0 +1,247 @@
+"""
+StockPulse AI - Dashboard Analytics
+===================================
+Pure pandas computations behind the Analytics, Cost Insights and Top
+Performers tabs. Inputs are never modified, so the app can cache results
+per data version and reuse the cached frames they were computed from.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+
+import pandas as pd
+
+CRITICAL_RISKS = ['CRITICAL', 'OUT_OF_STOCK']
+
+
+def with_numeric(df, columns):
+    """Copy of df with the given columns coerced to float (missing -> 0)"""
+    present = [col for col in columns if col in df.columns]
+    return df.assign(**{
+        col: pd.to_numeric(df[col], errors='coerce').fillna(0).astype(float) for col in present
+    })
+
+
+def sql_round(value, digits=2, divisor=1):
+    """ROUND(value / divisor, digits) as the warehouse computes it: exact division, half away from zero"""
+    quotient = Decimal(float(value)) / Decimal(int(divisor))
+    return float(quotient.quantize(Decimal(1).scaleb(-digits), rounding=ROUND_HALF_UP))
+
+
+def calculate_cost_savings(reorders_df):
+    """Calculate potential cost savings from optimized reordering"""
+    if reorders_df.empty:
+        return 0, 0, 0
+    
+    total_reorder_value = float(reorders_df['ESTIMATED_ORDER_VALUE'].sum())
+    # Assume 15% savings from bulk ordering and timing optimization
+    potential_savings = total_reorder_value * 0.15
+    # Estimate stockout cost prevention (avg $500 per stockout)
+    critical_items = len(reorders_df[reorders_df['IS_CRITICAL_ITEM'] == True])
+    stockout_prevention = float(critical_items * 500)
+    
+    return total_reorder_value, potential_savings, stockout_prevention
+
+
+def classify_velocity(avg_daily_issue):
+    """Fast / Normal / Slow mover label for each average daily issue"""
+    issue = pd.to_numeric(avg_daily_issue, errors='coerce').fillna(0)
+    labels = pd.Series('Slow Mover', index=issue.index)
+    labels[issue > 1] = 'Normal Mover'
+    labels[issue > 5] = 'Fast Mover'
+    return labels
+
+
+def velocity_analysis(heatmap):
+    """Fast/normal/slow mover counts and the top fast movers"""
+    frame = with_numeric(heatmap, ['AVG_DAILY_ISSUE'])
+    velocity = classify_velocity(frame['AVG_DAILY_ISSUE'])
+    
+    fast = frame[velocity == 'Fast Mover']
+    return {
+        'counts': velocity.value_counts(),
+        'fast_movers': fast.nlargest(5, 'AVG_DAILY_ISSUE')[['ITEM_NAME', 'LOCATION_NAME', 'AVG_DAILY_ISSUE']],
+        'slow_count': int((velocity == 'Slow Mover').sum()),
+        'total': len(frame),
+    }
+
+
+def cost_analysis(reorders, total_items=None):
+    """
+    ROI, spend and turnover figures for the Cost Insights tab
+    
+    Args:
+        reorders: Reorder recommendations
+        total_items: Item count from the executive summary (for turnover)
+    
+    Returns:
+        dict of scalar metrics
+    """
+    
+    total_value, savings, stockout_prevention = calculate_cost_savings(reorders)
+    critical_value = float(reorders.loc[reorders['IS_CRITICAL_ITEM'], 'ESTIMATED_ORDER_VALUE'].sum())
+    
+    turnover_rate = len(reorders) / total_items * 100 if total_items else 0
+    return {
+        'total_value': total_value,
+        'savings': savings,
+        'stockout_prevention': stockout_prevention,
+        'net_benefit': savings + stockout_prevention,
+        'roi_percentage': ((savings + stockout_prevention) / total_value * 100) if total_value > 0 else 0,
+        'avg_reorder': total_value / len(reorders) if len(reorders) > 0 else 0,
+        'critical_value': critical_value,
+        'top_category': reorders.groupby('ITEM_CATEGORY', observed=True)['ESTIMATED_ORDER_VALUE'].sum().idxmax() if len(reorders) else None,
+        'avg_daily_value': total_value / 30 if total_value > 0 else 0,
+        'turnover_rate': turnover_rate,
+        'efficiency_score': (100 - turnover_rate) if turnover_rate < 100 else 0,
+    }
+
+
+def transfer_plan(heatmap, limit=10):
+    """
+    Stock transfers from overstocked to critical locations of the same item
+    
+    Pairs every OVERSTOCK row with every CRITICAL/OUT_OF_STOCK row of the
+    same item and moves min(30% of the surplus, 14 days of consumption).
+    
+    Returns:
+        DataFrame with Item, From, To, Qty and Priority (at most limit rows)
+    """
+    
+    frame = with_numeric(heatmap, ['CURRENT_STOCK', 'AVG_DAILY_ISSUE'])
+    over = frame.loc[frame['RISK_CLASSIFICATION'] == 'OVERSTOCK', ['ITEM_NAME', 'LOCATION_NAME', 'CURRENT_STOCK']]
+    crit = frame.loc[
+        frame['RISK_CLASSIFICATION'].isin(CRITICAL_RISKS),
+        ['ITEM_NAME', 'LOCATION_NAME', 'AVG_DAILY_ISSUE', 'RISK_CLASSIFICATION']
+    ]
+    
+    pairs = over.merge(crit, on='ITEM_NAME', suffixes=('_FROM', '_TO'))
+    pairs = pairs.sort_values('ITEM_NAME', kind='stable')
+    quantity = (pairs['CURRENT_STOCK'] * 0.3).clip(upper=pairs['AVG_DAILY_ISSUE'] * 14)
+    pairs = pairs[quantity > 0].head(limit)
+    quantity = quantity[pairs.index]
+    
+    return pd.DataFrame({
+        'Item': pairs['ITEM_NAME'],
+        'From': pairs['LOCATION_NAME_FROM'],
+        'To': pairs['LOCATION_NAME_TO'],
+        'Qty': quantity.map(lambda qty: f"{qty:.0f}"),
+        'Priority': pairs['RISK_CLASSIFICATION'].map(lambda risk: 'High' if risk == 'OUT_OF_STOCK' else 'Medium')
+    }).reset_index(drop=True)
+
+
+def performers(items, locations, k=5, offset=0):
+    """
+    Top and bottom locations and items for the Top Performers tab
+    
+    Args:
+        items: RankingIndex of health rows grouped by RISK_CLASSIFICATION
+        locations: RankingIndex of location_rollup() rows
+        k: Entries per list
+        offset: Entries to skip (paging)
+    """
+    
+    return {
+        'top_locations': locations.top('AVG_HEALTH', k, offset),
+        'bottom_locations': locations.bottom('AVG_HEALTH', k, offset),
+        'top_items': items.top('STOCK_HEALTH_SCORE', k, offset, within='HEALTHY'),
+        'optimal_coverage': items.top('DAYS_OF_COVER', k, offset, between=(30, 90)),
+        'critical_items': items.bottom('STOCK_HEALTH_SCORE', k, offset, within=CRITICAL_RISKS),
+        'overstock': items.top('DAYS_OF_COVER', k, offset, within='OVERSTOCK'),
+    }
+
+
+def fleet_rates(cube):
+    """Fleet-wide rates from a StockCube"""
+    risk = cube.rollup('RISK_CLASSIFICATION')['COUNT']
+    total = cube.total()
+    items = total['COUNT'] or 1
+    critical_count = int(risk.reindex(CRITICAL_RISKS, fill_value=0).sum())
+    
+    return {
+        'healthy_pct': risk.get('HEALTHY', 0) / items * 100,
+        'critical_pct': critical_count / items * 100,
+        'avg_coverage': total['DAYS_OF_COVER_MEAN'],
+        'total_locations': cube.distinct('LOCATION_NAME'),
+        'critical_count': critical_count,
+    }
+
+
+def location_rollup(cube):
+    """Per-location comparison aggregates from a StockCube, indexed by LOCATION_NAME"""
+    totals = cube.rollup('LOCATION_NAME')
+    critical = cube.slice(critical=True).rollup('LOCATION_NAME')['COUNT']
+    return pd.DataFrame({
+        'TOTAL_ITEMS': totals['COUNT'],
+        'AVG_HEALTH': totals['STOCK_HEALTH_SCORE_MEAN'],
+        'AT_RISK': totals['REQUIRES_ATTENTION'],
+        'CRITICAL_ITEMS': critical.reindex(totals.index, fill_value=0),
+        'AVG_DAYS_COVER': totals['DAYS_OF_COVER_MEAN'],
+    })
+
+
+def compare_locations(rollup, locations):
+    """Rollup rows of the selected locations, healthiest first (index lookups only)"""
+    selected = rollup.loc[rollup.index.intersection(pd.Index(locations, name=rollup.index.name).unique())]
+    return selected.sort_values('AVG_HEALTH', ascending=False).reset_index()
+
+
+def smart_recommendations(cube):
+    """Rule-based action list for the AI Smart Recommendations panel, from a StockCube"""
+    risk = cube.rollup('RISK_CLASSIFICATION')['COUNT']
+    total = cube.total()
+    items = total['COUNT'] or 1
+    recommendations = []
+    
+    critical_rate = risk.reindex(CRITICAL_RISKS, fill_value=0).sum() / items
+    overstock_rate = risk.get('OVERSTOCK', 0) / items
+    
+    if critical_rate > 0.15:
+        recommendations.append({
+            'priority': '🔴 High',
+            'action': 'Increase Safety Stock',
+            'reason': f'{critical_rate*100:.1f}% items at risk',
+            'impact': 'Reduce stockout risk by 40%'
+        })
+    
+    if overstock_rate > 0.20:
+        recommendations.append({
+            'priority': '🟡 Medium',
+            'action': 'Optimize Reorder Quantities',
+            'reason': f'{overstock_rate*100:.1f}% items overstocked',
+            'impact': 'Free up $5K-10K in working capital'
+        })
+    
+    slow_movers = int(total['SLOW_MOVER'])
+    if slow_movers > 10:
+        recommendations.append({
+            'priority': '🟠 Low',
+            'action': 'Review Slow-Moving Items',
+            'reason': f'{slow_movers} slow movers identified',
+            'impact': 'Reduce holding costs by 15%'
+        })
+    
+    # Location-specific recommendations
+    location_health = cube.rollup('LOCATION_NAME')['STOCK_HEALTH_SCORE_MEAN']
+    worst_location = location_health.idxmin()
+    worst_score = location_health.min()
+    
+    if worst_score < 60:
+        recommendations.append({
+            'priority': '🔴 High',
+            'action': f'Priority Support for {worst_location}',
+            'reason': f'Health score: {worst_score:.1f}/100',
+            'impact': 'Improve overall system health by 8%'
+        })
+    
+    # Top performers to replicate
+    best_location = location_health.idxmax()
+    best_score = location_health.max()
+    
+    recommendations.append({
+        'priority': '⭐ Strategic',
+        'action': f'Replicate Best Practices from {best_location}',
+        'reason': f'Health score: {best_score:.1f}/100',
+        'impact': 'System-wide efficiency improvement'
+    })
+    
+    return recommendations
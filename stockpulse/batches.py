@@ -0,0 +1,90 @@
+"""
+StockPulse AI - Batched Fetch
+=============================
+Arrow-native path from a cursor to a typed frame:
+
+- result batches arrive as Arrow tables (the connector's
+  fetch_arrow_batches(), or fetchmany() chunks converted per column for
+  cursors without it) and stay columnar until a single decode at the end;
+- a listener registered by the calling thread is given the first decoded
+  batch and the running row count, so a page can render its first rows
+  while later batches are still arriving.
+"""
+
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import pyarrow as pa
+
+from stockpulse.schema import decode_arrow, empty_table
+
+# Rows per batch when the cursor has no Arrow batches of its own
+BATCH_ROWS = 50000
+
+# (thread id, callback) set by batch_progress()
+_listener = ContextVar('stockpulse_batch_listener', default=None)
+
+
+@contextmanager
+def batch_progress(callback):
+    """
+    Call callback(first_batch, rows_so_far) after each batch fetched in the block
+    
+    Only fetches run by the calling thread report; background refreshes
+    that inherit the context stay silent.
+    """
+    
+    token = _listener.set((threading.get_ident(), callback))
+    try:
+        yield
+    finally:
+        _listener.reset(token)
+
+
+def _rows_to_table(rows, columns):
+    return pa.Table.from_arrays([pa.array(values) for values in zip(*rows)], names=columns)
+
+
+def arrow_batches(cursor, batch_rows=BATCH_ROWS):
+    """Arrow tables of an executed cursor's result, in arrival order"""
+    fetch = getattr(cursor, 'fetch_arrow_batches', None)
+    if fetch is not None:
+        try:
+            batches = fetch()
+        except Exception:
+            # Result not in Arrow format (e.g. a JSON result set)
+            batches = None
+        if batches is not None:
+            yield from batches
+            return
+    
+    columns = [column[0] for column in cursor.description]
+    while True:
+        rows = cursor.fetchmany(batch_rows)
+        if not rows:
+            return
+        yield _rows_to_table(rows, columns)
+
+
+def fetch_frame(cursor, schema, batch_rows=BATCH_ROWS):
+    """Typed frame of an executed cursor's result, reporting batches to the listener"""
+    listener = _listener.get()
+    if listener is not None and listener[0] != threading.get_ident():
+        listener = None
+    
+    tables = []
+    rows = 0
+    first = None
+    for table in arrow_batches(cursor, batch_rows):
+        tables.append(table)
+        rows += table.num_rows
+        if listener is not None:
+            if first is None:
+                first = decode_arrow(table, schema)
+            listener[1](first, rows)
+    
+    if not tables:
+        return decode_arrow(empty_table([column[0] for column in cursor.description]), schema)
+    # Batches may type a column differently (e.g. narrower integers)
+    return decode_arrow(pa.concat_tables(tables, promote_options='permissive'), schema)
@@ -0,0 +1,224 @@
+"""
+StockPulse AI - Fetch Cache
+===========================
+Process-wide stale-while-revalidate cache with single-flight loading for
+warehouse fetches:
+
+- a fresh entry is returned as-is;
+- an expired entry is still returned immediately while one background
+  reload replaces it;
+- concurrent misses on the same key wait for a single load instead of
+  each running the query.
+
+Entries are registered by the function's qualified name, so the cache
+survives Streamlit re-executing the script (and redefining the function)
+on every rerun.
+"""
+
+import contextvars
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pandas as pd
+
+
+class _Entry:
+    __slots__ = ('value', 'loaded_at', 'loader', 'refreshing', 'retry_at')
+    
+    def __init__(self, value, loaded_at, loader):
+        self.value = value
+        self.loaded_at = loaded_at
+        self.loader = loader
+        self.refreshing = False
+        self.retry_at = 0.0
+
+
+class SWRCache:
+    """Stale-while-revalidate cache with single-flight loads"""
+    
+    def __init__(self, max_workers=4, max_entries=128):
+        self.max_entries = max_entries
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'coalesced': 0, 'refreshes': 0, 'errors': 0}
+        self._entries = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='stockpulse-swr')
+    
+    def get(self, namespace, key, loader, ttl, stale_ttl=None):
+        """Cached value for (namespace, key); see lookup()"""
+        return self.lookup(namespace, key, loader, ttl, stale_ttl)[0]
+    
+    def lookup(self, namespace, key, loader, ttl, stale_ttl=None):
+        """
+        Cached value for (namespace, key) and how it was obtained
+        
+        Args:
+            namespace: Owner of the entry (the function's qualified name)
+            key: Hashable arguments tuple
+            loader: Zero-argument callable producing the value
+            ttl: Seconds a value is fresh
+            stale_ttl: Seconds past ttl a value may still be served while
+                it is reloaded in the background (default 4 * ttl)
+        
+        Returns:
+            (value, status) where status is 'hit', 'stale', 'miss' (this
+            call ran the loader) or 'coalesced' (waited on another call's load)
+        """
+        
+        stale_ttl = 4 * ttl if stale_ttl is None else stale_ttl
+        now = time.time()
+        with self._lock:
+            entries = self._entries.setdefault(namespace, OrderedDict())
+            entry = entries.get(key)
+            if entry is not None:
+                age = now - entry.loaded_at
+                if age <= ttl:
+                    entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return entry.value, 'hit'
+                if age <= ttl + stale_ttl:
+                    entries.move_to_end(key)
+                    self.stats['stale_hits'] += 1
+                    if not entry.refreshing and now >= entry.retry_at:
+                        entry.refreshing = True
+                        # Carry the caller's context (e.g. the dashboard section tagging its queries)
+                        self._executor.submit(contextvars.copy_context().run, self._refresh, namespace, key, loader, ttl)
+                    return entry.value, 'stale'
+        
+        value, leader = self._load(namespace, key, loader)
+        return value, 'miss' if leader else 'coalesced'
+    
+    def refresh(self, namespace):
+        """
+        Reload every cached key of namespace in the calling thread
+        
+        Old values keep being served until their reload finishes, and a
+        failed reload leaves the old value in place.
+        
+        Returns:
+            Number of keys reloaded
+        """
+        
+        with self._lock:
+            loaders = [(key, entry.loader) for key, entry in self._entries.get(namespace, {}).items()]
+        for key, loader in loaders:
+            try:
+                self._load(namespace, key, loader, force=True)
+            except Exception:
+                # Keep serving the old value; the next expiry retries
+                pass
+        return len(loaders)
+    
+    def clear(self, namespace=None):
+        """Drop one namespace, or everything"""
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(namespace, None)
+    
+    def _load(self, namespace, key, loader, force=False):
+        # Single flight: the first caller loads, concurrent callers wait on its future
+        flight_key = (namespace, key)
+        with self._lock:
+            future = self._inflight.get(flight_key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[flight_key] = future
+                self.stats['refreshes' if force else 'misses'] += 1
+            else:
+                self.stats['coalesced'] += 1
+        
+        if not leader:
+            return future.result(), False
+        
+        try:
+            value = loader()
+        except Exception as e:
+            with self._lock:
+                self.stats['errors'] += 1
+                self._inflight.pop(flight_key, None)
+            future.set_exception(e)
+            raise
+        
+        with self._lock:
+            self._store(namespace, key, value, loader)
+            self._inflight.pop(flight_key, None)
+        future.set_result(value)
+        return value, True
+    
+    def _refresh(self, namespace, key, loader, ttl):
+        try:
+            self._load(namespace, key, loader, force=True)
+        except Exception:
+            with self._lock:
+                entry = self._entries.get(namespace, {}).get(key)
+                if entry is not None:
+                    entry.refreshing = False
+                    # Back off instead of retrying on every rerun
+                    entry.retry_at = time.time() + min(ttl, 30)
+    
+    def _store(self, namespace, key, value, loader):
+        entries = self._entries.setdefault(namespace, OrderedDict())
+        entries[key] = _Entry(value, time.time(), loader)
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+
+fetch_cache = SWRCache()
+
+
+def _freeze(value):
+    """Hashable stand-in for list/set/dict arguments"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+def call_key(fn, args, kwargs):
+    """Hashable cache key of a call; f() and f(None) match when None is the default"""
+    bound = inspect.signature(fn).bind(*args, **kwargs)
+    bound.apply_defaults()
+    return _freeze(tuple(bound.arguments.values()))
+
+
+def swr_cache(ttl, stale_ttl=None, cache=None):
+    """
+    Decorator caching a fetch function in the shared SWR cache
+    
+    The wrapper gains clear() (drop cached values), refresh() (reload
+    every cached argument combination now, keeping old values on error)
+    and lookup() (the call's (value, status), see SWRCache.lookup).
+    DataFrames are returned as shallow copies so callers can add columns
+    without touching the shared value.
+    """
+    
+    def decorate(fn):
+        store = cache or fetch_cache
+        namespace = f"{fn.__module__}.{fn.__qualname__}"
+        
+        def lookup(*args, **kwargs):
+            key = call_key(fn, args, kwargs)
+            value, status = store.lookup(namespace, key, lambda: fn(*args, **kwargs), ttl, stale_ttl)
+            return (value.copy(deep=False) if isinstance(value, pd.DataFrame) else value), status
+        
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return lookup(*args, **kwargs)[0]
+        
+        wrapper.lookup = lookup
+        wrapper.clear = lambda: store.clear(namespace)
+        wrapper.refresh = lambda: store.refresh(namespace)
+        return wrapper
+    
+    return decorate
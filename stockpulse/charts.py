@@ -0,0 +1,296 @@
+"""
+StockPulse AI - Chart Builders
+==============================
+Plotly figures for the dashboard, one dark/light theme helper, and a cache
+of serialized figure specs keyed by (chart id, filters, data version, theme)
+so unchanged charts are not rebuilt on every rerun.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.io as pio
+
+from stockpulse.analytics import classify_velocity
+from stockpulse.downsample import MAX_CATEGORIES, binned_histogram, lttb, top_n_other
+
+DARK_LAYOUT = dict(
+    template='plotly_dark',
+    paper_bgcolor='#1e293b',
+    plot_bgcolor='#1e293b',
+    font=dict(color='#e2e8f0')
+)
+
+RISK_COLORS = {
+    'OUT_OF_STOCK': '#1f2937',
+    'CRITICAL': '#dc2626',
+    'HIGH_RISK': '#f59e0b',
+    'MEDIUM_RISK': '#fbbf24',
+    'HEALTHY': '#10b981',
+    'OVERSTOCK': '#3b82f6',
+}
+
+VELOCITY_COLORS = {
+    'Fast Mover': '#10b981',
+    'Normal Mover': '#f59e0b',
+    'Slow Mover': '#ef4444'
+}
+
+
+def apply_theme(fig, dark, **layout):
+    """Apply the dashboard theme plus any chart-specific layout"""
+    if dark:
+        fig.update_layout(**DARK_LAYOUT, **layout)
+    elif layout:
+        fig.update_layout(**layout)
+    return fig
+
+
+# 1. Location comparison
+
+def location_health_bar(comparison, dark):
+    """Average health score per compared location"""
+    fig = px.bar(
+        comparison,
+        x='LOCATION_NAME',
+        y='AVG_HEALTH',
+        title="Average Health Score by Location",
+        color='AVG_HEALTH',
+        color_continuous_scale='RdYlGn',
+        text_auto='.1f'
+    )
+    return apply_theme(fig, dark, height=300)
+
+
+def location_risk_items_bar(comparison, dark):
+    """At-risk and critical item counts per compared location"""
+    fig = px.bar(
+        comparison,
+        x='LOCATION_NAME',
+        y=['AT_RISK', 'CRITICAL_ITEMS'],
+        title="Risk Items by Location",
+        barmode='group',
+        color_discrete_map={'AT_RISK': '#f59e0b', 'CRITICAL_ITEMS': '#dc2626'}
+    )
+    return apply_theme(fig, dark, height=300)
+
+
+# 2. Risk analytics
+
+def risk_pie(risk_counts, dark):
+    """Share of items in each risk classification (counts indexed by classification)"""
+    fig = px.pie(
+        values=risk_counts.values,
+        names=risk_counts.index,
+        title="📊 Stock Items by Risk Classification",
+        color=risk_counts.index,
+        color_discrete_map=RISK_COLORS,
+        hole=0.4
+    )
+    fig.update_traces(textposition='inside', textinfo='percent+label', textfont_size=12)
+    return apply_theme(fig, dark, height=400)
+
+
+def health_histogram(heatmap, dark):
+    """Distribution of stock health scores, binned before plotting"""
+    bins = binned_histogram(heatmap['STOCK_HEALTH_SCORE'], bins=20, value_range=(0, 100))
+    fig = px.bar(
+        bins,
+        x='BIN_MID',
+        y='COUNT',
+        title="📈 Health Score Distribution",
+        color_discrete_sequence=['#667eea'],
+        custom_data=['BIN_START', 'BIN_END']
+    )
+    fig.update_traces(
+        width=bins['BIN_WIDTH'].iloc[0],
+        hovertemplate="Health %{customdata[0]:.0f}-%{customdata[1]:.0f}<br>%{y} items<extra></extra>"
+    )
+    return apply_theme(
+        fig, dark,
+        xaxis_title="Health Score",
+        yaxis_title="Number of Items",
+        bargap=0,
+        height=400
+    )
+
+
+def risk_by_location_bar(location_risk, dark, max_locations=MAX_CATEGORIES):
+    """
+    Stacked risk classification counts for the busiest locations plus Other
+    
+    location_risk has LOCATION_NAME, RISK_CLASSIFICATION and count columns.
+    """
+    
+    location_risk = top_n_other(
+        location_risk, 'LOCATION_NAME', 'count', n=max_locations, series='RISK_CLASSIFICATION'
+    )
+    fig = px.bar(
+        location_risk,
+        x='LOCATION_NAME',
+        y='count',
+        color='RISK_CLASSIFICATION',
+        title="🏥 Risk Distribution by Location",
+        color_discrete_map=RISK_COLORS,
+        category_orders={'LOCATION_NAME': list(location_risk['LOCATION_NAME'].unique())},
+        barmode='stack'
+    )
+    return apply_theme(fig, dark, height=450, xaxis_tickangle=-45)
+
+
+def velocity_pie(heatmap, dark):
+    """Share of fast, normal and slow moving items"""
+    velocity_counts = classify_velocity(heatmap['AVG_DAILY_ISSUE']).value_counts()
+    fig = px.pie(
+        values=velocity_counts.values,
+        names=velocity_counts.index,
+        title="📊 Item Movement Distribution",
+        color=velocity_counts.index,
+        color_discrete_map=VELOCITY_COLORS,
+        hole=0.4
+    )
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    return apply_theme(fig, dark, height=350)
+
+
+def stock_projection_line(item_name, current_stock, daily_consumption, projection_days, dark):
+    """Linear stock projection for one item"""
+    days = np.arange(projection_days + 1)
+    projection = pd.DataFrame({
+        'DAY': days,
+        'STOCK': np.maximum(0, current_stock - daily_consumption * days)
+    })
+    projection = lttb(projection, 'DAY', 'STOCK')
+    fig = px.line(
+        x=projection['DAY'],
+        y=projection['STOCK'],
+        title=f"📊 {item_name} - Stock Projection",
+        labels={'x': 'Days from Now', 'y': 'Projected Stock Level'}
+    )
+    fig.add_hline(y=0, line_dash="dash", line_color="red", annotation_text="Stockout")
+    return apply_theme(fig, dark, height=350)
+
+
+# 3. Cost insights
+
+def category_cost_pie(reorders, dark):
+    """Reorder value split by category"""
+    category_costs = reorders.groupby('ITEM_CATEGORY', observed=True)['ESTIMATED_ORDER_VALUE'].sum().reset_index()
+    fig = px.pie(
+        category_costs,
+        values='ESTIMATED_ORDER_VALUE',
+        names='ITEM_CATEGORY',
+        title="Reorder Value by Category",
+        hole=0.4
+    )
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    return apply_theme(fig, dark)
+
+
+def location_cost_bar(reorders, dark, max_locations=MAX_CATEGORIES):
+    """Reorder value for the costliest locations plus Other"""
+    location_costs = top_n_other(reorders, 'LOCATION_NAME', 'ESTIMATED_ORDER_VALUE', n=max_locations)
+    fig = px.bar(
+        location_costs,
+        x='ESTIMATED_ORDER_VALUE',
+        y='LOCATION_NAME',
+        orientation='h',
+        title="Reorder Value by Location",
+        color='ESTIMATED_ORDER_VALUE',
+        color_continuous_scale='Blues',
+        # Largest at the top, Other at the bottom
+        category_orders={'LOCATION_NAME': list(location_costs['LOCATION_NAME'])[::-1]}
+    )
+    return apply_theme(fig, dark)
+
+
+# 4. Stock history
+
+FLOW_COLORS = {
+    'RECEIPTS': '#10b981',
+    'ISSUES': '#ef4444'
+}
+
+
+def stock_history_line(series, title, dark):
+    """Closing stock per period, with the period's lowest-highest range as a band"""
+    fig = px.line(
+        series,
+        x='PERIOD',
+        y='CLOSING_STOCK',
+        title=title,
+        labels={'PERIOD': 'Period', 'CLOSING_STOCK': 'Closing Stock'}
+    )
+    if (series['DAYS'] > 1).any():
+        fig.add_scatter(
+            x=series['PERIOD'], y=series['MAX_CLOSING_STOCK'],
+            mode='lines', line_width=0, showlegend=False, hoverinfo='skip'
+        )
+        fig.add_scatter(
+            x=series['PERIOD'], y=series['MIN_CLOSING_STOCK'],
+            mode='lines', line_width=0, fill='tonexty', fillcolor='rgba(102, 126, 234, 0.2)',
+            name='Lowest-highest', hoverinfo='skip'
+        )
+    return apply_theme(fig, dark, height=400)
+
+
+def stock_flows_bar(series, dark):
+    """Receipts and issues per period"""
+    flows = series.melt(id_vars='PERIOD', value_vars=list(FLOW_COLORS), var_name='FLOW', value_name='QUANTITY')
+    fig = px.bar(
+        flows,
+        x='PERIOD',
+        y='QUANTITY',
+        color='FLOW',
+        barmode='group',
+        title="📦 Receipts and Issues",
+        color_discrete_map=FLOW_COLORS,
+        labels={'PERIOD': 'Period', 'QUANTITY': 'Quantity', 'FLOW': ''}
+    )
+    return apply_theme(fig, dark, height=300)
+
+
+class FigureCache:
+    """Thread-safe LRU of serialized figure specs"""
+    
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._specs = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def figure(self, key, builder):
+        """
+        Figure for key, built with builder() only on a cache miss
+        
+        Args:
+            key: Hashable (chart id, filters, data version, theme) tuple
+            builder: Zero-argument callable returning a plotly Figure
+        
+        Returns:
+            A fresh plotly Figure the caller may modify
+        """
+        
+        with self._lock:
+            spec = self._specs.get(key)
+            if spec is not None:
+                self._specs.move_to_end(key)
+                self.hits += 1
+        if spec is not None:
+            return pio.from_json(spec, skip_invalid=True)
+        
+        fig = builder()
+        with self._lock:
+            self.misses += 1
+            self._specs[key] = pio.to_json(fig, validate=False)
+            while len(self._specs) > self.max_entries:
+                self._specs.popitem(last=False)
+        return fig
+    
+    def clear(self):
+        with self._lock:
+            self._specs.clear()
@@ -0,0 +1,236 @@
+"""
+StockPulse AI - Stock Cube
+==========================
+Additive aggregates of one health snapshot over (location, category,
+risk, is_critical). Each cell holds the row count plus the sum, sum of
+squares and non-null count of every measure, the count of every
+indicator and the set of items present, so any slice, roll-up or
+drill-down is a re-sum of cells: O(cells), never O(rows), and the same
+numbers in every tab.
+"""
+
+from functools import reduce
+from operator import or_
+
+import numpy as np
+import pandas as pd
+
+from stockpulse.analytics import sql_round
+
+DIMENSIONS = ['LOCATION_NAME', 'ITEM_CATEGORY', 'RISK_CLASSIFICATION', 'IS_CRITICAL_ITEM']
+
+# Measures get _SUM, _SQ and _N cells, and _MEAN / _STD in roll-ups
+MEASURES = ['STOCK_HEALTH_SCORE', 'DAYS_OF_COVER', 'CURRENT_STOCK', 'AVG_DAILY_ISSUE']
+
+# Indicators are counted (rows where the flag is true)
+INDICATORS = ['REQUIRES_ATTENTION', 'SLOW_MOVER']
+
+# Average daily issue below which an item counts as a slow mover
+SLOW_MOVER_ISSUE = 0.5
+
+# slice() keyword -> dimension
+SLICE_DIMENSIONS = {
+    'location': 'LOCATION_NAME',
+    'category': 'ITEM_CATEGORY',
+    'risk': 'RISK_CLASSIFICATION',
+    'critical': 'IS_CRITICAL_ITEM',
+}
+
+# DT_EXECUTIVE_SUMMARY risk buckets
+SUMMARY_COUNTS = {
+    'OUT_OF_STOCK_COUNT': ['OUT_OF_STOCK'],
+    'CRITICAL_COUNT': ['CRITICAL'],
+    'HIGH_RISK_COUNT': ['HIGH_RISK'],
+    'MEDIUM_RISK_COUNT': ['MEDIUM_RISK'],
+    'HEALTHY_COUNT': ['HEALTHY'],
+    'OVERSTOCK_COUNT': ['OVERSTOCK', 'SLOW_MOVING'],
+}
+ATTENTION_RISKS = ['OUT_OF_STOCK', 'CRITICAL', 'HIGH_RISK']
+AT_RISK_RISKS = ['OUT_OF_STOCK', 'CRITICAL']
+
+
+def _flag(series):
+    return series.fillna(False).astype(bool)
+
+
+def _cell_values():
+    return (
+        ['COUNT']
+        + [f"{measure}_{part}" for measure in MEASURES for part in ('SUM', 'SQ', 'N')]
+        + INDICATORS
+    )
+
+
+class StockCube:
+    """Immutable cube of additive cells; slices share nothing mutable with it"""
+    
+    def __init__(self, cells, item_sets):
+        """
+        Args:
+            cells: DIMENSIONS plus additive value columns, one row per cell
+            item_sets: Per cell (same index), bitmask of the items present
+        """
+        
+        self.cells = cells
+        self.item_sets = item_sets
+        self.values = [column for column in cells.columns if column not in DIMENSIONS]
+        self._arrays = {column: cells[column].to_numpy() for column in cells.columns}
+        self._summaries = {}
+    
+    @classmethod
+    def from_heatmap(cls, heatmap):
+        """Build the cells from heatmap rows (get_stock_heatmap columns) in one group-by"""
+        if heatmap.empty:
+            return cls.empty()
+        values = {'COUNT': np.ones(len(heatmap), dtype=np.int64)}
+        for measure in MEASURES:
+            # NULLs are skipped, as AVG() skips them
+            column = pd.to_numeric(heatmap[measure], errors='coerce').to_numpy(dtype=float)
+            present = ~np.isnan(column)
+            column = np.where(present, column, 0.0)
+            values[f"{measure}_SUM"] = column
+            values[f"{measure}_SQ"] = column ** 2
+            values[f"{measure}_N"] = present.astype(np.int64)
+        values['REQUIRES_ATTENTION'] = _flag(heatmap['REQUIRES_ATTENTION']).astype(np.int64).to_numpy()
+        issue = pd.to_numeric(heatmap['AVG_DAILY_ISSUE'], errors='coerce').fillna(0)
+        values['SLOW_MOVER'] = (issue < SLOW_MOVER_ISSUE).astype(np.int64).to_numpy()
+        
+        keys = heatmap[DIMENSIONS].assign(IS_CRITICAL_ITEM=_flag(heatmap['IS_CRITICAL_ITEM']))
+        grouped = pd.concat([keys, pd.DataFrame(values, index=heatmap.index)], axis=1).groupby(
+            DIMENSIONS, dropna=False, sort=False, observed=True
+        )
+        cells = grouped.sum().reset_index()
+        
+        # Items present per cell as bitmasks, so distinct counts of any
+        # slice are an OR of its cells
+        items = heatmap['ITEM_NAME'].factorize()[0].astype(np.int64)
+        width = int(items.max()) + 1
+        item_sets = [0] * len(cells)
+        for pair in np.unique(grouped.ngroup().to_numpy() * width + items):
+            item_sets[pair // width] |= 1 << int(pair % width)
+        return cls(cells, pd.Series(item_sets, index=cells.index, dtype=object))
+    
+    @classmethod
+    def empty(cls):
+        """Cube without cells (failed or empty fetch)"""
+        cells = pd.DataFrame(
+            {**{column: pd.Series(dtype=object) for column in DIMENSIONS},
+             **{column: pd.Series(dtype=float) for column in _cell_values()}}
+        )
+        return cls(cells, pd.Series(dtype=object))
+    
+    def __len__(self):
+        return len(self.cells)
+    
+    def slice(self, location=None, category=None, risk=None, critical=None):
+        """
+        Sub-cube of the cells matching every given filter
+        
+        Each filter is a value or a list of values; None leaves that
+        dimension open (the dashboard's "All").
+        """
+        
+        mask = self._mask(location=location, category=category, risk=risk, critical=critical)
+        return StockCube(self.cells[mask], self.item_sets[mask])
+    
+    def _mask(self, **filters):
+        mask = np.ones(len(self.cells), dtype=bool)
+        for name, value in filters.items():
+            if value is None:
+                continue
+            column = self._arrays[SLICE_DIMENSIONS[name]]
+            if isinstance(value, (list, tuple, set)):
+                mask &= np.isin(column, list(value))
+            else:
+                mask &= column == value
+        return mask
+    
+    def rollup(self, *dimensions):
+        """
+        Totals grouped by the given dimensions (none: one grand-total row)
+        
+        Returns:
+            DataFrame indexed by the dimensions with COUNT, the indicator
+            counts and <MEASURE>_SUM / _N / _MEAN / _STD for every measure
+        """
+        
+        if dimensions:
+            totals = self.cells.groupby(list(dimensions), sort=False, observed=True)[self.values].sum()
+        else:
+            totals = self.cells[self.values].sum().to_frame().T
+        
+        for measure in MEASURES:
+            count = totals[f"{measure}_N"].astype(float)
+            count = count.where(count > 0)
+            mean = totals[f"{measure}_SUM"] / count
+            # Sample variance from the additive sums
+            variance = (totals[f"{measure}_SQ"] - count * mean ** 2) / (count - 1).where(count > 1)
+            totals[f"{measure}_MEAN"] = mean
+            totals[f"{measure}_STD"] = np.sqrt(variance.clip(lower=0))
+        return totals.drop(columns=[f"{measure}_SQ" for measure in MEASURES])
+    
+    def total(self):
+        """Grand totals of this (sub-)cube as a Series"""
+        return self.rollup().iloc[0]
+    
+    def counts(self, dimension):
+        """Row count per value of one dimension, largest first"""
+        return self.rollup(dimension)['COUNT'].sort_values(ascending=False)
+    
+    def distinct(self, dimension):
+        """Number of distinct values of a dimension with at least one row"""
+        return int(self.cells.loc[self.cells['COUNT'] > 0, dimension].nunique())
+    
+    def distinct_items(self):
+        """Number of distinct items with at least one row"""
+        return reduce(or_, self.item_sets, 0).bit_count()
+    
+    def summary(self, location=None, category=None, risk=None):
+        """
+        DT_EXECUTIVE_SUMMARY metrics of one filter, memoized per filter
+        
+        Counts are exact and percentages and averages are rounded half
+        away from zero to 2 decimals, as ROUND() does in the DT, so the
+        unfiltered result equals the DT row.
+        
+        TOTAL_LOCATIONS and TOTAL_ITEMS count distinct names, since the
+        heatmap rows carry no codes, where the DT counts location_code and
+        item_code. They agree as long as each name belongs to one code in
+        the master tables; a name shared by two codes is counted once here.
+        """
+        
+        key = (location, category, risk)
+        if key not in self._summaries:
+            self._summaries[key] = self._summarize(self._mask(location=location, category=category, risk=risk))
+        return self._summaries[key]
+    
+    def _summarize(self, mask):
+        """DT_EXECUTIVE_SUMMARY columns (bar DATA_AS_OF_DATE) of the masked cells, in numpy"""
+        arrays = {column: values[mask] for column, values in self._arrays.items()}
+        count = arrays['COUNT'].astype(np.int64)
+        risk = arrays['RISK_CLASSIFICATION']
+        rows = int(count.sum())
+        
+        def risk_count(classes):
+            return int(count[np.isin(risk, classes)].sum())
+        
+        def pct(value):
+            return sql_round(value * 100, 2, rows) if rows else None
+        
+        def avg(measure):
+            present = int(arrays[f"{measure}_N"].sum())
+            return sql_round(arrays[f"{measure}_SUM"].sum(), 2, present) if present else None
+        
+        counts = {column: risk_count(classes) for column, classes in SUMMARY_COUNTS.items()}
+        critical = arrays['IS_CRITICAL_ITEM'].astype(bool) & np.isin(risk, AT_RISK_RISKS)
+        return {
+            'TOTAL_LOCATIONS': len(set(arrays['LOCATION_NAME'][count > 0])),
+            'TOTAL_ITEMS': reduce(or_, self.item_sets.to_numpy()[mask], 0).bit_count(),
+            'TOTAL_LOCATION_ITEM_COMBINATIONS': rows,
+            **counts,
+            'PCT_REQUIRING_ATTENTION': pct(risk_count(ATTENTION_RISKS)),
+            'PCT_HEALTHY': pct(counts['HEALTHY_COUNT']),
+            'AVG_STOCK_HEALTH_SCORE': avg('STOCK_HEALTH_SCORE'),
+            'AVG_DAYS_OF_COVER': avg('DAYS_OF_COVER'),
+            'CRITICAL_ITEMS_AT_RISK': int(count[critical].sum()),
+        }
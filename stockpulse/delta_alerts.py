@@ -0,0 +1,128 @@
+"""
+StockPulse AI - Delta Alerts
+============================
+Alert events from re-scored (location, item) rows: only the pairs that
+changed since the last run are classified and compared with their open
+alert, so the work scales with ingestion rather than inventory size.
+
+- NEW: actionable now, no open alert
+- ESCALATED: actionable and more urgent than the open alert, which it
+  supersedes
+- DOWNGRADED: actionable with another, less urgent type than the open
+  alert, which it supersedes (e.g. STOCK_OUT -> OVERSTOCK after a receipt)
+- RESOLVED: an open alert whose pair is no longer actionable
+
+Classification mirrors the MONITORING.STOCK_ALERTS view; the warehouse
+runs the same diff in PROCESS_STOCK_ALERTS (05_streams_and_tasks.sql).
+"""
+
+import numpy as np
+
+KEYS = ['LOCATION_CODE', 'ITEM_CODE']
+
+# Risk classification -> alert type, for actionable rows
+ALERT_TYPES = {
+    'OUT_OF_STOCK': 'STOCK_OUT',
+    'CRITICAL': 'CRITICAL_LOW',
+    'HIGH_RISK': 'HIGH_RISK',
+    'OVERSTOCK': 'OVERSTOCK',
+}
+
+# Lower is more urgent; a move to a lower rank is an escalation
+ALERT_TYPE_RANK = {'STOCK_OUT': 1, 'CRITICAL_LOW': 2, 'HIGH_RISK': 3, 'OVERSTOCK': 4}
+
+# Overstock alerts only once stock exceeds this many days of average issue
+OVERSTOCK_ALERT_DAYS = 90
+
+NEW = 'NEW'
+ESCALATED = 'ESCALATED'
+DOWNGRADED = 'DOWNGRADED'
+RESOLVED = 'RESOLVED'
+
+EVENTS = [NEW, ESCALATED, DOWNGRADED, RESOLVED]
+
+
+def classify(health):
+    """
+    STOCK_ALERTS columns for health rows (DT_STOCK_HEALTH_CLASSIFICATION columns)
+    
+    Returns:
+        health plus ALERT_TYPE (None when not actionable), SEVERITY,
+        RECOMMENDED_ACTION and ALERT_MESSAGE
+    """
+    
+    risk = health['RISK_CLASSIFICATION']
+    stock = health['CLOSING_STOCK'].astype(float)
+    overstock = (risk == 'OVERSTOCK') & (stock > health['AVG_DAILY_ISSUE'].astype(float) * OVERSTOCK_ALERT_DAYS)
+    actionable = risk.isin(['OUT_OF_STOCK', 'CRITICAL', 'HIGH_RISK']) | overstock
+    alert_type = risk.map(ALERT_TYPES).where(actionable, None)
+    
+    severity = np.select(
+        [risk == 'OUT_OF_STOCK', (risk == 'CRITICAL') | health['IS_CRITICAL_ITEM'].astype(bool),
+         risk == 'HIGH_RISK', risk == 'MEDIUM_RISK'],
+        ['CRITICAL', 'CRITICAL', 'HIGH', 'MEDIUM'],
+        'LOW',
+    )
+    
+    days = health['DAYS_UNTIL_STOCKOUT'].astype('Int64').astype(str)
+    item_at = health['ITEM_NAME'] + ' at ' + health['LOCATION_NAME']
+    action = np.select(
+        [risk == 'OUT_OF_STOCK', health['DAYS_UNTIL_STOCKOUT'] <= health['LEAD_TIME_DAYS'], risk == 'OVERSTOCK'],
+        ['URGENT: Place emergency order immediately',
+         'Place order today - stock-out expected in ' + days + ' days',
+         'Review for redistribution or reduced ordering'],
+        'Monitor stock levels and plan replenishment',
+    )
+    message = np.select(
+        [risk == 'OUT_OF_STOCK', risk == 'CRITICAL', risk == 'HIGH_RISK', risk == 'OVERSTOCK'],
+        [health['ITEM_NAME'] + ' is OUT OF STOCK at ' + health['LOCATION_NAME'] + '. Immediate action required.',
+         item_at + ' will run out in ' + days + ' days. Current stock: ' + stock.round(2).astype(str)
+         + ' ' + health['UNIT_OF_MEASURE'].fillna('UNITS'),
+         item_at + ' requires reorder. ' + days + ' days of supply remaining.',
+         item_at + ' has not moved in ' + health['DAYS_SINCE_LAST_MOVEMENT'].astype('Int64').astype(str)
+         + ' days. Consider redistribution.'],
+        item_at + ' approaching reorder point.',
+    )
+    
+    return health.assign(
+        ALERT_TYPE=alert_type,
+        SEVERITY=severity,
+        RECOMMENDED_ACTION=action,
+        ALERT_MESSAGE=message,
+    )
+
+
+def diff(rescored, open_alerts):
+    """
+    Alert events of re-scored pairs against their open alerts
+    
+    Args:
+        rescored: classify() output for the changed pairs
+        open_alerts: Open (unresolved) alerts with KEYS, ALERT_ID and
+            ALERT_TYPE; pairs outside rescored are ignored
+    
+    Returns:
+        Rows of rescored that changed state, with EVENT and the
+        OPEN_ALERT_ID they resolve or supersede (NaN for NEW)
+    """
+    
+    current = open_alerts[KEYS + ['ALERT_ID', 'ALERT_TYPE']].rename(
+        columns={'ALERT_ID': 'OPEN_ALERT_ID', 'ALERT_TYPE': 'OPEN_ALERT_TYPE'}
+    )
+    merged = rescored.merge(current, on=KEYS, how='left')
+    
+    actionable = merged['ALERT_TYPE'].notna()
+    is_open = merged['OPEN_ALERT_ID'].notna()
+    rank = merged['ALERT_TYPE'].map(ALERT_TYPE_RANK)
+    open_rank = merged['OPEN_ALERT_TYPE'].map(ALERT_TYPE_RANK)
+    event = np.select(
+        [
+            actionable & ~is_open,
+            actionable & is_open & (rank < open_rank),
+            actionable & is_open & (rank > open_rank),
+            ~actionable & is_open,
+        ],
+        [NEW, ESCALATED, DOWNGRADED, RESOLVED],
+        '',
+    )
+    return merged.assign(EVENT=event)[event != ''].reset_index(drop=True)
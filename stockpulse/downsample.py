@@ -0,0 +1,125 @@
+"""
+StockPulse AI - Chart Data Reduction
+====================================
+Shrinks chart inputs before they reach Plotly so the payload sent to the
+browser stays bounded however large the fleet grows: pre-binned
+histograms, top-N plus "Other" bucketing for category axes, and
+Largest-Triangle-Three-Buckets (LTTB) downsampling for time series.
+"""
+
+import numpy as np
+import pandas as pd
+
+MAX_CATEGORIES = 30
+MAX_POINTS = 500
+
+
+def binned_histogram(values, bins=20, value_range=None):
+    """
+    Histogram counts computed server-side
+    
+    Args:
+        values: Numeric series (non-numeric and missing values are dropped)
+        bins: Number of equal-width bins
+        value_range: (low, high); defaults to the data range
+    
+    Returns:
+        DataFrame with BIN_START, BIN_END, BIN_MID, BIN_WIDTH and COUNT
+    """
+    
+    data = pd.to_numeric(pd.Series(values), errors='coerce').dropna().to_numpy(dtype=float)
+    if value_range is None:
+        value_range = (data.min(), data.max()) if len(data) else (0.0, 1.0)
+    low, high = value_range
+    if high <= low:
+        high = low + 1.0
+    
+    counts, edges = np.histogram(np.clip(data, low, high), bins=bins, range=(low, high))
+    return pd.DataFrame({
+        'BIN_START': edges[:-1],
+        'BIN_END': edges[1:],
+        'BIN_MID': (edges[:-1] + edges[1:]) / 2,
+        'BIN_WIDTH': np.diff(edges),
+        'COUNT': counts
+    })
+
+
+def top_n_other(df, category, value, n=MAX_CATEGORIES, series=None, other_label='Other'):
+    """
+    Keep the n largest categories and fold the rest into one bucket
+    
+    Args:
+        df: Long-format frame to reduce
+        category: Axis column (e.g. LOCATION_NAME)
+        value: Numeric column summed to rank and aggregate categories
+        n: Number of categories kept as-is
+        series: Optional second key kept separate inside the bucket
+            (e.g. RISK_CLASSIFICATION for a stacked bar)
+        other_label: Name of the bucket; the folded count is appended
+    
+    Returns:
+        Frame with at most n + 1 distinct categories, ordered by total
+    """
+    
+    keys = [category] + ([series] if series else [])
+    totals = df.groupby(category, observed=True)[value].sum().sort_values(ascending=False)
+    if len(totals) <= n:
+        ordered = df.groupby(keys, observed=True, as_index=False)[value].sum()
+        order = {name: i for i, name in enumerate(totals.index)}
+        return ordered.sort_values(category, key=lambda col: col.map(order), kind='stable').reset_index(drop=True)
+    
+    keep = totals.index[:n]
+    label = f"{other_label} ({len(totals) - n} more)"
+    # As objects, so the bucket label can join a categorical axis
+    bucketed = df.assign(**{category: df[category].astype(object).where(df[category].isin(keep), label)})
+    reduced = bucketed.groupby(keys, observed=True, as_index=False)[value].sum()
+    order = {name: i for i, name in enumerate(list(keep) + [label])}
+    return reduced.sort_values(category, key=lambda col: col.map(order), kind='stable').reset_index(drop=True)
+
+
+def lttb_indices(x, y, threshold=MAX_POINTS):
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets
+    
+    The first and last points are always kept; every bucket in between
+    contributes the point forming the largest triangle with the previous
+    selection and the average of the next bucket.
+    """
+    
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    length = len(x)
+    if threshold >= length or threshold < 3:
+        return np.arange(length)
+    
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = length - 1
+    edges = np.linspace(1, length - 1, threshold - 1).astype(np.int64)
+    
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], (edges[i + 2] if i + 2 < len(edges) else length)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def lttb(df, x, y, threshold=MAX_POINTS):
+    """Downsample a time-ordered frame to at most threshold rows with LTTB"""
+    if len(df) <= threshold:
+        return df
+    ordered = df.sort_values(x)
+    x_values = ordered[x]
+    if pd.api.types.is_datetime64_any_dtype(x_values):
+        x_values = x_values.astype('int64')
+    indices = lttb_indices(x_values.to_numpy(), pd.to_numeric(ordered[y], errors='coerce').fillna(0).to_numpy(), threshold)
+    return ordered.iloc[indices]
@@ -0,0 +1,162 @@
+"""
+StockPulse AI - Export Builders
+===============================
+Chunked serialization of dashboard tables to gzip-CSV, Parquet and XLSX,
+plus a process-wide cache so each (dataset, filter, data version, format)
+is serialized at most once.
+"""
+
+import gzip
+import io
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# format key -> (label, file extension, MIME type)
+EXPORT_FORMATS = {
+    'csv.gz': ('CSV (gzip)', 'csv.gz', 'application/gzip'),
+    'parquet': ('Parquet', 'parquet', 'application/vnd.apache.parquet'),
+    'xlsx': ('Excel', 'xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+
+CHUNK_ROWS = 50_000
+
+
+def prepare_export_frame(df: pd.DataFrame, round_columns=None) -> pd.DataFrame:
+    """Round numeric columns to 2 decimals (avoids ### in Excel) without touching df"""
+    columns = [
+        col for col in (round_columns or [])
+        if col in df.columns and pd.api.types.is_numeric_dtype(df[col])
+    ]
+    if not columns:
+        return df
+    return df.assign(**{col: df[col].round(2) for col in columns})
+
+
+def iter_chunks(df: pd.DataFrame, chunk_rows=CHUNK_ROWS):
+    """Yield consecutive row blocks of df"""
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def to_gzip_csv(df: pd.DataFrame, index=False, chunk_rows=CHUNK_ROWS) -> bytes:
+    """Serialize df as gzip-compressed CSV, one block at a time"""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode='wb', mtime=0) as gz:
+        with io.TextIOWrapper(gz, encoding='utf-8', newline='') as text:
+            for i, chunk in enumerate(iter_chunks(df, chunk_rows)):
+                chunk.to_csv(text, index=index, header=(i == 0))
+    return buffer.getvalue()
+
+
+def to_parquet(df: pd.DataFrame, index=False, chunk_rows=CHUNK_ROWS) -> bytes:
+    """Serialize df as zstd Parquet with one row group per block"""
+    buffer = io.BytesIO()
+    writer = None
+    for chunk in iter_chunks(df, chunk_rows):
+        table = pa.Table.from_pandas(chunk, preserve_index=index)
+        if writer is None:
+            writer = pq.ParquetWriter(buffer, table.schema, compression='zstd')
+        writer.write_table(table)
+    writer.close()
+    return buffer.getvalue()
+
+
+def write_sheet(workbook, df: pd.DataFrame, title, index=False, chunk_rows=CHUNK_ROWS):
+    """Append df as a sheet of a write-only openpyxl workbook"""
+    sheet = workbook.create_sheet(title=title[:31])
+    frame = df.reset_index() if index else df
+    sheet.append([str(col) for col in frame.columns])
+    for chunk in iter_chunks(frame, chunk_rows):
+        for row in chunk.itertuples(index=False, name=None):
+            sheet.append([None if pd.isna(value) else value for value in row])
+    return sheet
+
+
+def to_xlsx(df: pd.DataFrame, index=False, sheet_name='Data', chunk_rows=CHUNK_ROWS) -> bytes:
+    """Serialize df as a streamed (write-only) Excel workbook"""
+    from openpyxl import Workbook
+    
+    workbook = Workbook(write_only=True)
+    write_sheet(workbook, df, sheet_name, index=index, chunk_rows=chunk_rows)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def build_export(df: pd.DataFrame, fmt, round_columns=None, index=False) -> bytes:
+    """
+    Serialize a table in one of EXPORT_FORMATS
+    
+    Args:
+        df: Table to export
+        fmt: Key of EXPORT_FORMATS
+        round_columns: Numeric columns rounded to 2 decimals first
+        index: Include the index as a column
+    
+    Returns:
+        File contents
+    """
+    
+    frame = prepare_export_frame(df, round_columns)
+    if fmt == 'csv.gz':
+        return to_gzip_csv(frame, index=index)
+    if fmt == 'parquet':
+        return to_parquet(frame, index=index)
+    if fmt == 'xlsx':
+        return to_xlsx(frame, index=index)
+    raise ValueError(f"Unknown export format: {fmt}")
+
+
+class ExportCache:
+    """Thread-safe LRU of built files, bounded by total size"""
+    
+    def __init__(self, max_bytes=256 * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._building = {}
+    
+    def get_or_build(self, key, builder):
+        """Return cached bytes for key, building them once if needed"""
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+            key_lock = self._building.setdefault(key, threading.Lock())
+        
+        # Concurrent requests for the same key wait for a single build
+        try:
+            with key_lock:
+                with self._lock:
+                    if key in self._items:
+                        self._items.move_to_end(key)
+                        return self._items[key]
+                data = builder()
+                with self._lock:
+                    self._store(key, data)
+                return data
+        finally:
+            # Also after a failed build or a cache hit on the re-check; a
+            # newer lock registered for the key is left alone
+            with self._lock:
+                if self._building.get(key) is key_lock:
+                    del self._building[key]
+    
+    def _store(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        self._items[key] = data
+        self._size += len(data)
+        while self._size > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self._size -= len(evicted)
+    
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._size = 0
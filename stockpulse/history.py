@@ -0,0 +1,86 @@
+"""
+StockPulse AI - Stock History
+=============================
+Range and resolution helpers for the History tab. The warehouse sums the
+selected DAILY_STOCK_RAW rows per day and buckets the days with
+DATE_TRUNC, so a fetched series has one row per period however many
+location-item rows feed it:
+
+- day, week or month grains, the finest one keeping a range under
+  MAX_POINTS;
+- LTTB over the daily series for long ranges whose spikes must survive,
+  with flows summed over the days each kept point stands for.
+
+A fetched series covers the whole history of its selection, so changing
+the range re-slices the cached series instead of querying again.
+"""
+
+import numpy as np
+import pandas as pd
+
+from stockpulse.downsample import MAX_POINTS, lttb_indices
+
+# DATE_TRUNC part -> average days per period, finest first
+GRAINS = {'day': 1, 'week': 7, 'month': 30.44}
+
+# Range label -> days back from the latest record (None: all history)
+RANGES = {
+    '90 days': 90,
+    '6 months': 182,
+    '1 year': 365,
+    '2 years': 730,
+    '5 years': 1826,
+    'All': None,
+}
+
+# Summed over the days a period (or kept LTTB point) covers
+FLOWS = ['ISSUES', 'RECEIPTS']
+
+
+def truncate(grain, value):
+    """Start of the period containing value, as DATE_TRUNC (weeks start on Monday)"""
+    value = pd.Timestamp(value).normalize()
+    if grain == 'week':
+        return value - pd.Timedelta(days=value.weekday())
+    if grain == 'month':
+        return value.replace(day=1)
+    return value
+
+
+def choose_grain(days, max_points=MAX_POINTS):
+    """Finest grain giving at most max_points periods over days"""
+    for grain, width in GRAINS.items():
+        if days / width <= max_points:
+            return grain
+    return 'month'
+
+
+def select_range(series, grain, days):
+    """Periods of a series overlapping the days up to its latest period"""
+    if days is None or series.empty:
+        return series
+    start = truncate(grain, series['PERIOD'].max() - pd.Timedelta(days=days - 1))
+    return series[series['PERIOD'] >= start]
+
+
+def downsample_daily(daily, threshold=MAX_POINTS):
+    """
+    Daily series reduced to threshold points with LTTB on CLOSING_STOCK
+    
+    Each kept point stands for the days up to the next one: its flows
+    are their sums and its MIN/MAX_CLOSING_STOCK their range, so totals
+    and stockouts survive the reduction.
+    """
+    
+    if len(daily) <= threshold:
+        return daily
+    closing = daily['CLOSING_STOCK'].to_numpy(dtype=float)
+    keep = lttb_indices(daily['PERIOD'].to_numpy().astype('datetime64[ns]').astype(np.int64), np.nan_to_num(closing), threshold)
+    
+    reduced = daily.iloc[keep].copy()
+    for column in FLOWS:
+        reduced[column] = np.add.reduceat(daily[column].to_numpy(dtype=float), keep)
+    reduced['MIN_CLOSING_STOCK'] = np.fmin.reduceat(daily['MIN_CLOSING_STOCK'].to_numpy(dtype=float), keep)
+    reduced['MAX_CLOSING_STOCK'] = np.fmax.reduceat(daily['MAX_CLOSING_STOCK'].to_numpy(dtype=float), keep)
+    reduced['DAYS'] = np.add.reduceat(daily['DAYS'].to_numpy(), keep)
+    return reduced
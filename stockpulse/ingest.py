@@ -0,0 +1,367 @@
+"""
+StockPulse AI - Bulk Ingestion
+==============================
+Loads a daily stock extract into DATA.DAILY_STOCK_RAW:
+
+    validate -> write compressed Parquet files in parallel -> PUT to
+    STOCK_DATA_STAGE -> one COPY INTO (append) or COPY + MERGE (upsert)
+
+Usage:
+    python -m stockpulse.ingest extract.csv --mode upsert
+    python -m stockpulse.ingest extract.csv --local .stockpulse/local
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from tests.validate_data import generate_validation_report, validate_daily_stock_data
+
+STAGE = 'STOCKPULSE_AI.DATA.STOCK_DATA_STAGE'
+TARGET_TABLE = 'STOCKPULSE_AI.DATA.DAILY_STOCK_RAW'
+PARQUET_FORMAT = 'STOCKPULSE_AI.DATA.PARQUET_FORMAT'
+
+KEY_COLUMNS = ['record_date', 'location_code', 'item_code']
+
+# Arrow types for every loadable DAILY_STOCK_RAW column, in table order
+RAW_SCHEMA = pa.schema([
+    ('record_date', pa.date32()),
+    ('location_code', pa.string()),
+    ('location_name', pa.string()),
+    ('item_code', pa.string()),
+    ('item_name', pa.string()),
+    ('item_category', pa.string()),
+    ('opening_stock', pa.float64()),
+    ('receipts', pa.float64()),
+    ('issues', pa.float64()),
+    ('closing_stock', pa.float64()),
+    ('unit_of_measure', pa.string()),
+    ('lead_time_days', pa.int32()),
+    ('data_source', pa.string()),
+])
+
+# Snowflake casts used when selecting staged Parquet columns
+SNOWFLAKE_TYPES = {
+    'record_date': 'DATE',
+    'opening_stock': 'NUMBER(18,2)',
+    'receipts': 'NUMBER(18,2)',
+    'issues': 'NUMBER(18,2)',
+    'closing_stock': 'NUMBER(18,2)',
+    'lead_time_days': 'NUMBER(5,0)',
+}
+
+
+def read_extract(path) -> pd.DataFrame:
+    """
+    Read a CSV or Parquet extract and keep the DAILY_STOCK_RAW columns
+    
+    Args:
+        path: Extract file path
+    
+    Returns:
+        DataFrame with lower-case column names
+    """
+    
+    path = Path(path)
+    if path.suffix.lower() in ('.parquet', '.pq'):
+        df = pd.read_parquet(path)
+    else:
+        df = pd.read_csv(path)
+    
+    df.columns = [str(col).strip().lower() for col in df.columns]
+    return df[[col for col in RAW_SCHEMA.names if col in df.columns]]
+
+
+def write_parquet_files(df: pd.DataFrame, out_dir, file_count=8, workers=8, compression='zstd') -> list:
+    """
+    Write the extract as compressed Parquet files in parallel
+    
+    Rows are sharded by location so that each file holds whole locations.
+    
+    Args:
+        df: Validated extract
+        out_dir: Directory for the files
+        file_count: Number of files (upper bound)
+        workers: Writer threads
+        compression: Parquet codec
+    
+    Returns:
+        List of written file paths
+    """
+    
+    out_dir = Path(out_dir)
+    schema = pa.schema([RAW_SCHEMA.field(col) for col in df.columns])
+    file_count = max(1, min(file_count, len(df) or 1))
+    
+    shard = pd.util.hash_array(df['location_code'].astype(str).to_numpy()) % np.uint64(file_count)
+    order = np.argsort(shard, kind='stable')
+    bounds = np.searchsorted(shard[order], np.arange(file_count + 1, dtype=np.uint64))
+    
+    frame = df.copy(deep=False)
+    frame['record_date'] = pd.to_datetime(frame['record_date']).dt.date
+    
+    def write(index):
+        rows = order[bounds[index]:bounds[index + 1]]
+        if len(rows) == 0:
+            return None
+        path = out_dir / f"daily_stock_{index:04d}.parquet"
+        table = pa.Table.from_pandas(frame.iloc[rows], schema=schema, preserve_index=False)
+        pq.write_table(table, path, compression=compression)
+        return path
+    
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return [path for path in pool.map(write, range(file_count)) if path is not None]
+
+
+class SnowflakeLoader:
+    """Stage + COPY loader for DAILY_STOCK_RAW"""
+    
+    def __init__(self, conn, stage=STAGE, table=TARGET_TABLE, file_format=PARQUET_FORMAT):
+        self.conn = conn
+        self.stage = stage
+        self.table = table
+        self.file_format = file_format
+    
+    def upload(self, files, prefix):
+        """PUT every file in one parallel command"""
+        directory = Path(files[0]).parent.resolve().as_posix()
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"PUT 'file://{directory}/*.parquet' @{self.stage}/{prefix}/ "
+            f"PARALLEL = 8 AUTO_COMPRESS = FALSE OVERWRITE = TRUE"
+        )
+        cursor.close()
+    
+    def copy(self, prefix, columns, table=None):
+        """COPY staged files into the table; returns rows loaded"""
+        select_list = ', '.join(
+            f"$1:{col}::{SNOWFLAKE_TYPES.get(col, 'VARCHAR')}" for col in columns
+        )
+        cursor = self.conn.cursor()
+        cursor.execute(f"""
+            COPY INTO {table or self.table} ({', '.join(columns)})
+            FROM (SELECT {select_list} FROM @{self.stage}/{prefix}/)
+            FILE_FORMAT = (FORMAT_NAME = '{self.file_format}')
+            PURGE = TRUE
+        """)
+        results = cursor.fetchall()
+        columns_out = [desc[0].lower() for desc in cursor.description]
+        cursor.close()
+        if 'rows_loaded' not in columns_out:
+            return 0
+        return sum(int(row[columns_out.index('rows_loaded')] or 0) for row in results)
+    
+    def merge(self, prefix, columns):
+        """COPY into a temporary table and MERGE on (record_date, location_code, item_code)"""
+        cursor = self.conn.cursor()
+        cursor.execute(f"CREATE OR REPLACE TEMPORARY TABLE DAILY_STOCK_LOAD LIKE {self.table}")
+        cursor.close()
+        
+        rows = self.copy(prefix, columns, table='DAILY_STOCK_LOAD')
+        
+        value_columns = [col for col in columns if col not in KEY_COLUMNS]
+        on_clause = ' AND '.join(f"t.{col} = s.{col}" for col in KEY_COLUMNS)
+        update_clause = ', '.join([f"{col} = s.{col}" for col in value_columns] + ['modified_timestamp = CURRENT_TIMESTAMP()'])
+        insert_values = ', '.join(f"s.{col}" for col in columns)
+        
+        cursor = self.conn.cursor()
+        cursor.execute(f"""
+            MERGE INTO {self.table} t
+            USING (
+                SELECT * FROM DAILY_STOCK_LOAD
+                QUALIFY ROW_NUMBER() OVER (PARTITION BY {', '.join(KEY_COLUMNS)} ORDER BY stock_record_id DESC) = 1
+            ) s
+            ON {on_clause}
+            WHEN MATCHED THEN UPDATE SET {update_clause}
+            WHEN NOT MATCHED THEN INSERT ({', '.join(columns)}) VALUES ({insert_values})
+        """)
+        cursor.execute("DROP TABLE IF EXISTS DAILY_STOCK_LOAD")
+        cursor.close()
+        return rows
+
+
+class LocalLoader:
+    """Offline loader with the same interface, backed by LocalWarehouse"""
+    
+    def __init__(self, warehouse):
+        self.warehouse = warehouse
+    
+    def upload(self, files, prefix):
+        self.warehouse.put(files, prefix)
+    
+    def _staged_rows(self, prefix, columns):
+        files = self.warehouse.list_stage(prefix)
+        table = pa.concat_tables([pq.read_table(file, columns=columns) for file in files])
+        arrays = []
+        for col in columns:
+            values = table.column(col).to_pylist()
+            if col == 'record_date':
+                values = [value.isoformat() if value is not None else None for value in values]
+            arrays.append(values)
+        return list(zip(*arrays))
+    
+    def copy(self, prefix, columns):
+        rows = self._staged_rows(prefix, columns)
+        placeholders = ', '.join('?' * len(columns))
+        with self.warehouse.connect() as conn:
+            conn.executemany(
+                f"INSERT INTO DAILY_STOCK_RAW ({', '.join(columns)}) VALUES ({placeholders})",
+                rows
+            )
+        self.warehouse.purge(prefix)
+        return len(rows)
+    
+    def merge(self, prefix, columns):
+        rows = self._staged_rows(prefix, columns)
+        placeholders = ', '.join('?' * len(columns))
+        value_columns = [col for col in columns if col not in KEY_COLUMNS]
+        key_match = ' AND '.join(f"t.{col} = s.{col}" for col in KEY_COLUMNS)
+        
+        with self.warehouse.connect() as conn:
+            conn.execute(f"CREATE TEMP TABLE DAILY_STOCK_LOAD AS SELECT {', '.join(columns)} FROM DAILY_STOCK_RAW WHERE 0")
+            conn.executemany(
+                f"INSERT INTO DAILY_STOCK_LOAD ({', '.join(columns)}) VALUES ({placeholders})",
+                rows
+            )
+            # Last row wins for duplicate keys within the batch, as in the MERGE source
+            conn.execute(f"""
+                DELETE FROM DAILY_STOCK_LOAD WHERE rowid NOT IN (
+                    SELECT MAX(rowid) FROM DAILY_STOCK_LOAD GROUP BY {', '.join(KEY_COLUMNS)}
+                )
+            """)
+            if value_columns:
+                conn.execute(f"""
+                    UPDATE DAILY_STOCK_RAW AS t
+                    SET {', '.join(f"{col} = s.{col}" for col in value_columns)},
+                        modified_timestamp = CURRENT_TIMESTAMP
+                    FROM DAILY_STOCK_LOAD AS s
+                    WHERE {key_match}
+                """)
+            conn.execute(f"""
+                INSERT INTO DAILY_STOCK_RAW ({', '.join(columns)})
+                SELECT {', '.join(f"s.{col}" for col in columns)} FROM DAILY_STOCK_LOAD AS s
+                WHERE NOT EXISTS (SELECT 1 FROM DAILY_STOCK_RAW AS t WHERE {key_match})
+            """)
+            conn.execute("DROP TABLE DAILY_STOCK_LOAD")
+        self.warehouse.purge(prefix)
+        return len(rows)
+
+
+def ingest(path, loader, mode='append', file_count=8, workers=8, validate=True) -> dict:
+    """
+    Validate an extract and bulk-load it through the stage
+    
+    Args:
+        path: CSV or Parquet extract
+        loader: SnowflakeLoader or LocalLoader
+        mode: 'append' (COPY) or 'upsert' (COPY + MERGE on the record key)
+        file_count: Number of Parquet files to write
+        workers: Parallel writer threads
+        validate: Run validate_daily_stock_data before loading
+    
+    Returns:
+        Dictionary with status, row counts, phase timings and validation results
+    """
+    
+    timings = {}
+    start = time.perf_counter()
+    df = read_extract(path)
+    timings['read_s'] = time.perf_counter() - start
+    
+    result = {'status': 'loaded', 'rows_read': len(df), 'mode': mode, 'timings': timings}
+    
+    if validate:
+        start = time.perf_counter()
+        validation = validate_daily_stock_data(df, low_memory=True)
+        timings['validate_s'] = time.perf_counter() - start
+        result['validation'] = validation
+        if not validation['is_valid']:
+            result['status'] = 'rejected'
+            return result
+    
+    if df.empty:
+        # Nothing to stage, so no upload, COPY or MERGE
+        result.update(rows_loaded=0, files=0)
+        return result
+    
+    prefix = f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    columns = list(df.columns)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        files = write_parquet_files(df, tmp, file_count=file_count, workers=workers)
+        timings['write_s'] = time.perf_counter() - start
+        if not files:
+            result.update(rows_loaded=0, files=0)
+            return result
+        
+        start = time.perf_counter()
+        loader.upload(files, prefix)
+        timings['upload_s'] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    if mode == 'upsert':
+        result['rows_loaded'] = loader.merge(prefix, columns)
+    else:
+        result['rows_loaded'] = loader.copy(prefix, columns)
+    timings['load_s'] = time.perf_counter() - start
+    
+    result['files'] = len(files)
+    result['stage_prefix'] = prefix
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-load a daily stock extract into DAILY_STOCK_RAW")
+    parser.add_argument('extract', help="CSV or Parquet extract")
+    parser.add_argument('--mode', choices=['append', 'upsert'], default='append',
+                        help="append with COPY, or upsert with MERGE on (record_date, location_code, item_code)")
+    parser.add_argument('--local', metavar='DIR',
+                        help="Load into the local stand-in at DIR instead of Snowflake")
+    parser.add_argument('--files', type=int, default=8, help="Number of Parquet files to write")
+    parser.add_argument('--workers', type=int, default=8, help="Parallel writer threads")
+    parser.add_argument('--skip-validation', action='store_true', help="Load without validating")
+    args = parser.parse_args(argv)
+    
+    if args.local:
+        from stockpulse.local_backend import LocalWarehouse
+        loader = LocalLoader(LocalWarehouse(args.local))
+    else:
+        from stockpulse.warehouse import connect_from_env
+        loader = SnowflakeLoader(connect_from_env(schema='DATA'))
+    
+    result = ingest(
+        args.extract, loader, mode=args.mode, file_count=args.files,
+        workers=args.workers, validate=not args.skip_validation
+    )
+    
+    if 'validation' in result and (result['status'] == 'rejected' or result['validation']['warnings']):
+        print(generate_validation_report(result['validation']))
+    
+    if result['status'] == 'rejected':
+        print("❌ Extract rejected - nothing was loaded")
+        return 1
+    
+    timings = ', '.join(f"{name[:-2]} {seconds:.2f}s" for name, seconds in result['timings'].items())
+    print(f"✅ Loaded {result['rows_loaded']:,} rows from {result['files']} files ({args.mode}) - {timings}")
+    
+    if args.local:
+        # Stands in for TSK_PROCESS_STOCK_ALERTS firing on the new stream rows
+        events = loader.warehouse.process_alerts()
+        print(f"🔔 Re-scored {events['pairs']:,} changed pairs: {events['new']} new, {events['escalated']} escalated, "
+              f"{events['downgraded']} downgraded, {events['resolved']} resolved alerts")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
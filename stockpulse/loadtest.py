@@ -0,0 +1,379 @@
+"""
+StockPulse AI - Load Test
+=========================
+Drives N concurrent simulated dashboard sessions through app.py with
+Streamlit's app-testing API, against the local backend. Every session
+is a separate AppTest in one process, so they share the connection,
+fetch cache and other st.cache_resource singletons exactly like browser
+sessions on one server.
+
+Each session runs a weighted random script of filter changes, searches,
+tab switches, alert acknowledgements and exports. The report gives rerun
+latency percentiles per action, throughput, process memory per session
+and the fetch cache results seen by the shared cache.
+
+Usage:
+    python -m stockpulse.loadtest --sessions 8 --actions 30
+    python -m stockpulse.loadtest --sessions 20 --duration 120 --json report.json
+"""
+
+import argparse
+import json
+import os
+import pickle
+import random
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+
+APP_PATH = Path(__file__).resolve().parent.parent / 'app.py'
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# action -> relative weight in a session's script
+DEFAULT_MIX = {
+    'filter': 3,
+    'search': 2,
+    'tab': 3,
+    'acknowledge': 1,
+    'export': 1,
+}
+
+SIDEBAR_FILTERS = ["🏥 Location", "📦 Category", "⚠️ Risk Level"]
+
+HEATMAP_TAB = "🔥 Stock Heatmap"
+ALERTS_TAB = "⚠️ Active Alerts"
+REPORTS_TAB = "🏆 Top Performers"
+
+REPORT_BUTTONS = ['report_executive_summary', 'report_critical_items', 'report_performance']
+
+SEARCH_TERMS = ['', 'Item 0', 'Hospital', 'Warehouse 01', 'Centre', 'Item 04', 'zzz']
+
+# AppTest reruns the whole script for a widget inside a fragment, where the
+# browser reruns only the fragment, so fragment-scoped st.rerun() raises
+APPTEST_ONLY_ERRORS = ['scope="fragment" can only be specified']
+
+
+def rss_bytes():
+    """Resident set size of this process (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def session_state_bytes(at):
+    """Approximate size of one session's state (pickled, unpicklable values skipped)"""
+    total = 0
+    for key in at.session_state:
+        try:
+            total += len(pickle.dumps(at.session_state[key], protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            continue
+    return total
+
+
+@contextmanager
+def shared_runtime():
+    """
+    One mock Streamlit runtime for every AppTest in the process
+    
+    AppTest installs a fresh mock runtime before each run and removes it
+    afterwards, so concurrent runs would pull it out from under each other.
+    Here AppTest writes to a throwaway subclass while the real Runtime keeps
+    one shared instance, which is also how one server hosts many sessions.
+    The compiled script is shared the same way instead of reparsed per run.
+    """
+    
+    from streamlit.runtime import Runtime
+    from streamlit.testing.v1 import app_test, local_script_runner
+    
+    # Same services AppTest gives its per-run mock
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = app_test.MediaFileManager(app_test.MemoryMediaFileStorage("/mock/media"))
+    runtime.dataframe_source_mgr = app_test.DataframeSourceManager()
+    runtime.cache_storage_manager = app_test.MemoryCacheStorageManager()
+    runtime.bidi_component_registry = app_test.BidiComponentManager()
+    runtime.bidi_component_registry.discover_and_register_components(start_file_watching=False)
+    script_cache = app_test.ScriptCache()
+    originals = app_test.Runtime, app_test.ScriptCache, local_script_runner.ScriptCache
+    app_test.Runtime = type('LoadTestRuntime', (Runtime,), {})
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: script_cache
+    Runtime._instance = runtime
+    try:
+        yield runtime
+    finally:
+        app_test.Runtime, app_test.ScriptCache, local_script_runner.ScriptCache = originals
+        Runtime._instance = None
+
+
+class SimulatedSession:
+    """One dashboard session replaying a random interaction script"""
+    
+    def __init__(self, index, rng, timeout=120, think_time=0.0, mix=None):
+        from streamlit.testing.v1 import AppTest
+        
+        self.index = index
+        self.rng = rng
+        self.think_time = think_time
+        self.mix = mix or DEFAULT_MIX
+        self.at = AppTest.from_file(str(APP_PATH), default_timeout=timeout)
+        self.samples = []
+        self.errors = []
+        self.state_bytes = 0
+    
+    def _run(self, action):
+        """One rerun, timed and checked for uncaught exceptions"""
+        started = time.perf_counter()
+        try:
+            self.at.run()
+        except Exception as e:
+            self.errors.append({'session': self.index, 'action': action, 'error': f"{type(e).__name__}: {e}"})
+            return
+        self.samples.append((action, time.perf_counter() - started))
+        for exc in self.at.exception:
+            if any(message in exc.value for message in APPTEST_ONLY_ERRORS):
+                continue
+            self.errors.append({'session': self.index, 'action': action, 'error': exc.value})
+    
+    def _open_tab(self, label):
+        if 'active_tab' not in self.at.session_state or self.at.session_state['active_tab'] != label:
+            self.at.session_state['active_tab'] = label
+            self._run('tab')
+    
+    def _sidebar_selectbox(self, label):
+        return next((box for box in self.at.sidebar.selectbox if box.label == label), None)
+    
+    def filter(self):
+        box = self._sidebar_selectbox(self.rng.choice(SIDEBAR_FILTERS))
+        if box is None:
+            return
+        # Back to "All" half the time so filters don't only ever narrow
+        box.set_value('All' if self.rng.random() < 0.5 else self.rng.choice(box.options))
+        self._run('filter')
+    
+    def search(self):
+        self._open_tab(HEATMAP_TAB)
+        try:
+            box = self.at.text_input(key='heatmap_search')
+        except KeyError:
+            return
+        box.input(self.rng.choice(SEARCH_TERMS))
+        self._run('search')
+    
+    def tab(self):
+        self.at.session_state['active_tab'] = self.rng.choice([tab.label for tab in self.at.tabs])
+        self._run('tab')
+    
+    def acknowledge(self):
+        self._open_tab(ALERTS_TAB)
+        buttons = [button for button in self.at.button if button.key and button.key.startswith('ack_')]
+        if buttons and self.rng.random() < 0.9:
+            self.rng.choice(buttons).click()
+        else:
+            bulk = next((button for button in self.at.button if button.label == "✅ Acknowledge All Alerts"), None)
+            if bulk is None:
+                return
+            bulk.click()
+        self._run('acknowledge')
+    
+    def export(self):
+        # Download buttons are served outside the script run, so an export
+        # is a format change plus a background report request
+        fmt = next((box for box in self.at.sidebar.selectbox if box.key == 'export_format'), None)
+        if fmt is not None:
+            fmt.set_value(self.rng.choice(fmt.options))
+            self._run('export')
+        self._open_tab(REPORTS_TAB)
+        buttons = [button for button in self.at.button if button.key in REPORT_BUTTONS]
+        if buttons:
+            self.rng.choice(buttons).click()
+            self._run('export')
+    
+    def play(self, actions, deadline):
+        """Initial page load, then weighted random actions until done or past deadline"""
+        self._run('load')
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        done = 0
+        while (actions is None or done < actions) and (deadline is None or time.perf_counter() < deadline):
+            if self.at.exception or not self.at.tabs:
+                # Page is broken; reload it like a user would
+                self._run('load')
+            else:
+                getattr(self, self.rng.choices(names, weights)[0])()
+            done += 1
+            if self.think_time:
+                time.sleep(self.rng.uniform(0, 2 * self.think_time))
+        self.state_bytes = session_state_bytes(self.at)
+
+
+def latency_table(samples):
+    """Per-action rerun latency percentiles, plus an ALL row"""
+    frame = pd.DataFrame(samples, columns=['ACTION', 'SECONDS'])
+    rows = []
+    groups = list(frame.groupby('ACTION')['SECONDS']) + [('ALL', frame['SECONDS'])]
+    for action, seconds in groups:
+        p50, p95, p99 = np.quantile(seconds, QUANTILES) * 1000
+        rows.append({
+            'ACTION': action,
+            'RERUNS': len(seconds),
+            'MEAN_MS': seconds.mean() * 1000,
+            'P50_MS': p50,
+            'P95_MS': p95,
+            'P99_MS': p99,
+            'MAX_MS': seconds.max() * 1000,
+        })
+    return pd.DataFrame(rows, columns=['ACTION', 'RERUNS', 'MEAN_MS', 'P50_MS', 'P95_MS', 'P99_MS', 'MAX_MS'])
+
+
+def prepare_backend(root, locations, items, days, seed, reseed=False):
+    """Seed the local warehouse once and point the app at it"""
+    from stockpulse.local_backend import LocalWarehouse
+    
+    warehouse = LocalWarehouse(root)
+    with warehouse.connect() as conn:
+        seeded = conn.execute("SELECT COUNT(*) FROM DAILY_STOCK_RAW").fetchone()[0]
+    if reseed or not seeded:
+        warehouse.seed(locations, items, days, seed)
+    warehouse.refresh_dynamic_tables()
+    
+    os.environ['STOCKPULSE_BACKEND'] = 'local'
+    os.environ['STOCKPULSE_LOCAL_DIR'] = str(root)
+    return warehouse
+
+
+def run_load_test(sessions=4, actions=20, duration=None, think_time=0.0, ramp=0.0, seed=0, timeout=120):
+    """
+    Run concurrent simulated sessions and summarize them
+    
+    Args:
+        sessions: Number of concurrent sessions
+        actions: Interactions per session (None: until duration runs out)
+        duration: Wall-clock limit in seconds (None: until actions are done)
+        think_time: Mean pause between a session's actions, in seconds
+        ramp: Seconds over which session starts are spread
+        seed: Seed of the interaction scripts
+        timeout: Per-rerun timeout in seconds
+    
+    Returns:
+        Dictionary with latency table, throughput, memory and errors
+    """
+    
+    from stockpulse.metrics import registry
+    
+    rss_before = rss_bytes()
+    simulated = [
+        SimulatedSession(index, random.Random(seed * 1000 + index), timeout, think_time)
+        for index in range(sessions)
+    ]
+    
+    with shared_runtime():
+        started = time.perf_counter()
+        deadline = started + duration if duration else None
+        threads = []
+        for session in simulated:
+            thread = threading.Thread(
+                target=session.play, args=(actions, deadline),
+                name=f"stockpulse-loadtest-{session.index}", daemon=True
+            )
+            thread.start()
+            threads.append(thread)
+            if ramp and sessions > 1:
+                time.sleep(ramp / (sessions - 1))
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    rss_after = rss_bytes()
+    
+    samples = [sample for session in simulated for sample in session.samples]
+    fetch_results = Counter()
+    for labels, value in registry.counters('stockpulse_fetch_cache_total').items():
+        fetch_results[dict(labels)['result']] += int(value)
+    
+    return {
+        'sessions': sessions,
+        'elapsed_s': elapsed,
+        'reruns': len(samples),
+        'reruns_per_s': len(samples) / elapsed if elapsed else 0.0,
+        'latency': latency_table(samples) if samples else pd.DataFrame(),
+        'rss_before_mb': rss_before / 2**20,
+        'rss_after_mb': rss_after / 2**20,
+        'rss_per_session_mb': (rss_after - rss_before) / 2**20 / max(sessions, 1),
+        'session_state_kb': [session.state_bytes / 1024 for session in simulated],
+        'fetch_results': dict(fetch_results),
+        'errors': [error for session in simulated for error in session.errors],
+    }
+
+
+def print_report(report):
+    print(f"\n{report['sessions']} sessions, {report['reruns']} reruns in {report['elapsed_s']:.1f}s "
+          f"({report['reruns_per_s']:.2f} reruns/s)")
+    if not report['latency'].empty:
+        print("\nRerun latency:")
+        print(report['latency'].to_string(index=False, float_format=lambda value: f"{value:,.1f}"))
+    print(f"\nMemory: RSS {report['rss_before_mb']:,.1f} -> {report['rss_after_mb']:,.1f} MB "
+          f"({report['rss_per_session_mb']:,.1f} MB per session); "
+          f"session state {np.mean(report['session_state_kb']):,.1f} KB avg, "
+          f"{max(report['session_state_kb'], default=0):,.1f} KB max")
+    if report['fetch_results']:
+        total = sum(report['fetch_results'].values())
+        print("Fetch cache: " + ', '.join(
+            f"{result} {count} ({count / total:.0%})" for result, count in sorted(report['fetch_results'].items())
+        ))
+    if report['errors']:
+        print(f"\n❌ {len(report['errors'])} errors:")
+        for error in report['errors'][:20]:
+            print(f"   session {error['session']} ({error['action']}): {error['error']}")
+    else:
+        print("\n✅ No errors")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent dashboard sessions against the local backend")
+    parser.add_argument('--sessions', type=int, default=4)
+    parser.add_argument('--actions', type=int, default=20, help="Interactions per session")
+    parser.add_argument('--duration', type=float, help="Stop after this many seconds instead")
+    parser.add_argument('--think-time', type=float, default=0.0, help="Mean pause between actions (s)")
+    parser.add_argument('--ramp', type=float, default=0.0, help="Spread session starts over this many seconds")
+    parser.add_argument('--timeout', type=float, default=120, help="Per-rerun timeout (s)")
+    parser.add_argument('--local', metavar='DIR', default='.stockpulse/loadtest',
+                        help="Local warehouse directory (seeded on first use)")
+    parser.add_argument('--locations', type=int, default=40)
+    parser.add_argument('--items', type=int, default=60)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--reseed', action='store_true', help="Regenerate the synthetic data")
+    parser.add_argument('--json', metavar='PATH', help="Also write the report as JSON")
+    args = parser.parse_args(argv)
+    
+    prepare_backend(args.local, args.locations, args.items, args.days, args.seed, args.reseed)
+    report = run_load_test(
+        sessions=args.sessions,
+        actions=None if args.duration else args.actions,
+        duration=args.duration,
+        think_time=args.think_time,
+        ramp=args.ramp,
+        seed=args.seed,
+        timeout=args.timeout,
+    )
+    print_report(report)
+    
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({**report, 'latency': report['latency'].to_dict('records')}, f, indent=2)
+    return 1 if report['errors'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,798 @@
+"""
+StockPulse AI - Local Backend
+=============================
+Offline stand-in for the Snowflake objects used by StockPulse: a directory
+plays the role of an internal stage and an SQLite database holds the tables.
+
+The dashboard can run against it too (STOCKPULSE_BACKEND=local):
+refresh_dynamic_tables() recomputes the ANALYTICS dynamic tables from
+DAILY_STOCK_RAW with the rules of 04_dynamic_tables.sql, and
+dashboard_connection() returns a connector-shaped connection over them.
+seed() fills DAILY_STOCK_RAW and the master tables with synthetic history.
+process_alerts() consumes the change log that triggers on DAILY_STOCK_RAW
+keep (the stand-in for MONITORING.STR_DAILY_STOCK_CHANGES) into
+ALERT_NOTIFICATIONS and ALERT_HISTORY.
+
+Usage:
+    python -m stockpulse.local_backend .stockpulse/local --locations 40 --items 60
+"""
+
+import argparse
+import itertools
+import shutil
+import sqlite3
+import threading
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from stockpulse import delta_alerts
+from stockpulse.analytics import sql_round
+from stockpulse.history import truncate
+
+DAILY_STOCK_RAW_DDL = """
+    CREATE TABLE IF NOT EXISTS DAILY_STOCK_RAW (
+        stock_record_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        record_date DATE NOT NULL,
+        location_code VARCHAR(50) NOT NULL,
+        location_name VARCHAR(200),
+        item_code VARCHAR(50) NOT NULL,
+        item_name VARCHAR(200),
+        item_category VARCHAR(100),
+        opening_stock NUMERIC DEFAULT 0,
+        receipts NUMERIC DEFAULT 0,
+        issues NUMERIC DEFAULT 0,
+        closing_stock NUMERIC DEFAULT 0,
+        unit_of_measure VARCHAR(20) DEFAULT 'UNITS',
+        lead_time_days INTEGER DEFAULT 7,
+        data_source VARCHAR(100),
+        created_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        modified_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+DAILY_STOCK_RAW_INDEX = """
+    CREATE INDEX IF NOT EXISTS IX_DAILY_STOCK_RAW_KEY
+    ON DAILY_STOCK_RAW (record_date, location_code, item_code)
+"""
+
+# Changed pairs are looked up by key when alerts are processed
+DAILY_STOCK_RAW_PAIR_INDEX = """
+    CREATE INDEX IF NOT EXISTS IX_DAILY_STOCK_RAW_PAIR
+    ON DAILY_STOCK_RAW (location_code, item_code)
+"""
+
+# Stand-in for the MONITORING.STR_DAILY_STOCK_CHANGES stream: one row per
+# inserted or updated DAILY_STOCK_RAW row, deleted once processed
+CHANGE_LOG_DDL = """
+    CREATE TABLE IF NOT EXISTS STR_DAILY_STOCK_CHANGES (
+        change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        location_code VARCHAR(50),
+        item_code VARCHAR(50),
+        changed_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+CHANGE_LOG_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS TRG_DAILY_STOCK_{event}
+    AFTER {event} ON DAILY_STOCK_RAW
+    BEGIN
+        INSERT INTO STR_DAILY_STOCK_CHANGES (location_code, item_code)
+        VALUES (NEW.location_code, NEW.item_code);
+    END
+    """
+    for event in ('INSERT', 'UPDATE')
+]
+
+ALERT_NOTIFICATIONS_DDL = """
+    CREATE TABLE IF NOT EXISTS ALERT_NOTIFICATIONS (
+        alert_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        alert_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        alert_type VARCHAR(50),
+        severity VARCHAR(20),
+        location_code VARCHAR(50),
+        location_name VARCHAR(200),
+        item_code VARCHAR(50),
+        item_name VARCHAR(200),
+        item_category VARCHAR(100),
+        current_stock NUMERIC,
+        days_until_stockout INTEGER,
+        recommended_action VARCHAR(500),
+        alert_message TEXT,
+        is_acknowledged BOOLEAN DEFAULT FALSE,
+        acknowledged_by VARCHAR(100),
+        acknowledged_timestamp TIMESTAMP,
+        action_taken TEXT,
+        is_resolved BOOLEAN DEFAULT FALSE,
+        resolved_timestamp TIMESTAMP
+    )
+"""
+
+ALERT_NOTIFICATIONS_INDEX = """
+    CREATE INDEX IF NOT EXISTS IX_ALERT_NOTIFICATIONS_OPEN
+    ON ALERT_NOTIFICATIONS (location_code, item_code) WHERE NOT is_resolved
+"""
+
+ALERT_HISTORY_DDL = """
+    CREATE TABLE IF NOT EXISTS ALERT_HISTORY (
+        history_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        alert_date DATE,
+        location_code VARCHAR(50),
+        item_code VARCHAR(50),
+        alert_type VARCHAR(50),
+        severity VARCHAR(20),
+        alert_event VARCHAR(20),
+        stock_health_score NUMERIC,
+        days_of_cover NUMERIC,
+        created_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+LOCATION_MASTER_DDL = """
+    CREATE TABLE IF NOT EXISTS LOCATION_MASTER (
+        location_code VARCHAR(50) PRIMARY KEY,
+        location_name VARCHAR(200) NOT NULL,
+        region VARCHAR(100),
+        priority_level VARCHAR(20) DEFAULT 'MEDIUM'
+    )
+"""
+
+ITEM_MASTER_DDL = """
+    CREATE TABLE IF NOT EXISTS ITEM_MASTER (
+        item_code VARCHAR(50) PRIMARY KEY,
+        item_name VARCHAR(200) NOT NULL,
+        item_category VARCHAR(100),
+        unit_cost NUMERIC,
+        is_critical BOOLEAN DEFAULT FALSE,
+        reorder_point NUMERIC,
+        safety_stock NUMERIC,
+        default_lead_time_days INTEGER DEFAULT 7
+    )
+"""
+
+# Stand-in for <database>.INFORMATION_SCHEMA.TABLES (attached per connection)
+TABLES_DDL = """
+    CREATE TABLE IF NOT EXISTS INFORMATION_SCHEMA.TABLES (
+        TABLE_SCHEMA VARCHAR(100),
+        TABLE_NAME VARCHAR(200),
+        LAST_ALTERED TIMESTAMP,
+        PRIMARY KEY (TABLE_SCHEMA, TABLE_NAME)
+    )
+"""
+
+DYNAMIC_TABLES = [
+    'DT_STOCK_HEALTH_CLASSIFICATION',
+    'DT_REORDER_RECOMMENDATIONS',
+    'DT_LOCATION_RISK_SUMMARY',
+    'DT_EXECUTIVE_SUMMARY',
+]
+
+CATEGORIES = ['MEDICINE', 'MEDICAL_SUPPLY', 'PPE', 'FOOD', 'EQUIPMENT']
+
+REGIONS = ['North', 'South', 'East', 'West']
+
+RISK_LEVELS = ['OUT_OF_STOCK', 'CRITICAL', 'HIGH_RISK', 'MEDIUM_RISK', 'HEALTHY', 'OVERSTOCK', 'SLOW_MOVING']
+
+# Rows per Arrow batch, roughly one connector result chunk
+ARROW_BATCH_ROWS = 10000
+
+
+def stock_health(raw, items=None, locations=None, today=None):
+    """
+    DT_STOCK_HEALTH_CLASSIFICATION from DAILY_STOCK_RAW rows
+    
+    Mirrors the latest-position, consumption and classification steps of
+    04_dynamic_tables.sql (item/location parameters come from the masters).
+    
+    Returns:
+        DataFrame with one row per location and item
+    """
+    
+    today = pd.Timestamp(today or date.today())
+    raw = raw.sort_values('record_date')
+    keys = ['location_code', 'item_code']
+    latest = raw.groupby(keys, sort=False).tail(1).rename(columns={'record_date': 'latest_date'})
+    
+    def window_mean(days):
+        recent = raw[raw['record_date'] >= today - pd.Timedelta(days=days)]
+        return recent.groupby(keys)['issues'].mean().rename(f'avg_{days}d')
+    
+    moved = raw[raw['issues'] > 0].groupby(keys)['record_date'].max().rename('last_movement_date')
+    health = (
+        latest.set_index(keys)
+        .join([window_mean(14), window_mean(7), window_mean(30), moved])
+        .reset_index()
+    )
+    
+    if items is not None:
+        health = health.merge(items.drop(columns=['item_name', 'item_category']), on='item_code', how='left')
+    else:
+        health = health.assign(unit_cost=np.nan, is_critical=False, reorder_point=np.nan,
+                               safety_stock=np.nan, default_lead_time_days=np.nan)
+    if locations is not None:
+        health = health.merge(locations[['location_code', 'priority_level']], on='location_code', how='left')
+    else:
+        health['priority_level'] = None
+    
+    issue = health['avg_14d'].fillna(health['avg_7d']).fillna(health['avg_30d']).fillna(0)
+    stock = health['closing_stock'].astype(float)
+    lead = health['default_lead_time_days'].fillna(health['lead_time_days']).fillna(7).astype(float)
+    moving = issue > 0
+    days_of_cover = np.where(moving, stock / issue.where(moving, 1), 999.0)
+    days_until = np.where(moving, np.floor(stock / issue.where(moving, 1)), 999.0)
+    since_movement = (today - health['last_movement_date']).dt.days
+    
+    score = np.select(
+        [
+            since_movement > 30,
+            days_of_cover > lead * 1.5,
+            days_of_cover > lead,
+            days_of_cover > lead * 0.5,
+            days_of_cover > 0,
+        ],
+        [
+            60,
+            np.minimum(100, 80 + (days_of_cover - lead * 1.5) / lead * 10),
+            50 + (days_of_cover - lead) / (lead * 0.5) * 30,
+            25 + (days_of_cover - lead * 0.5) / (lead * 0.5) * 25,
+            days_of_cover / (lead * 0.5) * 25,
+        ],
+        0,
+    )
+    risk = np.select(
+        [
+            stock <= 0,
+            days_until <= 3,
+            days_until <= lead,
+            days_until <= lead * 1.5,
+            since_movement > 60,
+            since_movement > 30,
+        ],
+        RISK_LEVELS[:4] + ['OVERSTOCK', 'SLOW_MOVING'],
+        'HEALTHY',
+    )
+    
+    return pd.DataFrame({
+        'LOCATION_CODE': health['location_code'],
+        'LOCATION_NAME': health['location_name'],
+        'ITEM_CODE': health['item_code'],
+        'ITEM_NAME': health['item_name'],
+        'ITEM_CATEGORY': health['item_category'],
+        'LATEST_DATE': health['latest_date'].dt.strftime('%Y-%m-%d'),
+        'CLOSING_STOCK': stock,
+        'UNIT_OF_MEASURE': health['unit_of_measure'],
+        'LEAD_TIME_DAYS': lead,
+        'SAFETY_STOCK': health['safety_stock'].fillna(0).astype(float),
+        'REORDER_POINT': health['reorder_point'].astype(float),
+        'UNIT_COST': health['unit_cost'].fillna(0).astype(float),
+        'AVG_DAILY_ISSUE': issue,
+        'DAYS_SINCE_LAST_MOVEMENT': since_movement,
+        'DAYS_OF_COVER': days_of_cover,
+        'PROJECTED_STOCKOUT_DATE': [
+            (today + pd.Timedelta(days=int(days))).strftime('%Y-%m-%d') if is_moving else None
+            for days, is_moving in zip(days_until, moving)
+        ],
+        'DAYS_UNTIL_STOCKOUT': days_until.astype(int),
+        'IS_CRITICAL_ITEM': health['is_critical'].fillna(False).astype(bool),
+        'LOCATION_PRIORITY': health['priority_level'],
+        'STOCK_HEALTH_SCORE': score,
+        'RISK_CLASSIFICATION': risk,
+        'REQUIRES_ATTENTION': (stock <= 0) | (days_until <= lead),
+        'IS_OVERSTOCK': (since_movement > 30) & (stock > issue * 60),
+        'CALCULATED_TIMESTAMP': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+    })
+
+
+def reorder_recommendations(health, today=None):
+    """DT_REORDER_RECOMMENDATIONS from the health table"""
+    today = pd.Timestamp(today or date.today())
+    shc = health[
+        (health['DAYS_UNTIL_STOCKOUT'] <= health['LEAD_TIME_DAYS'] * 1.5)
+        | (health['CLOSING_STOCK'] <= health['REORDER_POINT'].fillna(0))
+        | health['RISK_CLASSIFICATION'].isin(['CRITICAL', 'HIGH_RISK', 'OUT_OF_STOCK'])
+    ]
+    issue = shc['AVG_DAILY_ISSUE']
+    lead = shc['LEAD_TIME_DAYS']
+    days_until = shc['DAYS_UNTIL_STOCKOUT']
+    stock = shc['CLOSING_STOCK']
+    shortfall = (issue * lead * 1.2 + shc['SAFETY_STOCK'] - stock).clip(lower=0)
+    
+    urgency = np.select(
+        [stock <= 0, days_until == 0, days_until <= 3, days_until <= lead, days_until <= lead * 1.5],
+        [100, 100, 95, 100 - days_until / lead * 30, 70 - (days_until - lead) / (lead * 0.5) * 20],
+        50,
+    )
+    base_priority = np.select([stock <= 0, days_until <= lead], [100, 100 - days_until / lead * 30], 50)
+    location_weight = shc['LOCATION_PRIORITY'].map({'HIGH': 1.3, 'MEDIUM': 1.0, 'LOW': 0.8}).fillna(1.0)
+    action_date = [
+        today.strftime('%Y-%m-%d') if due else
+        (pd.Timestamp(projected) - pd.Timedelta(days=int(days))).strftime('%Y-%m-%d') if projected else None
+        for due, projected, days in zip(days_until <= lead, shc['PROJECTED_STOCKOUT_DATE'], lead)
+    ]
+    
+    return pd.DataFrame({
+        'LOCATION_CODE': shc['LOCATION_CODE'],
+        'LOCATION_NAME': shc['LOCATION_NAME'],
+        'ITEM_CODE': shc['ITEM_CODE'],
+        'ITEM_NAME': shc['ITEM_NAME'],
+        'ITEM_CATEGORY': shc['ITEM_CATEGORY'],
+        'CURRENT_STOCK': stock,
+        'AVG_DAILY_ISSUE': issue,
+        'LEAD_TIME_DAYS': lead,
+        'SAFETY_STOCK': shc['SAFETY_STOCK'],
+        'DAYS_OF_COVER': shc['DAYS_OF_COVER'],
+        'DAYS_UNTIL_STOCKOUT': days_until,
+        'PROJECTED_STOCKOUT_DATE': shc['PROJECTED_STOCKOUT_DATE'],
+        'RISK_CLASSIFICATION': shc['RISK_CLASSIFICATION'],
+        'STOCK_HEALTH_SCORE': shc['STOCK_HEALTH_SCORE'],
+        'SUGGESTED_REORDER_QUANTITY': np.where(issue > 0, shortfall.round(2), 0),
+        'ESTIMATED_ORDER_VALUE': np.where(issue > 0, shortfall * shc['UNIT_COST'], 0),
+        'URGENCY_SCORE': urgency,
+        'PROCUREMENT_PRIORITY_SCORE': base_priority * np.where(shc['IS_CRITICAL_ITEM'], 1.5, 1.0) * location_weight,
+        'RECOMMENDED_ACTION_DATE': action_date,
+        'IS_CRITICAL_ITEM': shc['IS_CRITICAL_ITEM'],
+        'LOCATION_PRIORITY': shc['LOCATION_PRIORITY'],
+        'UNIT_OF_MEASURE': shc['UNIT_OF_MEASURE'],
+        'DATA_AS_OF_DATE': shc['LATEST_DATE'],
+    })
+
+
+def _risk_counts(risk):
+    return {
+        'OUT_OF_STOCK_COUNT': risk == 'OUT_OF_STOCK',
+        'CRITICAL_COUNT': risk == 'CRITICAL',
+        'HIGH_RISK_COUNT': risk == 'HIGH_RISK',
+        'MEDIUM_RISK_COUNT': risk == 'MEDIUM_RISK',
+        'HEALTHY_COUNT': risk == 'HEALTHY',
+        'OVERSTOCK_COUNT': risk.isin(['OVERSTOCK', 'SLOW_MOVING']),
+    }
+
+
+def location_risk_summary(health):
+    """DT_LOCATION_RISK_SUMMARY from the health table"""
+    risk = health['RISK_CLASSIFICATION']
+    weights = risk.map({'OUT_OF_STOCK': 100, 'CRITICAL': 90, 'HIGH_RISK': 70, 'MEDIUM_RISK': 40}).fillna(0)
+    frame = health.assign(
+        **_risk_counts(risk),
+        RISK_POINTS=weights,
+        SEVERE=risk.isin(['CRITICAL', 'HIGH_RISK']),
+        ELEVATED=risk.isin(['CRITICAL', 'HIGH_RISK', 'MEDIUM_RISK']),
+    )
+    keys = ['LOCATION_CODE', 'LOCATION_NAME', 'LOCATION_PRIORITY']
+    summary = frame.groupby(keys, dropna=False).agg(
+        TOTAL_ITEMS=('ITEM_CODE', 'size'),
+        OUT_OF_STOCK_COUNT=('OUT_OF_STOCK_COUNT', 'sum'),
+        CRITICAL_COUNT=('CRITICAL_COUNT', 'sum'),
+        HIGH_RISK_COUNT=('HIGH_RISK_COUNT', 'sum'),
+        MEDIUM_RISK_COUNT=('MEDIUM_RISK_COUNT', 'sum'),
+        HEALTHY_COUNT=('HEALTHY_COUNT', 'sum'),
+        OVERSTOCK_COUNT=('OVERSTOCK_COUNT', 'sum'),
+        REQUIRES_ATTENTION_COUNT=('REQUIRES_ATTENTION', 'sum'),
+        CRITICAL_ITEM_COUNT=('IS_CRITICAL_ITEM', 'sum'),
+        AVG_STOCK_HEALTH_SCORE=('STOCK_HEALTH_SCORE', 'mean'),
+        AVG_DAYS_OF_COVER=('DAYS_OF_COVER', 'mean'),
+        RISK_POINTS=('RISK_POINTS', 'sum'),
+        SEVERE=('SEVERE', 'sum'),
+        ELEVATED=('ELEVATED', 'sum'),
+        DATA_AS_OF_DATE=('LATEST_DATE', 'max'),
+    ).reset_index()
+    
+    total = summary['TOTAL_ITEMS']
+    summary['LOCATION_RISK_SCORE'] = (summary.pop('RISK_POINTS') / total).round(2)
+    summary['LOCATION_RISK_CLASSIFICATION'] = np.select(
+        [summary['OUT_OF_STOCK_COUNT'] > 0, summary.pop('SEVERE') > total * 0.3, summary.pop('ELEVATED') > total * 0.5],
+        ['CRITICAL', 'HIGH_RISK', 'MEDIUM_RISK'],
+        'HEALTHY',
+    )
+    summary[['AVG_STOCK_HEALTH_SCORE', 'AVG_DAYS_OF_COVER']] = summary[['AVG_STOCK_HEALTH_SCORE', 'AVG_DAYS_OF_COVER']].round(2)
+    return summary
+
+
+def executive_summary(health):
+    """One-row DT_EXECUTIVE_SUMMARY from the health table"""
+    risk = health['RISK_CLASSIFICATION']
+    total = max(len(health), 1)
+    counts = {name: int(mask.sum()) for name, mask in _risk_counts(risk).items()}
+    return pd.DataFrame([{
+        'TOTAL_LOCATIONS': health['LOCATION_CODE'].nunique(),
+        'TOTAL_ITEMS': health['ITEM_CODE'].nunique(),
+        'TOTAL_LOCATION_ITEM_COMBINATIONS': len(health),
+        **counts,
+        'PCT_REQUIRING_ATTENTION': sql_round(risk.isin(['OUT_OF_STOCK', 'CRITICAL', 'HIGH_RISK']).sum() * 100, 2, total),
+        'PCT_HEALTHY': sql_round(counts['HEALTHY_COUNT'] * 100, 2, total),
+        'AVG_STOCK_HEALTH_SCORE': sql_round(health['STOCK_HEALTH_SCORE'].sum(), 2, health['STOCK_HEALTH_SCORE'].count()),
+        'AVG_DAYS_OF_COVER': sql_round(health['DAYS_OF_COVER'].sum(), 2, health['DAYS_OF_COVER'].count()),
+        'CRITICAL_ITEMS_AT_RISK': int((health['IS_CRITICAL_ITEM'] & risk.isin(['OUT_OF_STOCK', 'CRITICAL'])).sum()),
+        'DATA_AS_OF_DATE': health['LATEST_DATE'].max(),
+        'REPORT_GENERATED_TIMESTAMP': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+    }])
+
+
+def _records(frame):
+    """Rows of frame as tuples of Python values (NULL for missing) for executemany"""
+    return list(frame.astype(object).where(frame.notna(), None).itertuples(index=False, name=None))
+
+
+class LocalCursor:
+    """Just enough of a snowflake.connector cursor for the dashboard queries"""
+    
+    def __init__(self, connection, dict_rows=False):
+        self.connection = connection
+        self.dict_rows = dict_rows
+        self.description = None
+        self.rowcount = -1
+        self.sfqid = None
+        self._rows = []
+    
+    def execute(self, query, params=None, _statement_params=None):
+        # Rows are materialized under the lock: one SQLite handle serves
+        # every session, like the shared Snowflake connection
+        with self.connection.lock:
+            cursor = self.connection.sqlite.execute(query.replace('%s', '?'), list(params or []))
+            self.description = cursor.description
+            self._rows = cursor.fetchall() if cursor.description else []
+            self.rowcount = len(self._rows) if cursor.description else cursor.rowcount
+            self.sfqid = f"local-{next(self.connection.query_ids)}"
+        if self.dict_rows:
+            columns = [column[0] for column in self.description]
+            self._rows = [dict(zip(columns, row)) for row in self._rows]
+        return self
+    
+    def executemany(self, query, seq_of_params, _statement_params=None):
+        with self.connection.lock:
+            self.connection.sqlite.executemany(query.replace('%s', '?'), seq_of_params)
+            self.connection.sqlite.commit()
+        return self
+    
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+    
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+    
+    def fetchmany(self, size=1):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+    
+    def fetch_arrow_batches(self):
+        """Remaining rows as pyarrow Tables of ARROW_BATCH_ROWS rows, like the connector's result batches"""
+        columns = [column[0] for column in self.description]
+        rows, self._rows = self._rows, []
+        for start in range(0, len(rows), ARROW_BATCH_ROWS):
+            chunk = rows[start:start + ARROW_BATCH_ROWS]
+            yield pa.Table.from_arrays([pa.array(values) for values in zip(*chunk)], names=columns)
+    
+    def close(self):
+        self._rows = []
+
+
+class LocalDashboardConnection:
+    """Thread-safe, connector-shaped connection to the local ANALYTICS tables"""
+    
+    def __init__(self, warehouse):
+        self.warehouse = warehouse
+        self.lock = threading.Lock()
+        self.query_ids = itertools.count(1)
+        self.sqlite = warehouse.connect(check_same_thread=False)
+        # DATA.DAILY_STOCK_RAW, as the history query names it from the ANALYTICS schema
+        self.sqlite.execute("ATTACH DATABASE ? AS DATA", [str(warehouse.db_path)])
+        self.sqlite.create_function('CONCAT', -1, lambda *parts: ''.join('' if part is None else str(part) for part in parts))
+        self.sqlite.create_function(
+            'DATE_TRUNC', 2,
+            lambda part, value: None if value is None else truncate(part.lower(), value).strftime('%Y-%m-%d'),
+            deterministic=True
+        )
+    
+    def cursor(self, cursor_class=None):
+        """cursor_class (e.g. DictCursor) switches to dict rows"""
+        return LocalCursor(self, dict_rows=cursor_class is not None)
+    
+    def close(self):
+        self.sqlite.close()
+
+
+class LocalWarehouse:
+    """Directory stage plus SQLite database rooted at one folder"""
+    
+    def __init__(self, root):
+        self.root = Path(root)
+        self.stage_dir = self.root / 'stage'
+        self.db_path = self.root / 'stockpulse.db'
+        self.info_path = self.root / 'information_schema.db'
+        self.stage_dir.mkdir(parents=True, exist_ok=True)
+        
+        with self.connect() as conn:
+            conn.execute(DAILY_STOCK_RAW_DDL)
+            conn.execute(DAILY_STOCK_RAW_INDEX)
+            conn.execute(DAILY_STOCK_RAW_PAIR_INDEX)
+            conn.execute(CHANGE_LOG_DDL)
+            for trigger in CHANGE_LOG_TRIGGERS:
+                conn.execute(trigger)
+            conn.execute(ALERT_NOTIFICATIONS_DDL)
+            conn.execute(ALERT_NOTIFICATIONS_INDEX)
+            conn.execute(ALERT_HISTORY_DDL)
+            conn.execute(LOCATION_MASTER_DDL)
+            # Databases created before LOCATION_MASTER had a region
+            if 'region' not in {row[1] for row in conn.execute("PRAGMA table_info(LOCATION_MASTER)")}:
+                conn.execute("ALTER TABLE LOCATION_MASTER ADD COLUMN region VARCHAR(100)")
+            conn.execute(ITEM_MASTER_DDL)
+            conn.execute(TABLES_DDL)
+    
+    def connect(self, check_same_thread=True):
+        """Open a connection to the local database (INFORMATION_SCHEMA attached)"""
+        conn = sqlite3.connect(self.db_path, check_same_thread=check_same_thread)
+        conn.execute("ATTACH DATABASE ? AS INFORMATION_SCHEMA", [str(self.info_path)])
+        return conn
+    
+    def dashboard_connection(self):
+        """Connection the dashboard uses instead of Snowflake"""
+        with self.connect() as conn:
+            built = conn.execute("SELECT COUNT(*) FROM INFORMATION_SCHEMA.TABLES").fetchone()[0]
+        if built < len(DYNAMIC_TABLES):
+            self.refresh_dynamic_tables()
+        return LocalDashboardConnection(self)
+    
+    def refresh_dynamic_tables(self, today=None):
+        """
+        Recompute the ANALYTICS dynamic tables from DAILY_STOCK_RAW
+        
+        Seeds synthetic data first when DAILY_STOCK_RAW is empty. Stamps
+        LAST_ALTERED so the dashboard's refresher notices the change.
+        
+        Returns:
+            Number of location-item rows in DT_STOCK_HEALTH_CLASSIFICATION
+        """
+        
+        with self.connect() as conn:
+            if not conn.execute("SELECT COUNT(*) FROM DAILY_STOCK_RAW").fetchone()[0]:
+                self.seed()
+            raw = pd.read_sql(
+                "SELECT record_date, location_code, location_name, item_code, item_name, item_category, "
+                "issues, closing_stock, unit_of_measure, lead_time_days FROM DAILY_STOCK_RAW",
+                conn, parse_dates=['record_date']
+            )
+            items = pd.read_sql("SELECT * FROM ITEM_MASTER", conn)
+            locations = pd.read_sql("SELECT * FROM LOCATION_MASTER", conn)
+        
+        items['is_critical'] = items['is_critical'].astype(bool)
+        health = stock_health(raw, items if len(items) else None, locations if len(locations) else None, today)
+        tables = {
+            'DT_STOCK_HEALTH_CLASSIFICATION': health,
+            'DT_REORDER_RECOMMENDATIONS': reorder_recommendations(health, today),
+            'DT_LOCATION_RISK_SUMMARY': location_risk_summary(health),
+            'DT_EXECUTIVE_SUMMARY': executive_summary(health),
+        }
+        
+        altered = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
+        with self.connect() as conn:
+            for name, frame in tables.items():
+                frame.to_sql(name, conn, if_exists='replace', index=False)
+                conn.execute(
+                    "INSERT OR REPLACE INTO INFORMATION_SCHEMA.TABLES VALUES ('ANALYTICS', ?, ?)",
+                    [name, altered]
+                )
+            conn.execute("CREATE INDEX IF NOT EXISTS IX_DT_HEALTH_LOCATION ON DT_STOCK_HEALTH_CLASSIFICATION (LOCATION_NAME)")
+        return len(health)
+    
+    def process_alerts(self, today=None, full=False):
+        """
+        Turn the pairs changed since the last run into alert events
+        
+        Re-scores only the location-item pairs in the change log from
+        their DAILY_STOCK_RAW rows, writes NEW, ESCALATED, DOWNGRADED and
+        RESOLVED events to ALERT_NOTIFICATIONS and ALERT_HISTORY and deletes the
+        processed log rows in one transaction, as consuming a stream in a
+        DML transaction advances its offset.
+        
+        Args:
+            today: Scoring date (defaults to today)
+            full: Re-score every pair, to catch changes no new row reports
+                (a pair turning slow-moving as days pass)
+        
+        Returns:
+            Dictionary with the number of re-scored pairs and of each event
+        """
+        
+        today = pd.Timestamp(today or date.today())
+        with self.connect() as conn:
+            last_change = conn.execute("SELECT MAX(change_id) FROM STR_DAILY_STOCK_CHANGES").fetchone()[0] or 0
+            conn.execute("DROP TABLE IF EXISTS temp.CHANGED_PAIRS")
+            if full:
+                conn.execute("CREATE TEMP TABLE CHANGED_PAIRS AS SELECT DISTINCT location_code, item_code FROM DAILY_STOCK_RAW")
+            else:
+                conn.execute(
+                    "CREATE TEMP TABLE CHANGED_PAIRS AS SELECT DISTINCT location_code, item_code "
+                    "FROM STR_DAILY_STOCK_CHANGES WHERE change_id <= ?",
+                    [last_change]
+                )
+            pairs = conn.execute("SELECT COUNT(*) FROM CHANGED_PAIRS").fetchone()[0]
+            
+            raw = pd.read_sql(
+                "SELECT r.record_date, r.location_code, r.location_name, r.item_code, r.item_name, r.item_category, "
+                "r.issues, r.closing_stock, r.unit_of_measure, r.lead_time_days "
+                "FROM CHANGED_PAIRS AS k JOIN DAILY_STOCK_RAW AS r "
+                "ON r.location_code = k.location_code AND r.item_code = k.item_code",
+                conn, parse_dates=['record_date']
+            )
+            open_alerts = pd.read_sql(
+                "SELECT a.alert_id AS ALERT_ID, a.location_code AS LOCATION_CODE, a.item_code AS ITEM_CODE, "
+                "a.alert_type AS ALERT_TYPE "
+                "FROM CHANGED_PAIRS AS k JOIN ALERT_NOTIFICATIONS AS a "
+                "ON a.location_code = k.location_code AND a.item_code = k.item_code "
+                "WHERE NOT a.is_resolved",
+                conn
+            )
+            
+            events = pd.DataFrame(columns=['EVENT'])
+            if len(raw):
+                items = pd.read_sql("SELECT * FROM ITEM_MASTER", conn)
+                locations = pd.read_sql("SELECT * FROM LOCATION_MASTER", conn)
+                items['is_critical'] = items['is_critical'].astype(bool)
+                health = stock_health(raw, items if len(items) else None, locations if len(locations) else None, today)
+                events = delta_alerts.diff(delta_alerts.classify(health), open_alerts)
+            
+            if len(events):
+                # Escalations and downgrades supersede the open alert, resolutions close it
+                closed = events.loc[events['EVENT'] != delta_alerts.NEW, 'OPEN_ALERT_ID']
+                conn.executemany(
+                    "UPDATE ALERT_NOTIFICATIONS SET is_resolved = TRUE, resolved_timestamp = CURRENT_TIMESTAMP "
+                    "WHERE alert_id = ?",
+                    [(int(alert_id),) for alert_id in closed]
+                )
+                raised = events.loc[events['EVENT'] != delta_alerts.RESOLVED, [
+                    'ALERT_TYPE', 'SEVERITY', 'LOCATION_CODE', 'LOCATION_NAME', 'ITEM_CODE', 'ITEM_NAME',
+                    'ITEM_CATEGORY', 'CLOSING_STOCK', 'DAYS_UNTIL_STOCKOUT', 'RECOMMENDED_ACTION', 'ALERT_MESSAGE',
+                ]]
+                conn.executemany(
+                    "INSERT INTO ALERT_NOTIFICATIONS (alert_type, severity, location_code, location_name, item_code, "
+                    "item_name, item_category, current_stock, days_until_stockout, recommended_action, alert_message) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    _records(raised)
+                )
+                history = events.assign(
+                    ALERT_DATE=today.strftime('%Y-%m-%d'),
+                    ALERT_TYPE=events['ALERT_TYPE'].fillna(events['OPEN_ALERT_TYPE']),
+                )
+                conn.executemany(
+                    "INSERT INTO ALERT_HISTORY (alert_date, location_code, item_code, alert_type, severity, "
+                    "alert_event, stock_health_score, days_of_cover) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    _records(history[[
+                        'ALERT_DATE', 'LOCATION_CODE', 'ITEM_CODE', 'ALERT_TYPE', 'SEVERITY', 'EVENT',
+                        'STOCK_HEALTH_SCORE', 'DAYS_OF_COVER',
+                    ]])
+                )
+            conn.execute("DELETE FROM STR_DAILY_STOCK_CHANGES WHERE change_id <= ?", [last_change])
+            conn.execute("DROP TABLE temp.CHANGED_PAIRS")
+        
+        counts = events['EVENT'].value_counts()
+        return {
+            'pairs': pairs,
+            **{event.lower(): int(counts.get(event, 0)) for event in delta_alerts.EVENTS},
+        }
+    
+    def seed(self, n_locations=40, n_items=60, days=90, seed=0, end=None):
+        """
+        Fill DAILY_STOCK_RAW and the master tables with synthetic history
+        
+        Each location-item pair gets its own consumption rate, replenishment
+        cadence and starting stock, so every risk class shows up.
+        
+        Returns:
+            Number of DAILY_STOCK_RAW rows written
+        """
+        
+        rng = np.random.default_rng(seed)
+        end = pd.Timestamp(end or date.today())
+        dates = pd.date_range(end=end, periods=days, freq='D')
+        
+        locations = pd.DataFrame({
+            'location_code': [f"LOC{i:04d}" for i in range(n_locations)],
+            'location_name': [f"{kind} {i:03d}" for i, kind in
+                              zip(range(n_locations), itertools.cycle(['District Hospital', 'Health Centre', 'Warehouse', 'NGO Centre']))],
+            'region': [REGIONS[i * len(REGIONS) // n_locations] for i in range(n_locations)],
+            'priority_level': rng.choice(['HIGH', 'MEDIUM', 'LOW'], n_locations, p=[0.25, 0.5, 0.25]),
+        })
+        items = pd.DataFrame({
+            'item_code': [f"ITM{i:04d}" for i in range(n_items)],
+            'item_name': [f"Item {i:03d}" for i in range(n_items)],
+            'item_category': rng.choice(CATEGORIES, n_items),
+            'unit_cost': rng.lognormal(2.5, 1.0, n_items).round(2),
+            'is_critical': rng.random(n_items) < 0.2,
+            'reorder_point': np.nan,
+            'safety_stock': rng.integers(0, 20, n_items).astype(float),
+            'default_lead_time_days': rng.choice([3, 5, 7, 10, 14], n_items),
+        })
+        
+        pairs = n_locations * n_items
+        rate = rng.lognormal(1.5, 0.8, pairs)
+        # A share of pairs stop moving partway through (slow-moving / overstock)
+        idle_from = np.where(rng.random(pairs) < 0.1, rng.integers(0, days, pairs), days)
+        restock_every = rng.integers(5, 30, pairs)
+        stock = rate * rng.uniform(0, 40, pairs)
+        
+        opening, receipts, issues, closing = (np.empty((days, pairs)) for _ in range(4))
+        for day in range(days):
+            opening[day] = stock
+            received = np.where((day % restock_every == 0) & (day > 0), rate * restock_every, 0)
+            issued = np.where(day < idle_from, rng.poisson(rate), 0).astype(float)
+            issued = np.minimum(issued, stock + received)
+            stock = stock + received - issued
+            receipts[day], issues[day], closing[day] = received, issued, stock
+        
+        location_index = np.repeat(np.arange(n_locations), n_items)
+        item_index = np.tile(np.arange(n_items), n_locations)
+        raw = pd.DataFrame({
+            'record_date': np.repeat(dates.strftime('%Y-%m-%d'), pairs),
+            'location_code': np.tile(locations['location_code'].to_numpy()[location_index], days),
+            'location_name': np.tile(locations['location_name'].to_numpy()[location_index], days),
+            'item_code': np.tile(items['item_code'].to_numpy()[item_index], days),
+            'item_name': np.tile(items['item_name'].to_numpy()[item_index], days),
+            'item_category': np.tile(items['item_category'].to_numpy()[item_index], days),
+            'opening_stock': opening.ravel().round(2),
+            'receipts': receipts.ravel().round(2),
+            'issues': issues.ravel().round(2),
+            'closing_stock': closing.ravel().round(2),
+            'unit_of_measure': 'UNITS',
+            'lead_time_days': np.tile(items['default_lead_time_days'].to_numpy()[item_index], days),
+            'data_source': 'SYNTHETIC',
+        })
+        
+        with self.connect() as conn:
+            conn.execute("DELETE FROM DAILY_STOCK_RAW")
+            conn.execute("DELETE FROM LOCATION_MASTER")
+            conn.execute("DELETE FROM ITEM_MASTER")
+            locations.to_sql('LOCATION_MASTER', conn, if_exists='append', index=False)
+            items.to_sql('ITEM_MASTER', conn, if_exists='append', index=False)
+            raw.to_sql('DAILY_STOCK_RAW', conn, if_exists='append', index=False, chunksize=50000)
+        return len(raw)
+    
+    def put(self, files, prefix):
+        """Copy files into the stage under prefix (the local PUT)"""
+        target = self.stage_dir / prefix
+        target.mkdir(parents=True, exist_ok=True)
+        for file in files:
+            shutil.copy2(file, target / Path(file).name)
+        return sorted(target.iterdir())
+    
+    def list_stage(self, prefix):
+        """List staged files under prefix"""
+        target = self.stage_dir / prefix
+        return sorted(target.iterdir()) if target.exists() else []
+    
+    def purge(self, prefix):
+        """Remove staged files under prefix"""
+        shutil.rmtree(self.stage_dir / prefix, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Seed the local backend and rebuild its dynamic tables")
+    parser.add_argument('root', help="Local warehouse directory")
+    parser.add_argument('--locations', type=int, default=40)
+    parser.add_argument('--items', type=int, default=60)
+    parser.add_argument('--days', type=int, default=90, help="Days of history")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--keep', action='store_true',
+                        help="Only rebuild the dynamic tables from the current DAILY_STOCK_RAW")
+    parser.add_argument('--alerts', choices=['changed', 'all'],
+                        help="Then turn changed (or all) location-item pairs into alert events")
+    args = parser.parse_args(argv)
+    
+    warehouse = LocalWarehouse(args.root)
+    if not args.keep:
+        rows = warehouse.seed(args.locations, args.items, args.days, args.seed)
+        print(f"Seeded {rows:,} DAILY_STOCK_RAW rows")
+    print(f"Rebuilt dynamic tables: {warehouse.refresh_dynamic_tables():,} location-item rows")
+    if args.alerts:
+        events = warehouse.process_alerts(full=args.alerts == 'all')
+        print(f"Re-scored {events['pairs']:,} pairs: {events['new']} new, {events['escalated']} escalated, "
+              f"{events['downgraded']} downgraded, {events['resolved']} resolved alerts")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
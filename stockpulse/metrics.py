@@ -0,0 +1,243 @@
+"""
+StockPulse AI - Render Metrics
+==============================
+Process-wide timings for the dashboard hot path:
+
+- fetch: every get_* call as the page sees it (cache hit, stale or miss)
+- query: the warehouse queries behind them, with rows and bytes returned
+- section: render time of each dashboard section and tab
+
+Percentiles come from a rolling window of recent observations; counts and
+sums are lifetime totals. The registry renders the Prometheus text format,
+which can be served over HTTP or written to a file for a textfile collector.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Innermost dashboard section being rendered (None on background threads)
+_current_section = ContextVar('stockpulse_section', default=None)
+
+# kind -> (Prometheus metric name, label name, help text)
+TIMINGS = {
+    'fetch': ('stockpulse_fetch_seconds', 'function', "get_* call latency seen by the page"),
+    'query': ('stockpulse_query_seconds', 'function', "Warehouse query duration behind get_* calls"),
+    'section': ('stockpulse_section_seconds', 'section', "Dashboard section render time"),
+}
+
+
+def payload_size(value):
+    """(rows, bytes) of a fetch result"""
+    if isinstance(value, pd.DataFrame):
+        return len(value), int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (list, tuple)):
+        if all(isinstance(item, (list, tuple)) for item in value):
+            return sum(len(item) for item in value), sum(sys.getsizeof(item) for item in value)
+        return len(value), sys.getsizeof(value)
+    if value is None:
+        return 0, 0
+    return 1, sys.getsizeof(value)
+
+
+def current_section():
+    """Name of the dashboard section the calling code runs in, if any"""
+    return _current_section.get()
+
+
+class _SectionTimer(ContextDecorator):
+    """Times a with-block, a decorated function or a start()/stop() span"""
+    
+    def __init__(self, registry, kind, name):
+        self.registry = registry
+        self.kind = kind
+        self.name = name
+        self._state = threading.local()
+    
+    def __enter__(self):
+        # Thread-local so one decorated function can run in many sessions at once
+        self._state.token = _current_section.set(self.name)
+        self._state.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        self.registry.observe(self.kind, self.name, time.perf_counter() - self._state.started)
+        _current_section.reset(self._state.token)
+        return False
+    
+    def start(self):
+        return self.__enter__()
+    
+    def stop(self):
+        self.__exit__(None, None, None)
+
+
+class MetricsRegistry:
+    """Rolling timings plus lifetime counters, safe to share across sessions"""
+    
+    def __init__(self, window=2048):
+        self.window = window
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._totals = defaultdict(lambda: [0, 0.0])
+        self._counters = defaultdict(float)
+        self._lock = threading.Lock()
+        self._exporters = set()
+    
+    def observe(self, kind, name, seconds):
+        """Record one timing"""
+        with self._lock:
+            self._samples[(kind, name)].append(seconds)
+            totals = self._totals[(kind, name)]
+            totals[0] += 1
+            totals[1] += seconds
+    
+    def count(self, metric, labels, amount=1):
+        """Add to a counter; labels is a tuple of (name, value) pairs"""
+        with self._lock:
+            self._counters[(metric, labels)] += amount
+    
+    def timed(self, name, kind='section'):
+        """Context manager / decorator timing a dashboard section"""
+        return _SectionTimer(self, kind, name)
+    
+    def record_fetch(self, function, seconds, result):
+        """A get_* call; result is hit, stale, miss, coalesced or snapshot"""
+        self.observe('fetch', function, seconds)
+        self.count('stockpulse_fetch_cache_total', (('function', function), ('result', result)))
+    
+    def record_query(self, function, seconds, value=None, error=False):
+        """A warehouse query issued on behalf of a get_* function"""
+        self.observe('query', function, seconds)
+        if error:
+            self.count('stockpulse_query_errors_total', (('function', function),))
+            return
+        rows, nbytes = payload_size(value)
+        self.count('stockpulse_query_rows_total', (('function', function),), rows)
+        self.count('stockpulse_query_bytes_total', (('function', function),), nbytes)
+    
+    def summary(self, kind):
+        """
+        Percentile table for one timing kind
+        
+        Returns:
+            DataFrame with NAME, COUNT, MEAN_MS, P50_MS, P95_MS, P99_MS, MAX_MS
+            (percentiles over the rolling window, COUNT and MEAN lifetime)
+        """
+        
+        with self._lock:
+            snapshot = {
+                name: (np.array(samples), tuple(self._totals[(k, name)]))
+                for (k, name), samples in self._samples.items() if k == kind
+            }
+        
+        rows = []
+        for name, (samples, (count, total)) in sorted(snapshot.items()):
+            p50, p95, p99 = np.quantile(samples, QUANTILES) * 1000
+            rows.append({
+                'NAME': name,
+                'COUNT': count,
+                'MEAN_MS': total / count * 1000,
+                'P50_MS': p50,
+                'P95_MS': p95,
+                'P99_MS': p99,
+                'MAX_MS': samples.max() * 1000,
+            })
+        return pd.DataFrame(rows, columns=['NAME', 'COUNT', 'MEAN_MS', 'P50_MS', 'P95_MS', 'P99_MS', 'MAX_MS'])
+    
+    def counters(self, metric):
+        """{labels: value} for one counter"""
+        with self._lock:
+            return {labels: value for (name, labels), value in self._counters.items() if name == metric}
+    
+    def to_prometheus(self):
+        """All metrics in the Prometheus text exposition format"""
+        with self._lock:
+            samples = {key: list(values) for key, values in self._samples.items()}
+            totals = {key: tuple(value) for key, value in self._totals.items()}
+            counters = dict(self._counters)
+        
+        lines = []
+        for kind, (metric, label, help_text) in TIMINGS.items():
+            names = sorted(name for k, name in samples if k == kind)
+            if not names:
+                continue
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} summary")
+            for name in names:
+                values = np.array(samples[(kind, name)])
+                for q, value in zip(QUANTILES, np.quantile(values, QUANTILES)):
+                    lines.append(f'{metric}{{{label}="{name}",quantile="{q}"}} {value:.6f}')
+                count, total = totals[(kind, name)]
+                lines.append(f'{metric}_sum{{{label}="{name}"}} {total:.6f}')
+                lines.append(f'{metric}_count{{{label}="{name}"}} {count}')
+        
+        for metric in sorted({name for name, _ in counters}):
+            lines.append(f"# TYPE {metric} counter")
+            for (name, labels), value in sorted(counters.items()):
+                if name == metric:
+                    label_text = ','.join(f'{k}="{v}"' for k, v in labels)
+                    lines.append(f"{metric}{{{label_text}}} {value:g}")
+        return '\n'.join(lines) + '\n'
+    
+    def write_textfile(self, path):
+        """Write the exposition atomically (for node_exporter's textfile collector)"""
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+    
+    def export_textfile(self, path, interval=15):
+        """Rewrite path every interval seconds from a daemon thread (idempotent)"""
+        with self._lock:
+            if ('file', path) in self._exporters:
+                return
+            self._exporters.add(('file', path))
+        
+        def loop():
+            while True:
+                try:
+                    self.write_textfile(path)
+                except OSError:
+                    pass
+                time.sleep(interval)
+        
+        threading.Thread(target=loop, name='stockpulse-metrics-file', daemon=True).start()
+    
+    def serve(self, port, host='0.0.0.0'):
+        """Serve /metrics on port from a daemon thread (idempotent)"""
+        with self._lock:
+            if ('http', port) in self._exporters:
+                return
+            self._exporters.add(('http', port))
+        registry = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = registry.to_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name='stockpulse-metrics-http', daemon=True).start()
+
+
+registry = MetricsRegistry()
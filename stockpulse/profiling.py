@@ -0,0 +1,217 @@
+"""
+StockPulse AI - On-Demand Profiling
+===================================
+Profiles one dashboard rerun or one tab in one session, without touching
+the threads serving other sessions:
+
+- sampling (default): a helper thread snapshots only the profiled
+  thread's stack every few milliseconds and writes a speedscope file plus
+  collapsed stacks (flamegraph.pl / speedscope / inferno input);
+- deterministic: cProfile, which only instruments the thread that
+  enabled it, written as a .prof file (snakeviz, pstats).
+
+Both report the top-N hot functions by self and total time.
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+PROFILE_MODES = ['sampling', 'deterministic']
+
+
+def _frame_label(code):
+    return (code.co_name, os.path.basename(code.co_filename), code.co_firstlineno)
+
+
+class ThreadSampler:
+    """Periodic stack samples of a single thread"""
+    
+    def __init__(self, thread_id, interval=0.002, max_depth=200):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.samples = 0
+        self.elapsed = 0.0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stockpulse-profiler', daemon=True)
+    
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self._started
+    
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and len(stack) < self.max_depth:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                # Root first, as flame graphs draw it
+                self.stacks[tuple(reversed(stack))] += 1
+                self.samples += 1
+
+
+def hot_functions(stacks, interval, top_n=25):
+    """
+    Top-N functions from sampled stacks
+    
+    Returns:
+        DataFrame with FUNCTION, FILE, LINE, SELF_MS, TOTAL_MS, SELF_PCT
+    """
+    
+    own = Counter()
+    total = Counter()
+    for stack, count in stacks.items():
+        own[stack[-1]] += count
+        # Recursive functions count once per sample
+        for label in set(stack):
+            total[label] += count
+    
+    samples = sum(stacks.values()) or 1
+    rows = [
+        {
+            'FUNCTION': name, 'FILE': file, 'LINE': line,
+            'SELF_MS': own[(name, file, line)] * interval * 1000,
+            'TOTAL_MS': count * interval * 1000,
+            'SELF_PCT': own[(name, file, line)] / samples * 100,
+        }
+        for (name, file, line), count in total.items()
+    ]
+    frame = pd.DataFrame(rows, columns=['FUNCTION', 'FILE', 'LINE', 'SELF_MS', 'TOTAL_MS', 'SELF_PCT'])
+    return frame.sort_values(['SELF_MS', 'TOTAL_MS'], ascending=False).head(top_n).reset_index(drop=True)
+
+
+def stats_hot_functions(stats, top_n=25):
+    """Top-N functions from cProfile statistics, same columns as hot_functions()"""
+    total_time = stats.total_tt or 1
+    rows = [
+        {
+            'FUNCTION': name, 'FILE': os.path.basename(file), 'LINE': line,
+            'SELF_MS': tottime * 1000,
+            'TOTAL_MS': cumtime * 1000,
+            'SELF_PCT': tottime / total_time * 100,
+        }
+        for (file, line, name), (_, _, tottime, cumtime, _) in stats.stats.items()
+    ]
+    frame = pd.DataFrame(rows, columns=['FUNCTION', 'FILE', 'LINE', 'SELF_MS', 'TOTAL_MS', 'SELF_PCT'])
+    return frame.sort_values(['SELF_MS', 'TOTAL_MS'], ascending=False).head(top_n).reset_index(drop=True)
+
+
+def write_speedscope(stacks, interval, path, name):
+    """Write sampled stacks in the speedscope file format"""
+    frames = []
+    index = {}
+    samples = []
+    weights = []
+    for stack, count in stacks.items():
+        sample = []
+        for label in stack:
+            if label not in index:
+                index[label] = len(frames)
+                frames.append({'name': label[0], 'file': label[1], 'line': label[2]})
+            sample.append(index[label])
+        samples.append(sample)
+        weights.append(count * interval * 1000)
+    
+    document = {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'shared': {'frames': frames},
+        'profiles': [{
+            'type': 'sampled',
+            'name': name,
+            'unit': 'milliseconds',
+            'startValue': 0,
+            'endValue': sum(weights),
+            'samples': samples,
+            'weights': weights,
+        }],
+        'name': name,
+        'exporter': 'stockpulse.profiling',
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(document, f)
+
+
+def write_collapsed(stacks, path):
+    """Write 'root;child;leaf count' lines for flamegraph.pl and compatible tools"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for stack, count in stacks.items():
+            f.write(';'.join(f"{name} ({file}:{line})" for name, file, line in stack) + f" {count}\n")
+
+
+class ProfileCapture:
+    """
+    Context manager profiling the block it wraps on the current thread
+    
+    After the block, result holds the section, mode, duration, output
+    files and the top-N table.
+    """
+    
+    def __init__(self, section, out_dir, mode='sampling', interval=0.002, top_n=25):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode}")
+        self.section = section
+        self.out_dir = Path(out_dir)
+        self.mode = mode
+        self.interval = interval
+        self.top_n = top_n
+        self.result = None
+    
+    def __enter__(self):
+        self._started = time.perf_counter()
+        if self.mode == 'sampling':
+            self._profiler = ThreadSampler(threading.get_ident(), self.interval).start()
+        else:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self
+    
+    def __exit__(self, *exc):
+        if self.mode == 'sampling':
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+        duration = time.perf_counter() - self._started
+        
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        stem = self.out_dir / f"{self.section.replace('.', '_')}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        if self.mode == 'sampling':
+            # Under GIL contention samples arrive slower than the nominal
+            # interval, so weight each by the measured time per sample
+            per_sample = self._profiler.elapsed / max(self._profiler.samples, 1)
+            files = [stem.with_suffix('.speedscope.json'), stem.with_suffix('.collapsed.txt')]
+            write_speedscope(self._profiler.stacks, per_sample, files[0], self.section)
+            write_collapsed(self._profiler.stacks, files[1])
+            top = hot_functions(self._profiler.stacks, per_sample, self.top_n)
+        else:
+            files = [stem.with_suffix('.prof')]
+            self._profiler.dump_stats(files[0])
+            top = stats_hot_functions(pstats.Stats(self._profiler), self.top_n)
+        
+        self.result = {
+            'section': self.section,
+            'mode': self.mode,
+            'captured_at': datetime.now(),
+            'duration_ms': duration * 1000,
+            'files': [str(path) for path in files],
+            'top': top,
+        }
+        return False
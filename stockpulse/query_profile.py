@@ -0,0 +1,208 @@
+"""
+StockPulse AI - Query Profiling
+===============================
+Tags every dashboard query with a QUERY_TAG naming the calling function
+and dashboard section, and records one profile row per query:
+
+- the app side (query ID, tag, rows, client elapsed time) is captured
+  inline and queued in memory;
+- a background thread flushes the queue in batches, adding the warehouse
+  side (compile, execution and queued times, bytes scanned) from
+  QUERY_HISTORY_BY_SESSION before inserting into
+  MONITORING.DASHBOARD_QUERY_PROFILE.
+
+Offline, FileProfileSink appends the same rows as JSON lines instead.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+
+PROFILE_COLUMNS = [
+    'QUERY_ID', 'QUERY_TAG', 'FUNCTION_NAME', 'DASHBOARD_SECTION', 'STARTED_AT',
+    'CLIENT_ELAPSED_MS', 'ROWS_RETURNED', 'COMPILATION_TIME_MS', 'EXECUTION_TIME_MS',
+    'QUEUED_TIME_MS', 'BYTES_SCANNED', 'WAREHOUSE_NAME',
+]
+
+# Tag used for the profiler's own statements, which are not profiled
+MONITORING_TAG = json.dumps({'app': 'stockpulse', 'function': 'query_profile', 'section': 'monitoring'})
+
+
+def query_tag(function, section):
+    """QUERY_TAG value for a dashboard query (JSON, so it can be parsed in SQL)"""
+    return json.dumps({'app': 'stockpulse', 'function': function, 'section': section or 'background'})
+
+
+class ProfiledCursor:
+    """Connector cursor whose execute() tags and records each statement"""
+    
+    def __init__(self, cursor, function, section_of, profiler=None):
+        """
+        Args:
+            cursor: snowflake.connector cursor
+            function: Name of the calling get_* function
+            section_of: Callable returning the current dashboard section
+            profiler: QueryProfiler receiving one row per statement
+        """
+        
+        self._cursor = cursor
+        self.function = function
+        self.section_of = section_of
+        self.profiler = profiler
+    
+    def execute(self, query, params=None):
+        section = self.section_of()
+        tag = query_tag(self.function, section)
+        started_at = datetime.now(timezone.utc)
+        started = time.perf_counter()
+        # Statement-level parameter: tags this query only, so concurrent
+        # sessions sharing the connection never see each other's tag
+        self._cursor.execute(query, params, _statement_params={'QUERY_TAG': tag})
+        
+        if self.profiler is not None:
+            self.profiler.record({
+                'QUERY_ID': getattr(self._cursor, 'sfqid', None),
+                'QUERY_TAG': tag,
+                'FUNCTION_NAME': self.function,
+                'DASHBOARD_SECTION': section or 'background',
+                'STARTED_AT': started_at.strftime('%Y-%m-%d %H:%M:%S.%f'),
+                'CLIENT_ELAPSED_MS': round((time.perf_counter() - started) * 1000, 3),
+                'ROWS_RETURNED': getattr(self._cursor, 'rowcount', None),
+            })
+        return self
+    
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class QueryProfiler:
+    """Bounded in-memory queue flushed to a sink in batches by one thread"""
+    
+    def __init__(self, sink, batch_size=200, flush_interval=30, max_pending=10000):
+        """
+        Args:
+            sink: Object with write(rows) persisting a list of profile dicts
+            batch_size: Rows per sink write; a full batch flushes early
+            flush_interval: Seconds between flushes otherwise
+            max_pending: Oldest rows are dropped beyond this (sink down)
+        """
+        
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.dropped = 0
+        self.last_error = None
+        self._pending = deque()
+        self._max_pending = max_pending
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name='stockpulse-query-profile', daemon=True)
+        self._thread.start()
+    
+    def record(self, row):
+        """Queue one row; never blocks on the sink"""
+        with self._lock:
+            if len(self._pending) >= self._max_pending:
+                self._pending.popleft()
+                self.dropped += 1
+            self._pending.append(row)
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wake.set()
+    
+    def flush(self):
+        """Write everything queued so far; returns the number of rows written"""
+        written = 0
+        while True:
+            with self._lock:
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            if not batch:
+                return written
+            try:
+                self.sink.write(batch)
+            except Exception as e:
+                self.last_error = str(e)
+                with self._lock:
+                    # Retry on the next flush, ahead of newer rows
+                    self._pending.extendleft(reversed(batch))
+                return written
+            self.last_error = None
+            written += len(batch)
+            self.written += len(batch)
+    
+    def _loop(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+
+class SnowflakeProfileSink:
+    """Adds QUERY_HISTORY statistics and inserts into MONITORING.DASHBOARD_QUERY_PROFILE"""
+    
+    def __init__(self, connect, table='MONITORING.DASHBOARD_QUERY_PROFILE'):
+        """
+        Args:
+            connect: Callable returning the Snowflake connection the
+                profiled queries ran on (QUERY_HISTORY_BY_SESSION only
+                sees that session)
+            table: Target table
+        """
+        
+        self.connect = connect
+        self.table = table
+    
+    def write(self, rows):
+        conn = self.connect()
+        cursor = conn.cursor()
+        try:
+            query_ids = [row['QUERY_ID'] for row in rows if row.get('QUERY_ID')]
+            stats = {}
+            if query_ids:
+                placeholders = ','.join(['%s'] * len(query_ids))
+                cursor.execute(f"""
+                    SELECT
+                        QUERY_ID,
+                        COMPILATION_TIME,
+                        EXECUTION_TIME,
+                        QUEUED_PROVISIONING_TIME + QUEUED_REPAIR_TIME + QUEUED_OVERLOAD_TIME,
+                        BYTES_SCANNED,
+                        WAREHOUSE_NAME
+                    FROM TABLE(INFORMATION_SCHEMA.QUERY_HISTORY_BY_SESSION(RESULT_LIMIT => 10000))
+                    WHERE QUERY_ID IN ({placeholders})
+                """, query_ids, _statement_params={'QUERY_TAG': MONITORING_TAG})
+                stats = {row[0]: row[1:] for row in cursor.fetchall()}
+            
+            values = []
+            for row in rows:
+                compile_ms, execution_ms, queued_ms, bytes_scanned, warehouse = stats.get(row.get('QUERY_ID'), (None,) * 5)
+                values.append((
+                    row['QUERY_ID'], row['QUERY_TAG'], row['FUNCTION_NAME'], row['DASHBOARD_SECTION'],
+                    row['STARTED_AT'], row['CLIENT_ELAPSED_MS'], row['ROWS_RETURNED'],
+                    compile_ms, execution_ms, queued_ms, bytes_scanned, warehouse
+                ))
+            cursor.executemany(
+                f"INSERT INTO {self.table} ({', '.join(PROFILE_COLUMNS)}) "
+                f"VALUES ({', '.join(['%s'] * len(PROFILE_COLUMNS))})",
+                values,
+                _statement_params={'QUERY_TAG': MONITORING_TAG}
+            )
+        finally:
+            cursor.close()
+
+
+class FileProfileSink:
+    """Local stand-in: appends profile rows to a JSON-lines file"""
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+    
+    def write(self, rows):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps({column: row.get(column) for column in PROFILE_COLUMNS}) + '\n')
@@ -0,0 +1,101 @@
+"""
+StockPulse AI - Ranking Index
+=============================
+Pre-sorted row orders of one snapshot, per measure, over all rows and
+within each group (risk classification). Top-k and bottom-k queries for
+any k, page or value window are array slices of an existing order; a
+query across several groups merges only the heads of their orders.
+"""
+
+import numpy as np
+
+from stockpulse.analytics import with_numeric
+
+
+class RankingIndex:
+    """Sorted positions of a frame's rows by each ranked measure"""
+    
+    def __init__(self, frame, measures, group=None):
+        """
+        Args:
+            frame: Rows to rank (kept as is and returned by queries)
+            measures: Numeric columns to rank by
+            group: Optional column whose values get their own orders
+        """
+        
+        self.frame = frame.reset_index(drop=True)
+        self.measures = list(measures)
+        self.group = group
+        numeric = with_numeric(self.frame, self.measures)
+        
+        members = {None: np.arange(len(self.frame))}
+        if group is not None:
+            codes, uniques = self.frame[group].factorize()
+            for code, value in enumerate(uniques):
+                members[value] = np.flatnonzero(codes == code)
+        
+        # (measure, group value) -> (positions, values), ascending, NaN dropped
+        self._orders = {}
+        for measure in self.measures:
+            values = numeric[measure].to_numpy(dtype=float)
+            for key, rows in members.items():
+                rows = rows[~np.isnan(values[rows])]
+                order = rows[np.argsort(values[rows], kind='stable')]
+                self._orders[(measure, key)] = (order, values[order])
+    
+    def _window(self, measure, key, between):
+        if (measure, key) not in self._orders:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        order, values = self._orders[(measure, key)]
+        if between is None:
+            return order, values
+        low, high = between
+        start = 0 if low is None else np.searchsorted(values, low, side='left')
+        stop = len(values) if high is None else np.searchsorted(values, high, side='right')
+        return order[start:stop], values[start:stop]
+    
+    def positions(self, measure, k=5, offset=0, largest=True, within=None, between=None):
+        """
+        Row positions of ranks offset .. offset+k-1
+        
+        Args:
+            measure: Ranked column
+            k: Number of rows
+            offset: Rows to skip (page * k for paging)
+            largest: Rank from the top (True) or the bottom
+            within: Group value or list of values; None ranks all rows
+            between: Optional (low, high) inclusive value window
+        """
+        
+        depth = offset + k
+        keys = [None] if within is None else within if isinstance(within, (list, tuple, set)) else [within]
+        heads = []
+        for key in keys:
+            order, values = self._window(measure, key, between)
+            if largest:
+                order, values = order[::-1][:depth], values[::-1][:depth]
+            else:
+                order, values = order[:depth], values[:depth]
+            heads.append((order, values))
+        
+        if len(heads) == 1:
+            order = heads[0][0]
+        else:
+            # Merge the groups' heads only (at most depth rows each)
+            order = np.concatenate([head[0] for head in heads])
+            values = np.concatenate([head[1] for head in heads])
+            order = order[np.argsort(-values if largest else values, kind='stable')]
+        return order[offset:depth]
+    
+    def top(self, measure, k=5, offset=0, within=None, between=None):
+        """Rows with the largest values of measure, best first"""
+        return self.frame.iloc[self.positions(measure, k, offset, True, within, between)]
+    
+    def bottom(self, measure, k=5, offset=0, within=None, between=None):
+        """Rows with the smallest values of measure, worst first"""
+        return self.frame.iloc[self.positions(measure, k, offset, False, within, between)]
+    
+    def size(self, measure, within=None, between=None):
+        """Number of ranked rows a query can page through"""
+        keys = [None] if within is None else within if isinstance(within, (list, tuple, set)) else [within]
+        return sum(len(self._window(measure, key, between)[0]) for key in keys)
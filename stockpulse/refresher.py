@@ -0,0 +1,138 @@
+"""
+StockPulse AI - Background Refresher
+====================================
+One polling thread per process. It asks the warehouse for the current data
+version of each dataset at the shortest interval any open dashboard asked
+for, runs the refresh callback once for whatever changed, and records a
+generation counter that sessions compare against in memory.
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class Refresher:
+    """Shared data-version poller for all dashboard sessions"""
+    
+    def __init__(self, probe, on_change=None, min_interval=30, idle_wait=5, history=256):
+        """
+        Args:
+            probe: Callable returning {dataset: version}; raising skips a cycle
+            on_change: Callable receiving the set of changed datasets, run
+                on the refresher thread before sessions are notified
+            min_interval: Lower bound on the warehouse polling interval (s)
+            idle_wait: How often to re-check for subscribers when none exist
+            history: Number of change events kept for changed_since()
+        """
+        
+        self.probe = probe
+        self.on_change = on_change
+        self.min_interval = min_interval
+        self.idle_wait = idle_wait
+        self.generation = 0
+        self.last_poll = None
+        self.last_error = None
+        self._versions = {}
+        self._changes = deque(maxlen=history)
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+    
+    @property
+    def versions(self):
+        with self._lock:
+            return dict(self._versions)
+    
+    def start(self):
+        """Start the polling thread (idempotent)"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name='stockpulse-refresher', daemon=True)
+                self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+    
+    def subscribe(self, session_id, interval):
+        """Register or heartbeat a session that wants data every interval seconds"""
+        with self._lock:
+            previous = self._subscribers.get(session_id)
+            self._subscribers[session_id] = (max(interval, self.min_interval), time.time())
+        # A shorter interval takes effect now instead of after the current wait
+        if previous is None or interval < previous[0]:
+            self._wake.set()
+    
+    def unsubscribe(self, session_id):
+        with self._lock:
+            self._subscribers.pop(session_id, None)
+    
+    def poll_interval(self):
+        """Shortest interval among live subscribers, or None when nobody is listening"""
+        now = time.time()
+        with self._lock:
+            # Sessions that stopped heartbeating (tab closed) expire after 3 intervals
+            expired = [sid for sid, (interval, seen) in self._subscribers.items() if now - seen > 3 * interval]
+            for sid in expired:
+                del self._subscribers[sid]
+            intervals = [interval for interval, _ in self._subscribers.values()]
+        return min(intervals) if intervals else None
+    
+    def changed_since(self, generation):
+        """Datasets changed after the given generation"""
+        with self._lock:
+            changed = set()
+            for event_generation, datasets in self._changes:
+                if event_generation > generation:
+                    changed |= datasets
+            return changed
+    
+    def poll(self):
+        """Probe versions once and propagate changes; returns the changed datasets"""
+        try:
+            current = self.probe()
+        except Exception as e:
+            self.last_error = str(e)
+            return set()
+        self.last_error = None
+        self.last_poll = time.time()
+        
+        with self._lock:
+            first_probe = not self._versions
+            changed = {name for name, version in current.items() if self._versions.get(name) != version}
+            self._versions = dict(current)
+        # The first probe only establishes the baseline
+        if first_probe or not changed:
+            return set()
+        
+        if self.on_change is not None:
+            try:
+                self.on_change(changed)
+            except Exception as e:
+                self.last_error = str(e)
+        with self._lock:
+            self.generation += 1
+            self._changes.append((self.generation, frozenset(changed)))
+        return changed
+    
+    def _loop(self):
+        next_poll = 0.0
+        while not self._stopped.is_set():
+            interval = self.poll_interval()
+            if interval is None:
+                self._wake.wait(self.idle_wait)
+                self._wake.clear()
+                continue
+            
+            now = time.time()
+            if now >= next_poll:
+                self.poll()
+                next_poll = time.time() + interval
+                continue
+            next_poll = min(next_poll, (self.last_poll or now) + interval)
+            self._wake.wait(max(next_poll - now, 0))
+            self._wake.clear()
@@ -0,0 +1,232 @@
+"""
+StockPulse AI - Report Jobs
+===========================
+Builds the multi-sheet executive reports in a worker pool. A job is keyed
+by (report, format, data version), so a report requested by several users
+is built once and the finished file is served to everyone from memory.
+"""
+
+import html
+import io
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from stockpulse.exports import CHUNK_ROWS, write_sheet
+
+REPORT_FORMATS = {
+    'xlsx': ('Excel workbook', 'xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'html': ('HTML report', 'html', 'text/html'),
+}
+
+CRITICAL_RISKS = ['CRITICAL', 'OUT_OF_STOCK']
+
+
+def location_performance(heatmap):
+    """Average health, item count and attention count per location"""
+    return heatmap.groupby('LOCATION_NAME', observed=True).agg({
+        'STOCK_HEALTH_SCORE': 'mean',
+        'ITEM_NAME': 'count',
+        'REQUIRES_ATTENTION': 'sum'
+    }).round(2).reset_index()
+
+
+def category_performance(heatmap):
+    """Average health and critical count per item category"""
+    frame = heatmap.assign(
+        IS_CRITICAL_RISK=heatmap['RISK_CLASSIFICATION'].isin(CRITICAL_RISKS)
+    )
+    return frame.groupby('ITEM_CATEGORY', observed=True).agg(
+        AVG_HEALTH_SCORE=('STOCK_HEALTH_SCORE', 'mean'),
+        ITEMS=('ITEM_NAME', 'count'),
+        CRITICAL_ITEMS=('IS_CRITICAL_RISK', 'sum')
+    ).round(2).reset_index()
+
+
+def executive_summary_sheets(summary, heatmap):
+    """Sheets of the Executive Summary report"""
+    sheets = {}
+    if summary:
+        sheets['Summary'] = pd.DataFrame(
+            [(key, value) for key, value in summary.items()], columns=['METRIC', 'VALUE']
+        )
+    if not heatmap.empty:
+        risk = heatmap['RISK_CLASSIFICATION'].value_counts().rename_axis('RISK_CLASSIFICATION')
+        sheets['Risk Breakdown'] = risk.reset_index(name='ITEMS')
+        sheets['Locations'] = location_performance(heatmap)
+        sheets['Categories'] = category_performance(heatmap)
+    return sheets
+
+
+def critical_items_sheets(summary, heatmap):
+    """Sheets of the Critical Items report"""
+    critical = heatmap[heatmap['RISK_CLASSIFICATION'].isin(CRITICAL_RISKS)]
+    return {'Critical Items': critical.sort_values('STOCK_HEALTH_SCORE')}
+
+
+def performance_sheets(summary, heatmap):
+    """Sheets of the Performance Metrics report"""
+    return {
+        'Location Performance': location_performance(heatmap),
+        'Category Performance': category_performance(heatmap),
+    }
+
+
+# report key -> (title, sheet builder)
+REPORTS = {
+    'executive_summary': ('Executive Summary', executive_summary_sheets),
+    'critical_items': ('Critical Items', critical_items_sheets),
+    'performance': ('Location Performance', performance_sheets),
+}
+
+
+def render_xlsx(sheets, progress):
+    """Write sheets into one workbook, reporting progress per block of rows"""
+    from openpyxl import Workbook
+    
+    workbook = Workbook(write_only=True)
+    total_rows = max(sum(len(df) for df in sheets.values()), 1)
+    done = 0
+    for name, df in sheets.items():
+        for start in range(0, max(len(df), 1), CHUNK_ROWS):
+            chunk = df.iloc[start:start + CHUNK_ROWS]
+            if start == 0:
+                sheet = write_sheet(workbook, chunk, name)
+            else:
+                for row in chunk.itertuples(index=False, name=None):
+                    sheet.append([None if pd.isna(value) else value for value in row])
+            done += len(chunk)
+            progress(0.1 + 0.8 * done / total_rows, f"Writing {name}")
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def render_html(title, sheets, version, progress):
+    """Render sheets as one standalone HTML document"""
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>",
+        f"<title>StockPulse AI - {html.escape(title)}</title>",
+        "<style>body{font-family:Inter,Arial,sans-serif;margin:2rem;color:#1f2937}"
+        "table{border-collapse:collapse;margin-bottom:2rem}"
+        "th,td{border:1px solid #d1d5db;padding:4px 8px;text-align:left}"
+        "th{background:#667eea;color:#fff}</style></head><body>",
+        f"<h1>📦 StockPulse AI - {html.escape(title)}</h1>",
+        f"<p>Generated {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} · data version {html.escape(str(version))}</p>",
+    ]
+    for i, (name, df) in enumerate(sheets.items(), start=1):
+        parts.append(f"<h2>{html.escape(name)}</h2>")
+        parts.append(df.to_html(index=False, na_rep='', border=0))
+        progress(0.1 + 0.8 * i / max(len(sheets), 1), f"Rendering {name}")
+    parts.append("</body></html>")
+    return "".join(parts).encode('utf-8')
+
+
+class ReportJob:
+    """State of one report build"""
+    
+    def __init__(self, report, fmt, version):
+        self.report = report
+        self.fmt = fmt
+        self.version = version
+        self.status = 'queued'
+        self.progress = 0.0
+        self.message = 'Queued'
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+    
+    @property
+    def title(self):
+        return REPORTS[self.report][0]
+    
+    @property
+    def active(self):
+        return self.status in ('queued', 'running')
+    
+    @property
+    def file_name(self):
+        _, extension, _ = REPORT_FORMATS[self.fmt]
+        return f"{self.report}_{datetime.now().strftime('%Y%m%d')}.{extension}"
+    
+    @property
+    def mime(self):
+        return REPORT_FORMATS[self.fmt][2]
+    
+    def update(self, progress, message):
+        self.progress = min(max(progress, 0.0), 1.0)
+        self.message = message
+
+
+class ReportManager:
+    """Worker pool plus registry of report jobs shared by all sessions"""
+    
+    def __init__(self, max_workers=2, max_jobs=24):
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='stockpulse-report')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, report, fmt, version):
+        """Existing job for this report and data version, if any"""
+        with self._lock:
+            return self._jobs.get((report, fmt, version))
+    
+    def submit(self, report, fmt, version, summary, heatmap):
+        """
+        Queue a report build unless one already exists for this data version
+        
+        Args:
+            report: Key of REPORTS
+            fmt: Key of REPORT_FORMATS
+            version: Data version the inputs were read at
+            summary: Executive summary row (dict)
+            heatmap: Stock health frame
+        
+        Returns:
+            ReportJob (new, in progress or finished)
+        """
+        
+        key = (report, fmt, version)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status != 'failed':
+                self._jobs.move_to_end(key)
+                return job
+            job = ReportJob(report, fmt, version)
+            self._jobs[key] = job
+            self._evict()
+        self._executor.submit(self._run, job, summary, heatmap)
+        return job
+    
+    def _run(self, job, summary, heatmap):
+        job.status = 'running'
+        try:
+            title, sheet_builder = REPORTS[job.report]
+            job.update(0.05, 'Preparing data')
+            sheets = sheet_builder(summary, heatmap)
+            if job.fmt == 'xlsx':
+                job.result = render_xlsx(sheets, job.update)
+            else:
+                job.result = render_html(title, sheets, job.version, job.update)
+            job.update(1.0, 'Ready')
+            job.status = 'done'
+        except Exception as e:
+            job.error = str(e)
+            job.message = f"Failed: {str(e)}"
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
+    
+    def _evict(self):
+        # Drop the oldest finished jobs; running ones are never evicted
+        for key in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if not self._jobs[key].active:
+                del self._jobs[key]
@@ -0,0 +1,140 @@
+"""
+StockPulse AI - Outage Handling
+===============================
+Circuit breaker and last-known-good snapshots for the warehouse fetches.
+
+After a run of consecutive connectivity failures the breaker opens: calls
+fail immediately instead of waiting out the connector timeout, and a
+background thread probes the warehouse until it answers again. While it is
+open the app serves each fetch's last successful result from disk. Query
+errors (bad SQL, a missing table, invalid arguments) pass through without
+counting, since the warehouse answered.
+"""
+
+import hashlib
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the warehouse while the breaker is open"""
+
+
+class WarehouseUnavailableError(RuntimeError):
+    """Raised when no warehouse connection could be opened"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker with background recovery probing"""
+    
+    def __init__(self, probe, failure_threshold=3, probe_interval=15, outage_errors=(Exception,)):
+        """
+        Args:
+            probe: Cheap callable that raises while the warehouse is down
+            failure_threshold: Consecutive failures that open the breaker
+            probe_interval: Seconds between recovery probes while open
+            outage_errors: Exception types that count as failures; any
+                other exception is re-raised without being recorded
+        """
+        
+        self.probe = probe
+        self.outage_errors = outage_errors
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.failures = 0
+        self.opened_at = None
+        self.last_success = None
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._closed.set()
+    
+    @property
+    def is_open(self):
+        return not self._closed.is_set()
+    
+    def call(self, fn, *args, **kwargs):
+        """Run fn unless the breaker is open, recording the outcome"""
+        if self.is_open:
+            raise CircuitOpenError(f"Warehouse unavailable since {time.strftime('%H:%M:%S', time.localtime(self.opened_at))}: {self.last_error}")
+        try:
+            result = fn(*args, **kwargs)
+        except self.outage_errors as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+        return result
+    
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.last_success = time.time()
+    
+    def record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)
+            if self.failures < self.failure_threshold or self.is_open:
+                return
+            self.opened_at = time.time()
+            self._closed.clear()
+        threading.Thread(target=self._probe_loop, name='stockpulse-breaker-probe', daemon=True).start()
+    
+    def _probe_loop(self):
+        # Only this thread touches the warehouse until it answers again
+        while self.is_open:
+            time.sleep(self.probe_interval)
+            try:
+                self.probe()
+            except Exception as e:
+                self.last_error = str(e)
+                continue
+            with self._lock:
+                self.failures = 0
+                self.opened_at = None
+                self.last_success = time.time()
+                self._closed.set()
+
+
+class SnapshotStore:
+    """Last successful result of each fetch, pickled under one directory"""
+    
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+    
+    def _path(self, namespace, key):
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:16]
+        return self.root / f"{namespace}-{digest}.pkl"
+    
+    def save(self, namespace, key, value):
+        """Persist value atomically (a reader never sees a partial file)"""
+        path = self._path(namespace, key)
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        with open(tmp, 'wb') as f:
+            pickle.dump({'saved_at': time.time(), 'value': value}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    
+    def load(self, namespace, key):
+        """(value, saved_at) of the last snapshot, or None"""
+        try:
+            with open(self._path(namespace, key), 'rb') as f:
+                snapshot = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        return snapshot['value'], snapshot['saved_at']
+    
+    def sizes(self):
+        """{namespace: bytes on disk} over every stored snapshot"""
+        sizes = {}
+        for path in self.root.glob('*.pkl'):
+            try:
+                size = path.stat().st_size
+            except OSError:
+                continue
+            namespace = path.name.rsplit('-', 1)[0]
+            sizes[namespace] = sizes.get(namespace, 0) + size
+        return sizes
@@ -0,0 +1,364 @@
+"""
+StockPulse AI - Scheduled Reports
+=================================
+Headless report run for cron jobs and ops pipelines:
+
+    read one snapshot (health + reorder rows) -> split by region -> build
+    every report of every region in a worker pool -> write the files and a
+    manifest -> optionally PUT them to EXPORT_STAGE
+
+The reports come from the same analytics and sheet builders as the
+dashboard, so this module never imports Streamlit or Plotly. Every report
+of a run is computed from the rows read once at the start; on Snowflake
+both reads are pinned to the same instant with time travel.
+
+Usage:
+    python -m stockpulse.scheduled_reports reports/
+    python -m stockpulse.scheduled_reports reports/ --format xlsx parquet --stage nightly
+    python -m stockpulse.scheduled_reports reports/ --local .stockpulse/local
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from stockpulse import analytics
+from stockpulse.batches import fetch_frame
+from stockpulse.cube import StockCube
+from stockpulse.exports import EXPORT_FORMATS, build_export
+from stockpulse.reports import (
+    REPORT_FORMATS, critical_items_sheets, executive_summary_sheets, performance_sheets, render_html, render_xlsx,
+)
+from stockpulse.schema import NAME, SCHEMAS
+
+EXPORT_STAGE = 'STOCKPULSE_AI.DATA.EXPORT_STAGE'
+
+# Pseudo-region of the reports over every location
+ALL_REGIONS = 'All Regions'
+
+# Region of locations without one in LOCATION_MASTER
+UNASSIGNED = 'Unassigned'
+
+# Multi-sheet formats write one file per report, the others one per sheet
+FORMATS = {**EXPORT_FORMATS, **REPORT_FORMATS}
+
+# {at} is the time-travel clause pinning both reads to one instant
+HEALTH_QUERY = f"""
+    SELECT
+        h.LOCATION_NAME,
+        h.ITEM_NAME,
+        h.ITEM_CATEGORY,
+        h.CLOSING_STOCK AS CURRENT_STOCK,
+        h.STOCK_HEALTH_SCORE,
+        h.RISK_CLASSIFICATION,
+        h.DAYS_OF_COVER,
+        h.DAYS_UNTIL_STOCKOUT,
+        h.AVG_DAILY_ISSUE,
+        h.IS_CRITICAL_ITEM,
+        h.REQUIRES_ATTENTION,
+        COALESCE(l.REGION, '{UNASSIGNED}') AS REGION
+    FROM DT_STOCK_HEALTH_CLASSIFICATION {{at}} h
+    LEFT JOIN DATA.LOCATION_MASTER l ON l.LOCATION_CODE = h.LOCATION_CODE
+    ORDER BY h.STOCK_HEALTH_SCORE ASC, h.LOCATION_NAME, h.ITEM_NAME
+"""
+
+REORDERS_QUERY = f"""
+    SELECT
+        r.LOCATION_NAME,
+        r.ITEM_NAME,
+        r.ITEM_CATEGORY,
+        r.CURRENT_STOCK,
+        r.AVG_DAILY_ISSUE,
+        r.SUGGESTED_REORDER_QUANTITY,
+        r.ESTIMATED_ORDER_VALUE,
+        r.PROCUREMENT_PRIORITY_SCORE,
+        r.URGENCY_SCORE,
+        r.RECOMMENDED_ACTION_DATE,
+        r.IS_CRITICAL_ITEM,
+        r.DAYS_UNTIL_STOCKOUT,
+        r.RISK_CLASSIFICATION,
+        COALESCE(l.REGION, '{UNASSIGNED}') AS REGION
+    FROM DT_REORDER_RECOMMENDATIONS {{at}} r
+    LEFT JOIN DATA.LOCATION_MASTER l ON l.LOCATION_CODE = r.LOCATION_CODE
+    ORDER BY r.PROCUREMENT_PRIORITY_SCORE DESC
+"""
+
+# Columns rounded to 2 decimals in exports, as the dashboard's download buttons do
+ROUND_COLUMNS = [
+    'CURRENT_STOCK', 'AVG_DAILY_ISSUE', 'DAYS_OF_COVER', 'STOCK_HEALTH_SCORE', 'SUGGESTED_REORDER_QUANTITY',
+    'ESTIMATED_ORDER_VALUE', 'PROCUREMENT_PRIORITY_SCORE', 'URGENCY_SCORE', 'DAYS_UNTIL_STOCKOUT',
+]
+
+
+class Snapshot:
+    """Health and reorder rows of one read, with the cube of the health rows"""
+    
+    def __init__(self, health, reorders, taken_at):
+        self.health = health
+        self.reorders = reorders
+        self.taken_at = taken_at
+        self.cube = StockCube.from_heatmap(health)
+    
+    def by_region(self):
+        """Region -> Snapshot of its locations, ALL_REGIONS first"""
+        reorders = dict(list(self.reorders.groupby('REGION', observed=True)))
+        regions = {ALL_REGIONS: self}
+        for region, health in self.health.groupby('REGION', observed=True):
+            regions[region] = Snapshot(health, reorders.get(region, self.reorders.iloc[:0]), self.taken_at)
+        return regions
+
+
+def read_snapshot(conn, at=None):
+    """
+    Read the health and reorder rows once
+    
+    Args:
+        conn: Snowflake connection (ANALYTICS schema) or local dashboard connection
+        at: Snowflake timestamp both reads are pinned to (None: current state)
+    
+    Returns:
+        Snapshot
+    """
+    
+    clause = "AT(TIMESTAMP => %s::TIMESTAMP_LTZ)" if at else ""
+    params = [at] if at else []
+    frames = []
+    for query, dataset in [(HEALTH_QUERY, 'heatmap'), (REORDERS_QUERY, 'reorders')]:
+        cursor = conn.cursor()
+        cursor.execute(query.format(at=clause), params)
+        frames.append(fetch_frame(cursor, {**SCHEMAS[dataset], 'REGION': NAME}))
+        cursor.close()
+    return Snapshot(*frames, taken_at=at or datetime.now().isoformat())
+
+
+def reorder_sheets(snapshot):
+    """Every reorder recommendation, highest procurement priority first"""
+    return {'Reorders': snapshot.reorders}
+
+
+def transfer_sheets(snapshot):
+    """Every overstock -> critical transfer between the snapshot's locations"""
+    return {'Transfers': analytics.transfer_plan(snapshot.health, limit=len(snapshot.health))}
+
+
+def critical_sheets(snapshot):
+    """Critical and out-of-stock rows, least healthy first"""
+    return critical_items_sheets(None, snapshot.health)
+
+
+def location_performance_sheets(snapshot):
+    """Health and attention counts per location and per category"""
+    return performance_sheets(None, snapshot.health)
+
+
+def recommendation_sheets(snapshot):
+    """AI Smart Recommendations of the snapshot"""
+    recommendations = analytics.smart_recommendations(snapshot.cube) if len(snapshot.cube) else []
+    return {'Recommendations': pd.DataFrame(recommendations, columns=['priority', 'action', 'reason', 'impact'])}
+
+
+def executive_sheets(snapshot):
+    """Summary metrics of the snapshot with its risk, location and category breakdowns"""
+    summary = snapshot.cube.summary() if len(snapshot.cube) else None
+    return executive_summary_sheets(summary, snapshot.health)
+
+
+# report key -> (title, sheet builder taking a Snapshot)
+SCHEDULED_REPORTS = {
+    'executive_summary': ('Executive Summary', executive_sheets),
+    'reorders': ('Reorder Recommendations', reorder_sheets),
+    'transfers': ('Stock Transfers', transfer_sheets),
+    'critical_items': ('Critical Items', critical_sheets),
+    'location_performance': ('Location Performance', location_performance_sheets),
+    'recommendations': ('Smart Recommendations', recommendation_sheets),
+}
+
+
+def slug(name):
+    """File-name form of a region, report or sheet name"""
+    return re.sub(r'[^a-z0-9]+', '_', str(name).lower()).strip('_') or 'unnamed'
+
+
+def _no_progress(fraction, message):
+    pass
+
+
+def write_report(directory, report, snapshot, formats):
+    """
+    Build one report of one region and write it under directory in each format
+    
+    Returns:
+        Paths written (one per report, or one per sheet for table formats)
+    """
+    
+    title, builder = SCHEDULED_REPORTS[report]
+    sheets = builder(snapshot)
+    files = {}
+    for fmt in formats:
+        extension = FORMATS[fmt][1]
+        if fmt in REPORT_FORMATS:
+            if fmt == 'xlsx':
+                data = render_xlsx(sheets, _no_progress)
+            else:
+                data = render_html(title, sheets, snapshot.taken_at, _no_progress)
+            files[directory / f"{report}.{extension}"] = data
+        else:
+            for sheet, df in sheets.items():
+                files[directory / f"{report}__{slug(sheet)}.{extension}"] = build_export(df, fmt, round_columns=ROUND_COLUMNS)
+    for path, data in files.items():
+        path.write_bytes(data)
+    return list(files)
+
+
+def _build(out_dir, region, report, snapshot, formats):
+    """Manifest entry of one (region, report) job, run in a worker process"""
+    started = time.perf_counter()
+    entry = {'region': region, 'report': report}
+    try:
+        paths = write_report(out_dir / slug(region), report, snapshot, formats)
+    except Exception as e:
+        return {**entry, 'error': f"{type(e).__name__}: {e}"}
+    return {
+        **entry,
+        'files': [path.relative_to(out_dir).as_posix() for path in paths],
+        'bytes': sum(path.stat().st_size for path in paths),
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def run_reports(snapshot, out_dir, formats=('xlsx',), reports=None, regions=None, workers=None):
+    """
+    Write every report of every region in a process pool
+    
+    Rendering workbooks and HTML is pure Python and holds the GIL, so the
+    (region, report) jobs run in worker processes; each job builds its
+    sheets once and renders them in every format.
+    
+    Args:
+        snapshot: Snapshot read once for the run
+        out_dir: Run directory; each region gets a subdirectory
+        formats: Keys of FORMATS
+        reports: Keys of SCHEDULED_REPORTS (None: all)
+        regions: Region names (None: every region plus ALL_REGIONS)
+        workers: Worker processes (None: one per CPU)
+    
+    Returns:
+        Manifest dictionary (also written to out_dir/manifest.json)
+    """
+    
+    out_dir = Path(out_dir)
+    by_region = snapshot.by_region()
+    if regions is not None:
+        by_region = {region: part for region, part in by_region.items() if region in regions}
+    for region in by_region:
+        (out_dir / slug(region)).mkdir(parents=True, exist_ok=True)
+    
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_build, out_dir, region, report, part, list(formats))
+            for region, part in by_region.items()
+            for report in (reports or SCHEDULED_REPORTS)
+        ]
+        artifacts = [future.result() for future in futures]
+    
+    manifest = {
+        'snapshot_at': snapshot.taken_at,
+        'generated_at': datetime.now().isoformat(),
+        'rows': {'health': len(snapshot.health), 'reorders': len(snapshot.reorders)},
+        'regions': {
+            region: {'directory': slug(region), 'health_rows': len(part.health), 'reorder_rows': len(part.reorders)}
+            for region, part in by_region.items()
+        },
+        'artifacts': artifacts,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+    # Written last, so a pipeline can treat it as the run's completion marker
+    (out_dir / 'manifest.json').write_text(json.dumps(manifest, indent=2, default=str), encoding='utf-8')
+    return manifest
+
+
+class SnowflakeStage:
+    """PUT target with LocalWarehouse.put's interface"""
+    
+    def __init__(self, conn, stage=EXPORT_STAGE):
+        self.conn = conn
+        self.stage = stage
+    
+    def put(self, files, prefix):
+        """PUT files (all from one directory) in one parallel command"""
+        path = Path(files[0]).resolve()
+        source = path.as_posix() if len(files) == 1 else f"{path.parent.as_posix()}/*"
+        cursor = self.conn.cursor()
+        cursor.execute(
+            f"PUT 'file://{source}' @{self.stage}/{prefix}/ "
+            f"PARALLEL = 8 AUTO_COMPRESS = FALSE OVERWRITE = TRUE"
+        )
+        cursor.close()
+
+
+def stage_run(target, out_dir, prefix):
+    """Upload a run directory to target under prefix, one PUT per region directory"""
+    out_dir = Path(out_dir)
+    for directory in sorted(path for path in out_dir.iterdir() if path.is_dir()):
+        files = sorted(directory.iterdir())
+        if files:
+            target.put(files, f"{prefix}/{directory.name}")
+    target.put([out_dir / 'manifest.json'], prefix)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write every StockPulse report for every region without the dashboard")
+    parser.add_argument('out', help="Output directory; each run writes a timestamped subdirectory")
+    parser.add_argument('--format', nargs='+', choices=list(FORMATS), default=['xlsx'], dest='formats',
+                        help="xlsx/html write one file per report, csv.gz/parquet one per sheet")
+    parser.add_argument('--reports', nargs='+', choices=list(SCHEDULED_REPORTS), help="Reports to write (default: all)")
+    parser.add_argument('--regions', nargs='+', help=f"Regions to write (default: all, plus '{ALL_REGIONS}')")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument('--stage', metavar='PREFIX',
+                        help=f"Also PUT the run to {EXPORT_STAGE}/PREFIX (the local stage with --local)")
+    parser.add_argument('--local', metavar='DIR', help="Read from the local stand-in at DIR instead of Snowflake")
+    args = parser.parse_args(argv)
+    
+    if args.local:
+        from stockpulse.local_backend import LocalWarehouse
+        warehouse = LocalWarehouse(args.local)
+        conn = warehouse.dashboard_connection()
+        snapshot = read_snapshot(conn)
+        target = warehouse
+    else:
+        from stockpulse.warehouse import connect_from_env
+        conn = connect_from_env(schema='ANALYTICS')
+        cursor = conn.cursor()
+        cursor.execute("SELECT CURRENT_TIMESTAMP()::VARCHAR")
+        snapshot = read_snapshot(conn, at=cursor.fetchone()[0])
+        cursor.close()
+        target = SnowflakeStage(conn)
+    
+    run = datetime.now().strftime('%Y%m%d-%H%M%S')
+    out_dir = Path(args.out) / run
+    manifest = run_reports(snapshot, out_dir, args.formats, args.reports, args.regions, args.workers)
+    
+    failed = [artifact for artifact in manifest['artifacts'] if 'error' in artifact]
+    for artifact in failed:
+        print(f"❌ {artifact['region']} / {artifact['report']}: {artifact['error']}")
+    files = sum(len(artifact.get('files', [])) for artifact in manifest['artifacts'])
+    print(f"✅ Wrote {files} files for {len(manifest['regions'])} regions from "
+          f"{manifest['rows']['health']:,} health rows in {manifest['seconds']:.2f}s - {out_dir}")
+    
+    if args.stage:
+        stage_run(target, out_dir, f"{args.stage}/{run}")
+        print(f"📤 Staged under {args.stage}/{run}")
+    conn.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
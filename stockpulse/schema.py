@@ -0,0 +1,124 @@
+"""
+StockPulse AI - Dataset Schemas
+===============================
+Declared column types of each dashboard dataset, applied to the Arrow
+result batches before they become a frame, so cached frames and snapshots
+hold compact native dtypes instead of the connector's Decimal and str
+objects:
+
+- quantity: float32 (stock, consumption, order quantities, days)
+- measure: float64 (scores, coverage and money, which feed totals that
+  must round as the warehouse does)
+- count: int32
+- name: category (locations, items, categories, risk classes)
+- flag: bool (NULL is false)
+- date: datetime64 (DATE columns, or ISO strings from the local backend)
+
+Undeclared columns (IDs, dates, timestamps) are kept as returned.
+"""
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+QUANTITY = 'quantity'
+MEASURE = 'measure'
+COUNT = 'count'
+NAME = 'name'
+FLAG = 'flag'
+DATE = 'date'
+
+SCHEMAS = {
+    'heatmap': {
+        'LOCATION_NAME': NAME,
+        'ITEM_NAME': NAME,
+        'ITEM_CATEGORY': NAME,
+        'CURRENT_STOCK': QUANTITY,
+        'STOCK_HEALTH_SCORE': MEASURE,
+        'RISK_CLASSIFICATION': NAME,
+        'DAYS_OF_COVER': MEASURE,
+        'DAYS_UNTIL_STOCKOUT': QUANTITY,
+        'AVG_DAILY_ISSUE': QUANTITY,
+        'IS_CRITICAL_ITEM': FLAG,
+        'REQUIRES_ATTENTION': FLAG,
+    },
+    'alerts': {
+        'LOCATION_NAME': NAME,
+        'ITEM_NAME': NAME,
+        'ITEM_CATEGORY': NAME,
+        'CURRENT_STOCK': QUANTITY,
+        'DAYS_UNTIL_STOCKOUT': QUANTITY,
+        'SEVERITY': NAME,
+        'IS_CRITICAL_ITEM': FLAG,
+    },
+    'reorders': {
+        'LOCATION_NAME': NAME,
+        'ITEM_NAME': NAME,
+        'ITEM_CATEGORY': NAME,
+        'CURRENT_STOCK': QUANTITY,
+        'AVG_DAILY_ISSUE': QUANTITY,
+        'SUGGESTED_REORDER_QUANTITY': QUANTITY,
+        'ESTIMATED_ORDER_VALUE': MEASURE,
+        'PROCUREMENT_PRIORITY_SCORE': MEASURE,
+        'URGENCY_SCORE': MEASURE,
+        'IS_CRITICAL_ITEM': FLAG,
+        'DAYS_UNTIL_STOCKOUT': QUANTITY,
+        'RISK_CLASSIFICATION': NAME,
+    },
+    'locations': {
+        # Index of the rollup; looked up by plain strings
+        'LOCATION_NAME': None,
+        'TOTAL_ITEMS': COUNT,
+        'AVG_HEALTH': MEASURE,
+        'AT_RISK': COUNT,
+        'CRITICAL_ITEMS': COUNT,
+        'AVG_DAYS_COVER': MEASURE,
+    },
+    'history': {
+        'PERIOD': DATE,
+        'CLOSING_STOCK': MEASURE,
+        'MIN_CLOSING_STOCK': MEASURE,
+        'MAX_CLOSING_STOCK': MEASURE,
+        'ISSUES': MEASURE,
+        'RECEIPTS': MEASURE,
+        'DAYS': COUNT,
+    },
+}
+
+
+def decode_arrow(table, schema):
+    """
+    Frame of an Arrow table with every declared column cast in Arrow first
+    
+    Casting before to_pandas() keeps the conversion columnar: decimals
+    become floats without Decimal objects, and names are dictionary
+    encoded so they arrive as categoricals (categories sorted, as
+    pd.Categorical would).
+    """
+    
+    columns = []
+    for name, column in zip(table.column_names, table.columns):
+        kind = schema.get(name)
+        if kind == QUANTITY:
+            column = column.cast(pa.float32(), safe=False)
+        elif kind == MEASURE:
+            column = column.cast(pa.float64(), safe=False)
+        elif kind == COUNT:
+            column = pc.fill_null(column.cast(pa.int32(), safe=False), 0)
+        elif kind == FLAG:
+            column = pc.fill_null(column.cast(pa.bool_()), False)
+        elif kind == DATE:
+            column = column.cast(pa.date32()).cast(pa.timestamp('ns'))
+        elif kind == NAME:
+            column = column.cast(pa.string()).combine_chunks().dictionary_encode()
+        columns.append(column)
+    
+    frame = pa.table(columns, names=table.column_names).to_pandas(split_blocks=True, self_destruct=True)
+    for name in frame.columns:
+        if schema.get(name) == NAME:
+            frame[name] = frame[name].cat.reorder_categories(sorted(frame[name].cat.categories))
+    return frame
+
+
+def empty_table(columns):
+    """Arrow table with the given column names and no rows"""
+    return pa.table({column: pa.array([], type=pa.null()) for column in columns})
@@ -0,0 +1,34 @@
+"""
+StockPulse AI - Warehouse Access
+================================
+Snowflake connection helpers shared by the command-line tools
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+
+def connect_from_env(schema='ANALYTICS'):
+    """
+    Open a Snowflake connection from SNOWFLAKE_* environment variables
+    
+    Args:
+        schema: Default schema for the session
+    
+    Returns:
+        snowflake.connector connection
+    """
+    
+    import snowflake.connector
+    
+    load_dotenv()
+    return snowflake.connector.connect(
+        account=os.getenv('SNOWFLAKE_ACCOUNT'),
+        user=os.getenv('SNOWFLAKE_USERNAME'),
+        password=os.getenv('SNOWFLAKE_PASSWORD'),
+        warehouse=os.getenv('SNOWFLAKE_WAREHOUSE'),
+        database=os.getenv('SNOWFLAKE_DATABASE', 'STOCKPULSE_AI'),
+        schema=schema,
+        role=os.getenv('SNOWFLAKE_ROLE')
+    )
@@ -0,0 +1,37 @@
+"""
+StockPulse AI - Alert Rule Store Tests
+======================================
+Rules are normalized the same way when stored and when removed, and rows
+without a value are never stored.
+"""
+
+import numpy as np
+
+from stockpulse.alert_rules import AlertRuleStore
+
+
+def stored(store):
+    return [tuple(rule) for rule in store.rules().itertuples(index=False)]
+
+
+def test_remove_normalizes_like_upsert(tmp_path):
+    store = AlertRuleStore(tmp_path / 'rules.json')
+    store.add(' Item ', ' Widget ', 5)
+    store.add('location', 'Hospital 1', 7)
+    assert stored(store) == [('item', 'Widget', 5.0), ('location', 'Hospital 1', 7.0)]
+    
+    store.remove('Item', ' Widget ')
+    assert stored(store) == [('location', 'Hospital 1', 7.0)]
+    # Persisted, not just dropped in memory
+    assert stored(AlertRuleStore(tmp_path / 'rules.json')) == [('location', 'Hospital 1', 7.0)]
+
+
+def test_upsert_skips_missing_values(tmp_path):
+    store = AlertRuleStore(tmp_path / 'rules.json')
+    count = store.upsert([
+        ('item', None, 3),
+        ('item', np.nan, 4),
+        ('category', 'MEDICINE', 10),
+    ])
+    assert count == 1
+    assert stored(store) == [('category', 'MEDICINE', 10.0)]
@@ -0,0 +1,113 @@
+"""
+StockPulse AI - Fetch Cache Tests
+=================================
+Single-flight loads, stale-while-revalidate serving and the blocking load
+once an entry is past ttl + stale_ttl, on a hand-driven clock.
+"""
+
+import threading
+import time
+
+import pytest
+
+from stockpulse import cache
+from stockpulse.cache import SWRCache
+
+WAIT = 5
+
+
+class Clock:
+    """Stands in for the time module inside stockpulse.cache"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def time(self):
+        return self.now
+
+
+class Loader:
+    """Returns 1, 2, ... per call; optionally blocks each call until released"""
+    
+    def __init__(self, blocking=False):
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.finished = threading.Event()
+        if not blocking:
+            self.release.set()
+    
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(WAIT)
+        self.finished.set()
+        return self.calls
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, 'time', clock)
+    return clock
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + WAIT
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_concurrent_misses_share_one_load(clock):
+    swr = SWRCache()
+    loader = Loader(blocking=True)
+    results = []
+    
+    def call():
+        results.append(swr.lookup('ns', ('key',), loader, ttl=60))
+    
+    threads = [threading.Thread(target=call) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    # Hold the first load until every other call is waiting on it
+    wait_for(lambda: swr.stats['coalesced'] == 7)
+    loader.release.set()
+    for thread in threads:
+        thread.join(WAIT)
+    
+    assert loader.calls == 1
+    assert sorted(results) == [(1, 'coalesced')] * 7 + [(1, 'miss')]
+    assert swr.stats['misses'] == 1
+
+
+def test_expired_entry_served_stale_while_one_refresh_runs(clock):
+    swr = SWRCache()
+    loader = Loader()
+    assert swr.lookup('ns', ('key',), loader, ttl=60, stale_ttl=300) == (1, 'miss')
+    
+    clock.now += 120
+    for event in (loader.started, loader.release, loader.finished):
+        event.clear()
+    # Returned without waiting on the refresh, which is still blocked
+    assert swr.lookup('ns', ('key',), loader, ttl=60, stale_ttl=300) == (1, 'stale')
+    assert loader.started.wait(WAIT)
+    assert swr.lookup('ns', ('key',), loader, ttl=60, stale_ttl=300) == (1, 'stale')
+    
+    loader.release.set()
+    assert loader.finished.wait(WAIT)
+    wait_for(lambda: swr.lookup('ns', ('key',), loader, ttl=60, stale_ttl=300) == (2, 'hit'))
+    assert loader.calls == 2
+    assert swr.stats['refreshes'] == 1
+
+
+def test_entry_past_stale_window_loads_in_caller(clock):
+    swr = SWRCache()
+    loader = Loader()
+    assert swr.lookup('ns', ('key',), loader, ttl=60, stale_ttl=300) == (1, 'miss')
+    
+    clock.now += 60 + 300 + 1
+    assert swr.lookup('ns', ('key',), loader, ttl=60, stale_ttl=300) == (2, 'miss')
+    assert swr.lookup('ns', ('key',), loader, ttl=60, stale_ttl=300) == (2, 'hit')
+    assert loader.calls == 2
+    assert swr.stats['stale_hits'] == 0
@@ -0,0 +1,79 @@
+"""
+StockPulse AI - Stock Cube Tests
+================================
+Cube summaries against the local DT_EXECUTIVE_SUMMARY and its per-row
+definition, and roll-up moments against a plain group-by.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from stockpulse.cube import MEASURES, StockCube
+from stockpulse.local_backend import LocalWarehouse, executive_summary
+
+# get_stock_heatmap's columns
+HEATMAP_QUERY = """
+    SELECT LOCATION_NAME, ITEM_NAME, ITEM_CATEGORY, CLOSING_STOCK AS CURRENT_STOCK,
+           STOCK_HEALTH_SCORE, RISK_CLASSIFICATION, DAYS_OF_COVER, DAYS_UNTIL_STOCKOUT,
+           AVG_DAILY_ISSUE, IS_CRITICAL_ITEM, REQUIRES_ATTENTION
+    FROM DT_STOCK_HEALTH_CLASSIFICATION
+"""
+
+# Columns the cube doesn't produce
+UNSUMMARIZED = ['DATA_AS_OF_DATE', 'REPORT_GENERATED_TIMESTAMP']
+
+
+@pytest.fixture(scope='module')
+def warehouse(tmp_path_factory):
+    warehouse = LocalWarehouse(tmp_path_factory.mktemp('warehouse'))
+    warehouse.seed(n_locations=8, n_items=12, days=60, end='2024-06-30')
+    warehouse.refresh_dynamic_tables(today='2024-06-30')
+    return warehouse
+
+
+def read(warehouse, query):
+    with warehouse.connect() as conn:
+        return pd.read_sql(query, conn)
+
+
+def summary_row(frame):
+    """First row of a summary frame as plain Python values"""
+    return {column: (value.item() if hasattr(value, 'item') else value)
+            for column, value in frame.drop(columns=UNSUMMARIZED).iloc[0].items()}
+
+
+def test_summary_equals_executive_summary_row(warehouse):
+    cube = StockCube.from_heatmap(read(warehouse, HEATMAP_QUERY))
+    expected = summary_row(read(warehouse, "SELECT * FROM DT_EXECUTIVE_SUMMARY"))
+    assert cube.summary() == expected
+
+
+def test_filtered_summary_equals_summary_of_filtered_rows(warehouse):
+    heatmap = read(warehouse, HEATMAP_QUERY)
+    health = read(warehouse, "SELECT * FROM DT_STOCK_HEALTH_CLASSIFICATION")
+    cube = StockCube.from_heatmap(heatmap)
+    location = heatmap['LOCATION_NAME'].iloc[0]
+    category = heatmap['ITEM_CATEGORY'].iloc[0]
+    
+    for filters, rows in [
+        ((location, None, None), health['LOCATION_NAME'] == location),
+        ((None, category, None), health['ITEM_CATEGORY'] == category),
+        ((None, category, 'HEALTHY'), (health['ITEM_CATEGORY'] == category) & (health['RISK_CLASSIFICATION'] == 'HEALTHY')),
+    ]:
+        assert rows.any()
+        assert cube.summary(*filters) == summary_row(executive_summary(health[rows]))
+
+
+def test_rollup_moments_match_group_by(warehouse):
+    heatmap = read(warehouse, HEATMAP_QUERY)
+    rollup = StockCube.from_heatmap(heatmap).rollup('LOCATION_NAME').sort_index()
+    grouped = heatmap.groupby('LOCATION_NAME')
+    
+    assert rollup['COUNT'].tolist() == grouped.size().sort_index().tolist()
+    for measure in MEASURES:
+        np.testing.assert_allclose(rollup[f"{measure}_MEAN"], grouped[measure].mean().sort_index(), rtol=1e-9)
+        np.testing.assert_allclose(rollup[f"{measure}_STD"], grouped[measure].std().sort_index(), rtol=1e-6)
+    
+    total = StockCube.from_heatmap(heatmap).total()
+    assert total['STOCK_HEALTH_SCORE_STD'] == pytest.approx(heatmap['STOCK_HEALTH_SCORE'].std(), rel=1e-6)
@@ -0,0 +1,121 @@
+"""
+StockPulse AI - Delta Alert Tests
+=================================
+Events of re-scored pairs against their open alerts, and the local
+process_alerts() round trip.
+"""
+
+import sqlite3
+
+import pandas as pd
+
+from stockpulse import delta_alerts
+from stockpulse.local_backend import LocalWarehouse
+
+
+def rescored(*rows):
+    return pd.DataFrame(rows, columns=['LOCATION_CODE', 'ITEM_CODE', 'ALERT_TYPE'])
+
+
+def open_alerts(*rows):
+    return pd.DataFrame(rows, columns=['ALERT_ID', 'LOCATION_CODE', 'ITEM_CODE', 'ALERT_TYPE'])
+
+
+def events_by_pair(events):
+    return {
+        (location, item): (event, open_id)
+        for location, item, event, open_id in events[['LOCATION_CODE', 'ITEM_CODE', 'EVENT', 'OPEN_ALERT_ID']].itertuples(index=False)
+    }
+
+
+def test_diff_events():
+    events = delta_alerts.diff(
+        rescored(
+            ('L1', 'I1', 'CRITICAL_LOW'),   # no open alert
+            ('L1', 'I2', 'STOCK_OUT'),      # HIGH_RISK open
+            ('L1', 'I3', None),             # CRITICAL_LOW open
+            ('L1', 'I4', 'HIGH_RISK'),      # HIGH_RISK open
+            ('L1', 'I5', None),             # nothing open
+        ),
+        open_alerts(
+            (10, 'L1', 'I2', 'HIGH_RISK'),
+            (11, 'L1', 'I3', 'CRITICAL_LOW'),
+            (12, 'L1', 'I4', 'HIGH_RISK'),
+            (13, 'L9', 'I9', 'STOCK_OUT'),  # not re-scored
+        ),
+    )
+    by_pair = events_by_pair(events)
+    assert set(by_pair) == {('L1', 'I1'), ('L1', 'I2'), ('L1', 'I3')}
+    assert by_pair[('L1', 'I1')][0] == delta_alerts.NEW
+    assert pd.isna(by_pair[('L1', 'I1')][1])
+    assert by_pair[('L1', 'I2')] == (delta_alerts.ESCALATED, 10)
+    assert by_pair[('L1', 'I3')] == (delta_alerts.RESOLVED, 11)
+
+
+def test_diff_downgrades_less_urgent_type():
+    events = delta_alerts.diff(
+        rescored(
+            ('L1', 'I1', 'OVERSTOCK'),   # STOCK_OUT open, large receipt
+            ('L1', 'I2', 'HIGH_RISK'),   # CRITICAL_LOW open
+        ),
+        open_alerts(
+            (20, 'L1', 'I1', 'STOCK_OUT'),
+            (21, 'L1', 'I2', 'CRITICAL_LOW'),
+        ),
+    )
+    by_pair = events_by_pair(events)
+    assert by_pair == {
+        ('L1', 'I1'): (delta_alerts.DOWNGRADED, 20),
+        ('L1', 'I2'): (delta_alerts.DOWNGRADED, 21),
+    }
+    assert events.set_index('ITEM_CODE').loc['I1', 'ALERT_TYPE'] == 'OVERSTOCK'
+
+
+def open_alert_rows(warehouse):
+    with warehouse.connect() as conn:
+        return conn.execute(
+            "SELECT location_code, item_code, alert_type FROM ALERT_NOTIFICATIONS WHERE NOT is_resolved"
+        ).fetchall()
+
+
+def set_latest_stock(warehouse, location, item, closing_stock):
+    """Overwrite a pair's latest closing stock, returning the previous value"""
+    with warehouse.connect() as conn:
+        latest = conn.execute("SELECT MAX(record_date) FROM DAILY_STOCK_RAW").fetchone()[0]
+        key = [latest, location, item]
+        previous = conn.execute(
+            "SELECT closing_stock FROM DAILY_STOCK_RAW WHERE record_date = ? AND location_code = ? AND item_code = ?", key
+        ).fetchone()[0]
+        conn.execute(
+            "UPDATE DAILY_STOCK_RAW SET closing_stock = ? WHERE record_date = ? AND location_code = ? AND item_code = ?",
+            [closing_stock] + key
+        )
+    return previous
+
+
+def test_process_alerts_escalates_then_downgrades(tmp_path):
+    warehouse = LocalWarehouse(tmp_path)
+    warehouse.seed(n_locations=6, n_items=10, days=60, end='2024-06-30')
+    today = '2024-06-30'
+    first = warehouse.process_alerts(today=today, full=True)
+    assert first['new'] == len(open_alert_rows(warehouse)) > 0
+    assert warehouse.process_alerts(today=today)['pairs'] == 0
+    
+    location, item, alert_type = next(row for row in open_alert_rows(warehouse) if row[2] != 'STOCK_OUT')
+    original = set_latest_stock(warehouse, location, item, 0)
+    escalated = warehouse.process_alerts(today=today)
+    assert (escalated['pairs'], escalated['escalated']) == (1, 1)
+    assert [row[2] for row in open_alert_rows(warehouse) if row[:2] == (location, item)] == ['STOCK_OUT']
+    
+    # Restocking to the original level puts the pair back in its old, less urgent class
+    set_latest_stock(warehouse, location, item, original)
+    downgraded = warehouse.process_alerts(today=today)
+    assert (downgraded['pairs'], downgraded['downgraded'], downgraded['resolved']) == (1, 1, 0)
+    assert [row[2] for row in open_alert_rows(warehouse) if row[:2] == (location, item)] == [alert_type]
+    
+    with sqlite3.connect(warehouse.db_path) as conn:
+        history = conn.execute(
+            "SELECT alert_event, alert_type FROM ALERT_HISTORY WHERE location_code = ? AND item_code = ? ORDER BY history_id",
+            [location, item]
+        ).fetchall()
+    assert history == [('NEW', alert_type), ('ESCALATED', 'STOCK_OUT'), ('DOWNGRADED', alert_type)]
@@ -0,0 +1,71 @@
+"""
+StockPulse AI - Export Cache Tests
+==================================
+One build per key under concurrency, and no per-key build lock left behind
+after a build, a failed build or a cache hit.
+"""
+
+import threading
+import time
+
+import pytest
+
+from stockpulse.exports import ExportCache
+
+
+def test_concurrent_requests_share_one_build():
+    cache = ExportCache()
+    release = threading.Event()
+    builds = []
+    
+    def builder():
+        builds.append(1)
+        assert release.wait(5)
+        return b'data'
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_build('key', builder))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    
+    assert results == [b'data'] * 4
+    assert len(builds) == 1
+    assert cache._building == {}
+
+
+def test_failed_build_leaves_no_lock():
+    cache = ExportCache()
+    
+    def builder():
+        raise RuntimeError("serialization failed")
+    
+    with pytest.raises(RuntimeError):
+        cache.get_or_build('key', builder)
+    assert cache._building == {}
+    assert cache.get_or_build('key', lambda: b'retry') == b'retry'
+    assert cache._building == {}
+
+
+def test_cache_hit_on_recheck_leaves_no_lock():
+    cache = ExportCache()
+    results = []
+    
+    def builder():
+        raise AssertionError("built twice")
+    
+    # Hold the key's build lock, as an in-flight build would
+    key_lock = cache._building.setdefault('key', threading.Lock())
+    with key_lock:
+        thread = threading.Thread(target=lambda: results.append(cache.get_or_build('key', builder)))
+        thread.start()
+        # Let the request miss the first check and wait on the build
+        time.sleep(0.2)
+        with cache._lock:
+            cache._store('key', b'built elsewhere')
+    thread.join(5)
+    
+    assert results == [b'built elsewhere']
+    assert cache._building == {}
@@ -0,0 +1,43 @@
+"""
+StockPulse AI - Ingestion Tests
+===============================
+Bulk loads through the local stage, including an extract with no rows.
+"""
+
+import pandas as pd
+import pytest
+
+from stockpulse.ingest import LocalLoader, ingest
+from stockpulse.local_backend import LocalWarehouse
+
+COLUMNS = ['record_date', 'location_code', 'item_code', 'opening_stock', 'receipts', 'issues', 'closing_stock']
+
+
+def raw_count(warehouse):
+    with warehouse.connect() as conn:
+        return conn.execute("SELECT COUNT(*) FROM DAILY_STOCK_RAW").fetchone()[0]
+
+
+@pytest.mark.parametrize('mode', ['append', 'upsert'])
+def test_empty_extract_loads_nothing(tmp_path, mode):
+    warehouse = LocalWarehouse(tmp_path / 'warehouse')
+    extract = tmp_path / 'extract.csv'
+    pd.DataFrame(columns=COLUMNS).to_csv(extract, index=False)
+    
+    result = ingest(extract, LocalLoader(warehouse), mode=mode)
+    assert (result['status'], result['rows_read'], result['rows_loaded'], result['files']) == ('loaded', 0, 0, 0)
+    assert 'upload_s' not in result['timings']
+    assert raw_count(warehouse) == 0
+
+
+def test_extract_rows_are_loaded(tmp_path):
+    warehouse = LocalWarehouse(tmp_path / 'warehouse')
+    extract = tmp_path / 'extract.csv'
+    pd.DataFrame([
+        ['2024-06-29', 'L1', 'I1', 10.0, 0.0, 2.0, 8.0],
+        ['2024-06-30', 'L1', 'I1', 8.0, 5.0, 1.0, 12.0],
+    ], columns=COLUMNS).to_csv(extract, index=False)
+    
+    result = ingest(extract, LocalLoader(warehouse), file_count=2, workers=2)
+    assert (result['status'], result['rows_loaded']) == ('loaded', 2)
+    assert raw_count(warehouse) == 2
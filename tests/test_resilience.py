@@ -0,0 +1,63 @@
+"""
+StockPulse AI - Circuit Breaker Tests
+=====================================
+Only connectivity failures open the breaker; query errors pass through.
+"""
+
+import pytest
+from snowflake.connector.errors import OperationalError, ProgrammingError
+
+from stockpulse.resilience import CircuitBreaker, CircuitOpenError, WarehouseUnavailableError
+
+
+def make_breaker():
+    return CircuitBreaker(
+        probe=lambda: None,
+        failure_threshold=3,
+        probe_interval=3600,
+        outage_errors=(OperationalError, WarehouseUnavailableError),
+    )
+
+
+def fail_with(error):
+    def fetch():
+        raise error
+    return fetch
+
+
+def test_programming_error_does_not_open_breaker():
+    breaker = make_breaker()
+    for _ in range(5):
+        with pytest.raises(ProgrammingError):
+            breaker.call(fail_with(ProgrammingError("Object 'DT_MISSING' does not exist")))
+    assert not breaker.is_open
+    assert breaker.failures == 0
+    assert breaker.call(lambda: 'ok') == 'ok'
+
+
+def test_value_error_does_not_open_breaker():
+    breaker = make_breaker()
+    for _ in range(5):
+        with pytest.raises(ValueError):
+            breaker.call(fail_with(ValueError("Unknown grain: hour")))
+    assert not breaker.is_open
+
+
+def test_connectivity_errors_open_breaker():
+    breaker = make_breaker()
+    for error in [OperationalError("timeout"), WarehouseUnavailableError("No Snowflake connection"), OperationalError("timeout")]:
+        with pytest.raises(type(error)):
+            breaker.call(fail_with(error))
+    assert breaker.is_open
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: 'never runs')
+
+
+def test_query_error_between_outages_keeps_count():
+    breaker = make_breaker()
+    with pytest.raises(OperationalError):
+        breaker.call(fail_with(OperationalError("timeout")))
+    with pytest.raises(ProgrammingError):
+        breaker.call(fail_with(ProgrammingError("syntax error")))
+    assert breaker.failures == 1
+    assert not breaker.is_open
@@ -0,0 +1,115 @@
+"""
+StockPulse AI - Data Validation Tests
+=====================================
+Rule predicates follow SQL's NULL semantics: a row matches only where the
+predicate is TRUE, never where it is NULL. The low-memory validation
+leaves a caller's tracemalloc session as it found it.
+"""
+
+import tracemalloc
+
+import pandas as pd
+import pytest
+
+from validate_data import _as_mask, _RuleColumns, compile_rule, run_quality_rules, validate_daily_stock_data
+
+FRAME = pd.DataFrame({
+    'qty': [5, None, 20, 12],
+    'code': ['A', None, 'B', 'C'],
+})
+
+
+def matches(predicate):
+    evaluate = compile_rule({'rule_sql': predicate})['evaluate']
+    return _as_mask(evaluate(_RuleColumns(FRAME)), len(FRAME)).tolist()
+
+
+@pytest.mark.parametrize('predicate, expected', [
+    ("qty > 10", [False, False, True, True]),
+    ("qty != 5", [False, False, True, True]),
+    # NOT of a NULL comparison stays NULL
+    ("NOT qty > 10", [True, False, False, False]),
+    ("NOT (qty > 10 AND code = 'B')", [True, False, False, True]),
+    # NULL OR TRUE is TRUE, so NOT of it is FALSE
+    ("NOT (qty < 10 OR code IS NULL)", [False, False, True, True]),
+    ("NOT NOT qty > 10", [False, False, True, True]),
+    ("code IN ('A', 'B')", [True, False, True, False]),
+    ("code NOT IN ('A', 'B')", [False, False, False, True]),
+    ("NOT code IN ('A', 'B')", [False, False, False, True]),
+    ("code IN ('A', NULL)", [True, False, False, False]),
+    ("code NOT IN ('A', NULL)", [False, False, False, False]),
+    ("qty BETWEEN 5 AND 12", [True, False, False, True]),
+    ("qty NOT BETWEEN 5 AND 12", [False, False, True, False]),
+    ("NOT qty BETWEEN 5 AND 12", [False, False, True, False]),
+    ("qty IS NULL", [False, True, False, False]),
+    ("qty IS NOT NULL", [True, False, True, True]),
+    ("NOT qty IS NULL", [True, False, True, True]),
+    ("qty = NULL", [False, False, False, False]),
+    ("NOT qty = NULL", [False, False, False, False]),
+])
+def test_predicate_null_semantics(predicate, expected):
+    assert matches(predicate) == expected
+
+
+def test_full_rule_sql():
+    assert matches("SELECT * FROM DAILY_STOCK_RAW WHERE NOT (qty > 10) ORDER BY qty") == [True, False, False, False]
+
+
+def stock_rows():
+    return pd.DataFrame({
+        'record_date': ['2024-06-29', '2024-06-30'],
+        'location_code': ['L1', 'L1'],
+        'item_code': ['I1', 'I1'],
+        'opening_stock': [10.0, 8.0],
+        'receipts': [0.0, 5.0],
+        'issues': [2.0, 1.0],
+        'closing_stock': [8.0, 12.0],
+    })
+
+
+def test_low_memory_keeps_caller_trace():
+    tracemalloc.start()
+    try:
+        block = bytearray(8 * 1024 ** 2)
+        del block
+        _, caller_peak = tracemalloc.get_traced_memory()
+        results = validate_daily_stock_data(stock_rows(), low_memory=True)
+        assert tracemalloc.is_tracing()
+        assert tracemalloc.get_traced_memory()[1] >= caller_peak
+    finally:
+        tracemalloc.stop()
+    assert results['is_valid']
+    # Small next to the caller's earlier 8 MB peak, so not attributable
+    assert results['metrics']['peak_memory_mb'] is None
+
+
+def test_low_memory_traces_on_its_own():
+    results = validate_daily_stock_data(stock_rows(), low_memory=True)
+    assert not tracemalloc.is_tracing()
+    assert results['metrics']['peak_memory_mb'] >= 0
+
+
+def test_low_memory_matches_default_with_missing_dates():
+    frame = stock_rows().iloc[[0, 1, 1, 1, 0, 0]].reset_index(drop=True)
+    frame['record_date'] = ['2024-06-01', '2024-06-02', '2024-06-04', None, None, '2024-06-01']
+    frame['location_code'] = ['L1', 'L1', 'L1', 'L1', 'L1', 'L2']
+    
+    default = validate_daily_stock_data(frame.copy())
+    low_memory = validate_daily_stock_data(frame.copy(), low_memory=True)
+    # Undated rows are neither gaps nor duplicates of each other
+    assert default['warnings'] == low_memory['warnings'] == ['Date gaps found for L1/I1: 1 gaps']
+    assert default['issues'] == low_memory['issues'] == []
+    low_memory['metrics'].pop('peak_memory_mb')
+    assert default['metrics'] == low_memory['metrics']
+
+
+def test_rule_failing_at_evaluation_is_reported():
+    rules = [
+        {'rule_name': 'Code Above Ten', 'rule_sql': 'code > 10', 'severity': 'HIGH'},
+        {'rule_name': 'Large Quantity', 'rule_sql': 'qty > 10', 'severity': 'HIGH'},
+    ]
+    results = run_quality_rules(FRAME, rules)
+    assert len(results['warnings']) == 1
+    assert results['warnings'][0].startswith("Rule 'Code Above Ten' could not be evaluated: TypeError")
+    assert results['issues'] == ['Large Quantity: 2 records']
+    assert [result['rule_name'] for result in results['rule_results']] == ['Large Quantity']
@@ -4,16 +4,42 @@ StockPulse AI - Data Validation Script
 Validates stock data quality and identifies issues
 """
 
+import json
+import operator
+import re
+import time
+import tracemalloc
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
-def validate_daily_stock_data(df: pd.DataFrame) -> dict:
+# Local stand-in for the DATA.DATA_QUALITY_RULES table
+DEFAULT_RULES_PATH = Path(__file__).resolve().parent.parent / 'config' / 'data_quality_rules.json'
+
+# Rules at these severities fail validation; the rest are reported as warnings
+ISSUE_SEVERITIES = {'CRITICAL', 'HIGH'}
+
+# Value range limits used by validate_daily_stock_data
+MAX_OPENING_STOCK = 1_000_000
+MAX_DAILY_ISSUES = 10_000
+
+QUANTITY_COLUMNS = ['opening_stock', 'receipts', 'issues', 'closing_stock']
+
+# Rows per block when the low-memory balance check evaluates float32 columns
+LOW_MEMORY_CHUNK_ROWS = 262_144
+
+def validate_daily_stock_data(df: pd.DataFrame, low_memory: bool = False) -> dict:
     """
     Comprehensive validation of daily stock data
     
     Args:
         df: DataFrame with daily stock records
-        
+        low_memory: Validate without copying or mutating df, using compact
+            dtypes and reductions; peak memory is added to the metrics
+    
     Returns:
         Dictionary with validation results and issues
     """
@@ -35,9 +61,13 @@ def validate_daily_stock_data(df: pd.DataFrame) -> dict:
             'is_valid': False,
             'issues': issues,
             'warnings': [],
-            'metrics': {}
+            'metrics': {},
+            'validation_timestamp': datetime.now().isoformat()
         }
     
+    if low_memory:
+        return _validate_daily_stock_data_low_memory(df)
+    
     # 2. Check for negative stock values
     negative_stock = df[df['closing_stock'] < 0]
     if len(negative_stock) > 0:
@@ -72,8 +102,9 @@ def validate_daily_stock_data(df: pd.DataFrame) -> dict:
     if len(missing_item) > 0:
         warnings.append(f"Found {len(missing_item)} records with missing item_code")
     
-    # 6. Check for duplicate records
-    duplicates = df[df.duplicated(subset=['record_date', 'location_code', 'item_code'], keep=False)]
+    # 6. Check for duplicate records (rows without a date can't duplicate one)
+    dated = df[df['record_date'].notna()]
+    duplicates = dated[dated.duplicated(subset=['record_date', 'location_code', 'item_code'], keep=False)]
     if len(duplicates) > 0:
         issues.append(f"Found {len(duplicates)} duplicate records (same date, location, item)")
         metrics['duplicate_count'] = len(duplicates)
@@ -81,7 +112,7 @@ def validate_daily_stock_data(df: pd.DataFrame) -> dict:
     # 7. Check date continuity
     for location in df['location_code'].unique():
         for item in df['item_code'].unique():
-            loc_item_df = df[(df['location_code'] == location) & (df['item_code'] == item)].sort_values('record_date')
+            loc_item_df = dated[(dated['location_code'] == location) & (dated['item_code'] == item)].sort_values('record_date')
             
             if len(loc_item_df) > 1:
                 date_diffs = loc_item_df['record_date'].diff().dt.days
@@ -94,9 +125,10 @@ def validate_daily_stock_data(df: pd.DataFrame) -> dict:
     metrics['total_records'] = len(df)
     metrics['unique_locations'] = df['location_code'].nunique()
     metrics['unique_items'] = df['item_code'].nunique()
-    metrics['date_range_start'] = df['record_date'].min()
-    metrics['date_range_end'] = df['record_date'].max()
-    metrics['days_covered'] = (df['record_date'].max() - df['record_date'].min()).days
+    if len(dated) > 0:
+        metrics['date_range_start'] = dated['record_date'].min()
+        metrics['date_range_end'] = dated['record_date'].max()
+        metrics['days_covered'] = (dated['record_date'].max() - dated['record_date'].min()).days
     
     # 9. Null value checks
     for col in ['opening_stock', 'receipts', 'issues', 'closing_stock']:
@@ -105,10 +137,10 @@ def validate_daily_stock_data(df: pd.DataFrame) -> dict:
             warnings.append(f"Column '{col}' has {null_count} null values")
     
     # 10. Value range checks
-    if df['opening_stock'].max() > 1_000_000:
+    if df['opening_stock'].max() > MAX_OPENING_STOCK:
         warnings.append("Some opening_stock values exceed 1M units - verify correctness")
     
-    if df['issues'].max() > 10_000:
+    if df['issues'].max() > MAX_DAILY_ISSUES:
         warnings.append("Some daily issues exceed 10K units - verify correctness")
     
     # Final validation status
@@ -123,13 +155,182 @@ def validate_daily_stock_data(df: pd.DataFrame) -> dict:
     }
 
 
+def _validate_daily_stock_data_low_memory(df: pd.DataFrame) -> dict:
+    """
+    Low-memory variant of validate_daily_stock_data
+    
+    Quantities are decoded into float32 arrays and codes into categoricals;
+    every check is a reduction, so no filtered subframes are built and the
+    caller's frame is left untouched.
+    """
+    
+    issues = []
+    warnings = []
+    metrics = {}
+    
+    # Peak measured above the traced memory at entry. A caller's own trace
+    # is left running with its peak intact, never reset
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    baseline_bytes, baseline_peak = tracemalloc.get_traced_memory()
+    
+    try:
+        quantities = {
+            col: pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float32, na_value=np.nan)
+            for col in QUANTITY_COLUMNS
+        }
+        locations = df['location_code'].astype('category')
+        items = df['item_code'].astype('category')
+        location_codes = locations.cat.codes.to_numpy()
+        item_codes = items.cat.codes.to_numpy()
+        
+        record_dates = pd.to_datetime(df['record_date'], errors='coerce').to_numpy(dtype='datetime64[D]')
+        valid_dates = ~np.isnat(record_dates)
+        days = np.where(valid_dates, record_dates.view(np.int64), 0).astype(np.int32)
+        del record_dates
+        
+        # 2. Negative stock
+        negative_count = int(np.count_nonzero(quantities['closing_stock'] < 0))
+        if negative_count > 0:
+            issues.append(f"Found {negative_count} records with negative closing stock")
+            metrics['negative_stock_count'] = negative_count
+        
+        # 3. Stock balance equation, evaluated block by block in float32.
+        # The tolerance is widened by the float32 rounding of each operand.
+        mismatch_count = 0
+        max_difference = 0.0
+        for start in range(0, len(df), LOW_MEMORY_CHUNK_ROWS):
+            block = slice(start, start + LOW_MEMORY_CHUNK_ROWS)
+            opening = quantities['opening_stock'][block]
+            receipts = quantities['receipts'][block]
+            issued = quantities['issues'][block]
+            closing = quantities['closing_stock'][block]
+            
+            difference = opening + receipts
+            difference -= issued
+            difference -= closing
+            np.abs(difference, out=difference)
+            
+            tolerance = np.spacing(np.abs(opening))
+            tolerance += np.spacing(np.abs(receipts))
+            tolerance += np.spacing(np.abs(issued))
+            tolerance += np.spacing(np.abs(closing))
+            tolerance *= 2
+            tolerance += 0.01
+            
+            mismatch_count += int(np.count_nonzero(difference > tolerance))
+            if len(difference) and not np.isnan(difference).all():
+                max_difference = max(max_difference, float(np.nanmax(difference)))
+        
+        if mismatch_count > 0:
+            issues.append(f"Found {mismatch_count} records with stock balance mismatches")
+            metrics['balance_mismatch_count'] = mismatch_count
+            metrics['max_balance_difference'] = max_difference
+        
+        # 4. Future dates
+        today = np.datetime64(datetime.now().date(), 'D').astype(np.int64)
+        future_count = int(np.count_nonzero(valid_dates & (days > today)))
+        if future_count > 0:
+            issues.append(f"Found {future_count} records with future dates")
+            metrics['future_date_count'] = future_count
+        
+        # 5. Missing critical fields
+        missing_location = _count_missing_codes(locations, location_codes)
+        if missing_location > 0:
+            warnings.append(f"Found {missing_location} records with missing location_code")
+        
+        missing_item = _count_missing_codes(items, item_codes)
+        if missing_item > 0:
+            warnings.append(f"Found {missing_item} records with missing item_code")
+        
+        # 6. Duplicate records, among rows with a valid date as in the default mode
+        dated = np.flatnonzero(valid_dates)
+        keys = pd.DataFrame({'day': days[dated], 'location': location_codes[dated], 'item': item_codes[dated]}, copy=False)
+        duplicate_count = int(keys.duplicated(keep=False).sum())
+        del keys
+        if duplicate_count > 0:
+            issues.append(f"Found {duplicate_count} duplicate records (same date, location, item)")
+            metrics['duplicate_count'] = duplicate_count
+        
+        # 7. Date continuity - one sort of the dated rows, gaps counted per (location, item)
+        if len(dated) > 1:
+            order = dated[np.lexsort((days[dated], item_codes[dated], location_codes[dated]))]
+            sorted_locations = location_codes[order]
+            sorted_items = item_codes[order]
+            same_series = (sorted_locations[1:] == sorted_locations[:-1]) & (sorted_items[1:] == sorted_items[:-1])
+            gap_positions = np.flatnonzero(same_series & (np.diff(days[order]) > 1))
+            if len(gap_positions) > 0:
+                pairs, gap_counts = np.unique(
+                    np.stack([sorted_locations[gap_positions], sorted_items[gap_positions]]),
+                    axis=1, return_counts=True
+                )
+                for (location_index, item_index), gap_count in zip(pairs.T, gap_counts):
+                    location = locations.cat.categories[location_index] if location_index >= 0 else None
+                    item = items.cat.categories[item_index] if item_index >= 0 else None
+                    warnings.append(f"Date gaps found for {location}/{item}: {gap_count} gaps")
+        
+        # 8. Data completeness metrics
+        metrics['total_records'] = len(df)
+        metrics['unique_locations'] = len(locations.cat.categories)
+        metrics['unique_items'] = len(items.cat.categories)
+        if valid_dates.any():
+            first_day = int(days[valid_dates].min())
+            last_day = int(days[valid_dates].max())
+            metrics['date_range_start'] = np.datetime64(first_day, 'D').astype(object)
+            metrics['date_range_end'] = np.datetime64(last_day, 'D').astype(object)
+            metrics['days_covered'] = last_day - first_day
+        
+        # 9. Null value checks
+        for col, values in quantities.items():
+            null_count = int(np.count_nonzero(np.isnan(values)))
+            if null_count > 0:
+                warnings.append(f"Column '{col}' has {null_count} null values")
+        
+        # 10. Value range checks
+        if np.nanmax(quantities['opening_stock'], initial=-np.inf) > MAX_OPENING_STOCK:
+            warnings.append("Some opening_stock values exceed 1M units - verify correctness")
+        
+        if np.nanmax(quantities['issues'], initial=-np.inf) > MAX_DAILY_ISSUES:
+            warnings.append("Some daily issues exceed 10K units - verify correctness")
+        
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+    
+    # Under a caller's trace, a peak that stayed below the caller's earlier
+    # one can't be attributed to this call
+    if started_tracing or peak_bytes > baseline_peak:
+        metrics['peak_memory_mb'] = round((peak_bytes - baseline_bytes) / 1024 ** 2, 2)
+    else:
+        metrics['peak_memory_mb'] = None
+    
+    return {
+        'is_valid': len(issues) == 0,
+        'issues': issues,
+        'warnings': warnings,
+        'metrics': metrics,
+        'validation_timestamp': datetime.now().isoformat()
+    }
+
+
+def _count_missing_codes(categorical: pd.Series, codes: np.ndarray) -> int:
+    """Count null or empty-string values of a categorical from its codes"""
+    missing = codes == -1
+    categories = categorical.cat.categories
+    if '' in categories:
+        missing |= codes == categories.get_loc('')
+    return int(np.count_nonzero(missing))
+
+
 def generate_validation_report(validation_results: dict) -> str:
     """
     Generate a human-readable validation report
     
     Args:
         validation_results: Output from validate_daily_stock_data
-        
+    
     Returns:
         Formatted report string
     """
@@ -180,6 +381,17 @@ def generate_validation_report(validation_results: dict) -> str:
         report.append("✅ No warnings")
         report.append("")
     
+    # Rule timings
+    if validation_results.get('rule_results'):
+        report.append("RULE RESULTS:")
+        report.append("-" * 80)
+        for rule in validation_results['rule_results']:
+            report.append(
+                f"  [{rule['severity']}] {rule['rule_name']}: "
+                f"{rule['violations']} violations ({rule['elapsed_ms']:.2f} ms)"
+            )
+        report.append("")
+    
     report.append("=" * 80)
     
     return "\n".join(report)
@@ -192,7 +404,7 @@ def validate_master_data(locations_df: pd.DataFrame, items_df: pd.DataFrame) ->
     Args:
         locations_df: LOCATION_MASTER data
         items_df: ITEM_MASTER data
-        
+    
     Returns:
         Validation results
     """
@@ -237,6 +449,448 @@ def validate_master_data(locations_df: pd.DataFrame, items_df: pd.DataFrame) ->
     }
 
 
+# ============================================================================
+# Rule-driven validation (DATA_QUALITY_RULES)
+# ============================================================================
+
+_TOKEN_RE = re.compile(r"""\s*(?:
+    (?P<number>\d+(?:\.\d*)?|\.\d+)
+    |(?P<string>'(?:[^']|'')*')
+    |(?P<op><>|!=|<=|>=|[=<>+\-*/(),])
+    |(?P<name>[A-Za-z_][A-Za-z0-9_]*)
+)""", re.VERBOSE)
+
+_KEYWORDS = {'AND', 'OR', 'NOT', 'IS', 'NULL', 'IN', 'BETWEEN', 'TRUE', 'FALSE', 'OVER', 'PARTITION', 'BY'}
+
+# Columns parsed as dates before any rule touches them
+_DATE_COLUMNS = {'record_date'}
+
+
+def load_quality_rules(conn=None, path=None) -> list:
+    """
+    Load active data quality rules
+    
+    Args:
+        conn: Optional Snowflake connection; rules are read from DATA_QUALITY_RULES
+        path: Local rules file used when no connection is given
+    
+    Returns:
+        List of rule dictionaries (rule_name, rule_type, rule_sql, severity)
+    """
+    
+    if conn is not None:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT rule_name, rule_type, rule_sql, severity
+            FROM STOCKPULSE_AI.DATA.DATA_QUALITY_RULES
+            WHERE is_active = TRUE
+            ORDER BY rule_id
+        """)
+        columns = [desc[0].lower() for desc in cursor.description]
+        rules = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        cursor.close()
+        return rules
+    
+    with open(path or DEFAULT_RULES_PATH, encoding='utf-8') as f:
+        rules = json.load(f)
+    return [rule for rule in rules if rule.get('is_active', True)]
+
+
+def compile_rule(rule: dict) -> dict:
+    """
+    Compile a rule's SQL predicate into a vectorized column expression
+    
+    The WHERE (or QUALIFY) clause of ``rule_sql`` is translated once into a
+    function over DataFrame columns; a bare predicate is accepted as well.
+    
+    Args:
+        rule: Rule dictionary as returned by load_quality_rules
+    
+    Returns:
+        Copy of the rule with ``evaluate`` and ``columns`` added
+    """
+    
+    evaluate, columns = _compile_predicate(_extract_predicate(rule['rule_sql']))
+    return {**rule, 'evaluate': evaluate, 'columns': columns}
+
+
+def run_quality_rules(df: pd.DataFrame, rules: list = None) -> dict:
+    """
+    Evaluate data quality rules against a DataFrame
+    
+    Each rule is one vectorized pass over columns that are prepared once and
+    shared by all rules. The input frame is not modified.
+    
+    Args:
+        df: DataFrame with daily stock records
+        rules: Rules from load_quality_rules or compile_rule (defaults to the local rules file)
+    
+    Returns:
+        Dictionary with validation results, issues and per-rule timings
+    """
+    
+    if rules is None:
+        rules = load_quality_rules()
+    
+    issues = []
+    warnings = []
+    metrics = {'total_records': len(df)}
+    rule_results = []
+    columns = _RuleColumns(df)
+    total_start = time.perf_counter()
+    
+    for rule in rules:
+        if 'evaluate' not in rule:
+            try:
+                rule = compile_rule(rule)
+            except ValueError as e:
+                warnings.append(f"Rule '{rule['rule_name']}' could not be compiled: {e}")
+                continue
+        
+        missing = sorted(col for col in rule['columns'] if col not in columns)
+        if missing:
+            warnings.append(f"Rule '{rule['rule_name']}' skipped - missing columns: {missing}")
+            continue
+        
+        start = time.perf_counter()
+        try:
+            violations = int(_as_mask(rule['evaluate'](columns), len(df)).sum())
+        except Exception as e:
+            # e.g. comparing a text column with a number; the other rules still run
+            warnings.append(f"Rule '{rule['rule_name']}' could not be evaluated: {type(e).__name__}: {e}")
+            continue
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        
+        severity = (rule.get('severity') or 'MEDIUM').upper()
+        rule_results.append({
+            'rule_name': rule['rule_name'],
+            'rule_type': rule.get('rule_type'),
+            'severity': severity,
+            'violations': violations,
+            'elapsed_ms': round(elapsed_ms, 3)
+        })
+        
+        if violations > 0:
+            message = f"{rule['rule_name']}: {violations} records"
+            if severity in ISSUE_SEVERITIES:
+                issues.append(message)
+            else:
+                warnings.append(message)
+    
+    metrics['rules_evaluated'] = len(rule_results)
+    metrics['total_rule_time_ms'] = round((time.perf_counter() - total_start) * 1000, 3)
+    
+    return {
+        'is_valid': len(issues) == 0,
+        'issues': issues,
+        'warnings': warnings,
+        'metrics': metrics,
+        'rule_results': rule_results,
+        'validation_timestamp': datetime.now().isoformat()
+    }
+
+
+class _RuleColumns:
+    """Case-insensitive, lazily prepared column lookup shared by all rules"""
+    
+    def __init__(self, df):
+        self.df = df
+        self.names = {str(col).lower(): col for col in df.columns}
+        self.prepared = {}
+    
+    def __contains__(self, name):
+        return name in self.names
+    
+    def __getitem__(self, name):
+        if name not in self.prepared:
+            series = self.df[self.names[name]]
+            if name in _DATE_COLUMNS:
+                series = pd.to_datetime(series, errors='coerce')
+            self.prepared[name] = series
+        return self.prepared[name]
+    
+    def __len__(self):
+        return len(self.df)
+
+
+def _as_mask(result, length):
+    """Broadcast a rule result to a boolean array"""
+    if isinstance(result, pd.Series):
+        return result.fillna(False).to_numpy(dtype=bool)
+    return np.full(length, bool(result) if not pd.isna(result) else False)
+
+
+def _extract_predicate(rule_sql: str) -> str:
+    """Return the WHERE/QUALIFY predicate of a rule, or the text itself"""
+    text = rule_sql.strip().rstrip(';')
+    if not re.match(r'^\s*SELECT\b', text, re.IGNORECASE):
+        return text
+    match = re.search(r'\b(?:WHERE|QUALIFY)\b(.*)$', text, re.IGNORECASE | re.DOTALL)
+    if not match:
+        raise ValueError('rule_sql has no WHERE or QUALIFY clause')
+    return re.split(r'\b(?:ORDER\s+BY|LIMIT)\b', match.group(1), flags=re.IGNORECASE)[0]
+
+
+@lru_cache(maxsize=256)
+def _compile_predicate(predicate: str):
+    parser = _PredicateParser(predicate)
+    evaluate = parser.parse()
+    return evaluate, frozenset(parser.columns)
+
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match or match.end() == pos:
+            raise ValueError(f"Unexpected input at: {text[pos:pos + 20]!r}")
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == 'name' and value.upper() in _KEYWORDS:
+            kind, value = 'keyword', value.upper()
+        tokens.append((kind, value))
+        pos = match.end()
+    return tokens
+
+
+class _PredicateParser:
+    """Recursive-descent translator from a SQL predicate to a column function"""
+    
+    def __init__(self, text):
+        self.tokens = _tokenize(text)
+        self.pos = 0
+        self.columns = set()
+    
+    def parse(self):
+        expr = self._or()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Unexpected token {self.tokens[self.pos][1]!r}")
+        return expr
+    
+    # Token helpers
+    def _peek(self, offset=0):
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+    
+    def _accept(self, *values):
+        kind, value = self._peek()
+        if kind in ('keyword', 'op') and value in values:
+            self.pos += 1
+            return value
+        return None
+    
+    def _expect(self, value):
+        if not self._accept(value):
+            raise ValueError(f"Expected {value!r} near token {self.pos}")
+    
+    # Boolean logic
+    def _or(self):
+        left = self._and()
+        while self._accept('OR'):
+            left = _binary(left, self._and(), lambda a, b: a | b)
+        return left
+    
+    def _and(self):
+        left = self._not()
+        while self._accept('AND'):
+            left = _binary(left, self._not(), lambda a, b: a & b)
+        return left
+    
+    def _not(self):
+        if self._accept('NOT'):
+            operand = self._not()
+            return lambda env: _negate(operand(env), env)
+        return self._comparison()
+    
+    # Comparisons
+    def _comparison(self):
+        left = self._additive()
+        
+        if self._accept('IS'):
+            negate = bool(self._accept('NOT'))
+            self._expect('NULL')
+            if negate:
+                return lambda env: _as_series(left(env), env).notna()
+            return lambda env: _as_series(left(env), env).isna()
+        
+        negate = bool(self._accept('NOT'))
+        if self._accept('BETWEEN'):
+            low = self._additive()
+            self._expect('AND')
+            high = self._additive()
+            expr = lambda env: _sql_compare(left(env), low(env), operator.ge) & _sql_compare(left(env), high(env), operator.le)
+            return (lambda env: _negate(expr(env), env)) if negate else expr
+        if self._accept('IN'):
+            self._expect('(')
+            values = [self._literal()]
+            while self._accept(','):
+                values.append(self._literal())
+            self._expect(')')
+            expr = lambda env: _sql_in(_as_series(left(env), env), values)
+            return (lambda env: _negate(expr(env), env)) if negate else expr
+        if negate:
+            raise ValueError('NOT must be followed by BETWEEN or IN here')
+        
+        operators = {
+            '=': operator.eq,
+            '!=': operator.ne,
+            '<>': operator.ne,
+            '<': operator.lt,
+            '<=': operator.le,
+            '>': operator.gt,
+            '>=': operator.ge,
+        }
+        op = self._accept(*operators)
+        if op:
+            compare = operators[op]
+            return _binary(left, self._additive(), lambda a, b: _sql_compare(a, b, compare))
+        return left
+    
+    # Arithmetic
+    def _additive(self):
+        left = self._term()
+        while True:
+            op = self._accept('+', '-')
+            if not op:
+                return left
+            right = self._term()
+            left = _binary(left, right, (lambda a, b: a + b) if op == '+' else (lambda a, b: a - b))
+    
+    def _term(self):
+        left = self._unary()
+        while True:
+            op = self._accept('*', '/')
+            if not op:
+                return left
+            right = self._unary()
+            left = _binary(left, right, (lambda a, b: a * b) if op == '*' else (lambda a, b: a / b))
+    
+    def _unary(self):
+        if self._accept('-'):
+            operand = self._unary()
+            return lambda env: -operand(env)
+        return self._primary()
+    
+    def _primary(self):
+        kind, value = self._peek()
+        
+        if self._accept('('):
+            expr = self._or()
+            self._expect(')')
+            return expr
+        if kind in ('number', 'string') or value in ('NULL', 'TRUE', 'FALSE'):
+            literal = self._literal()
+            return lambda env: literal
+        if kind == 'name':
+            self.pos += 1
+            if self._peek()[1] == '(':
+                return self._function(value.upper())
+            name = value.lower()
+            self.columns.add(name)
+            return lambda env: env[name]
+        raise ValueError(f"Unexpected token {value!r}")
+    
+    def _literal(self):
+        kind, value = self._peek()
+        self.pos += 1
+        if kind == 'number':
+            return float(value)
+        if kind == 'string':
+            return value[1:-1].replace("''", "'")
+        if value == 'NULL':
+            return None
+        if value in ('TRUE', 'FALSE'):
+            return value == 'TRUE'
+        raise ValueError(f"Expected a literal, got {value!r}")
+    
+    def _function(self, name):
+        self._expect('(')
+        
+        if name == 'COUNT':
+            # COUNT(*) OVER (PARTITION BY a, b, ...) - group sizes, used for duplicate rules
+            self._expect('*')
+            self._expect(')')
+            self._expect('OVER')
+            self._expect('(')
+            self._expect('PARTITION')
+            self._expect('BY')
+            keys = [self._name()]
+            while self._accept(','):
+                keys.append(self._name())
+            self._expect(')')
+            self.columns.update(keys)
+            
+            def group_size(env):
+                frame = pd.DataFrame({key: env[key] for key in keys})
+                return frame.groupby(keys, dropna=False, sort=False, observed=True)[keys[0]].transform('size')
+            return group_size
+        
+        args = []
+        if not self._accept(')'):
+            args.append(self._or())
+            while self._accept(','):
+                args.append(self._or())
+            self._expect(')')
+        
+        if name in ('CURRENT_DATE', 'CURRENT_TIMESTAMP') and not args:
+            return lambda env: pd.Timestamp.now().normalize() if name == 'CURRENT_DATE' else pd.Timestamp.now()
+        if name == 'ABS' and len(args) == 1:
+            return lambda env: abs(args[0](env))
+        if name == 'COALESCE' and args:
+            def coalesce(env):
+                result = _as_series(args[0](env), env)
+                for arg in args[1:]:
+                    result = result.fillna(arg(env))
+                return result
+            return coalesce
+        if name in ('UPPER', 'LOWER', 'TRIM', 'LENGTH') and len(args) == 1:
+            method = {'UPPER': 'upper', 'LOWER': 'lower', 'TRIM': 'strip', 'LENGTH': 'len'}[name]
+            return lambda env: getattr(_as_series(args[0](env), env).astype('string').str, method)()
+        raise ValueError(f"Unsupported function {name}")
+    
+    def _name(self):
+        kind, value = self._peek()
+        if kind != 'name':
+            raise ValueError(f"Expected a column name, got {value!r}")
+        self.pos += 1
+        return value.lower()
+
+
+def _binary(left, right, op):
+    return lambda env: op(left(env), right(env))
+
+
+def _as_series(value, env):
+    if isinstance(value, pd.Series):
+        return value
+    return pd.Series(value, index=env.df.index)
+
+
+# Predicates use SQL's three-valued logic: comparisons with a NULL side are
+# NULL (pd.NA in a nullable boolean), AND / OR / NOT keep it NULL where SQL
+# does, and only rows where the predicate is TRUE match (see _as_mask)
+
+def _sql_compare(a, b, compare):
+    result = compare(a, b)
+    if not isinstance(result, pd.Series):
+        return pd.NA if pd.isna(a) or pd.isna(b) else result
+    return result.astype('boolean').mask(pd.isna(a) | pd.isna(b))
+
+
+def _sql_in(series, values):
+    result = series.isin(values).astype('boolean').mask(series.isna())
+    if any(value is None for value in values):
+        # x IN (..., NULL) is NULL rather than FALSE when nothing matches
+        result = result.mask(~result.fillna(True))
+    return result
+
+
+def _negate(value, env):
+    return ~_as_series(value, env).astype('boolean')
+
+
 # Example usage
 if __name__ == "__main__":
     # This would be used with actual data
@@ -244,6 +898,10 @@ if __name__ == "__main__":
     # df = pd.read_csv('stock_data.csv')
     # results = validate_daily_stock_data(df)
     # print(generate_validation_report(results))
+    #
+    # Rule-driven validation (rules from config/data_quality_rules.json):
+    # results = run_quality_rules(df)
     
     print("Data validation module loaded successfully")
     print("Use validate_daily_stock_data(df) to validate your data")
+    print("Use run_quality_rules(df) to apply the DATA_QUALITY_RULES checks")